@@ -0,0 +1,120 @@
+import argparse
+import csv
+import io
+import sys
+import time
+import tracemalloc
+
+from chronon_parser import (
+    ler_csv_chronon, mascara_cabecalhos_pilotos, extrair_voltas_chronon, calcular_metricas_avancadas_completas,
+    processar_csv_chronon_streaming, compactar_voltas
+)
+from chronon_agregados import calcular_agregados_etapa
+from chronon_sintetico import gerar_csv_chronon
+from stock_car_engine import MAPEAMENTO_COMPLETO_PILOTOS, CADASTRO_PILOTOS, classificacao_campeonato, montar_etapa
+
+# Sessões que valem pontos, usadas para medir o campeonato com K etapas
+SESSOES_BENCHMARK = ['Prova1 Sprint', 'P2']
+
+
+def medir(etapa, funcao, *args):
+    """Executa uma etapa do pipeline medindo tempo de parede e pico de memória alocada"""
+    tracemalloc.reset_peak()
+    memoria_inicial = tracemalloc.get_traced_memory()[0]
+    inicio = time.perf_counter()
+
+    resultado = funcao(*args)
+
+    tempo = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1] - memoria_inicial
+    return resultado, {'etapa': etapa, 'tempo_s': tempo, 'pico_mb': pico / (1024 * 1024)}
+
+
+def medir_tamanho(pilotos, voltas, sessoes, semente=0):
+    """Mede cada etapa do pipeline para N pilotos x M voltas x K sessões"""
+    nomes_base = list(MAPEAMENTO_COMPLETO_PILOTOS)
+    medicoes = []
+    etapas = {}
+
+    for k in range(sessoes):
+        texto = gerar_csv_chronon(pilotos, voltas, semente=semente + k, nomes_base=nomes_base)
+
+        bruto, medicao = medir('leitura', ler_csv_chronon, io.StringIO(texto))
+        medicoes.append(medicao)
+
+        cabecalhos, medicao = medir('cabecalhos', mascara_cabecalhos_pilotos, bruto)
+        medicoes.append(medicao)
+
+        voltas_df, medicao = medir('segmentacao', extrair_voltas_chronon, bruto, CADASTRO_PILOTOS, cabecalhos)
+        medicoes.append(medicao)
+
+        voltas_df, medicao = medir('metricas', calcular_metricas_avancadas_completas, voltas_df)
+        medicoes.append(medicao)
+
+        _, medicao = medir('importacao_em_blocos', processar_csv_chronon_streaming, io.StringIO(texto), CADASTRO_PILOTOS)
+        medicoes.append(medicao)
+
+        voltas_df, medicao = medir('compactacao', compactar_voltas, voltas_df, False)
+        medicoes.append(medicao)
+
+        _, medicao = medir('agregados', calcular_agregados_etapa, voltas_df)
+        medicoes.append(medicao)
+
+        sessao = SESSOES_BENCHMARK[k % len(SESSOES_BENCHMARK)]
+        etapas[f"2024_#{k + 1} Benchmark_{sessao}"] = montar_etapa(voltas_df, '2024', f"#{k + 1} Benchmark", sessao, 'Interlagos')
+
+    _, medicao = medir('campeonato', classificacao_campeonato, etapas)
+    medicoes.append(medicao)
+
+    # Tempo e pico por etapa do pipeline, somando as K sessões
+    resumo = {}
+    for medicao in medicoes:
+        atual = resumo.setdefault(medicao['etapa'], {'tempo_s': 0.0, 'pico_mb': 0.0})
+        atual['tempo_s'] += medicao['tempo_s']
+        atual['pico_mb'] = max(atual['pico_mb'], medicao['pico_mb'])
+
+    return [
+        {'pilotos': pilotos, 'voltas': voltas, 'sessoes': sessoes, 'linhas': pilotos * voltas * sessoes, 'etapa': etapa, **valores}
+        for etapa, valores in resumo.items()
+    ]
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline Chronon com CSVs sintéticos")
+    parser.add_argument('--pilotos', type=int, nargs='+', default=[10, 30])
+    parser.add_argument('--voltas', type=int, nargs='+', default=[50, 500])
+    parser.add_argument('--sessoes', type=int, default=2)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', help="CSV onde as medições são acrescentadas, para acompanhar regressões")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    resultados = []
+
+    tracemalloc.start()
+    try:
+        for pilotos in args.pilotos:
+            for voltas in args.voltas:
+                resultados.extend(medir_tamanho(pilotos, voltas, args.sessoes, args.semente))
+    finally:
+        tracemalloc.stop()
+
+    print(f"{'pilotos':>7} {'voltas':>6} {'sessões':>7} {'etapa':<22} {'tempo (s)':>10} {'pico (MB)':>10}")
+    for linha in resultados:
+        print(f"{linha['pilotos']:>7} {linha['voltas']:>6} {linha['sessoes']:>7} {linha['etapa']:<22} "
+              f"{linha['tempo_s']:>10.4f} {linha['pico_mb']:>10.2f}")
+
+    if args.saida:
+        with open(args.saida, 'a', newline='', encoding='utf-8') as arquivo:
+            escritor = csv.DictWriter(arquivo, fieldnames=list(resultados[0]))
+            if arquivo.tell() == 0:
+                escritor.writeheader()
+            escritor.writerows(resultados)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
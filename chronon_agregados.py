@@ -0,0 +1,263 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from chronon_diagnostico import medir, rotulo_etapa
+from chronon_stints import resumo_stints
+
+# Agregações da classificação por piloto (melhor volta e dados do cadastro)
+AGREGACOES_CLASSIFICACAO = {
+    'Lap_Sec': 'min',
+    'Speed_Kmh': 'max',
+    'Speed_Trap_Kmh': 'max',
+    'Equipe': 'first',
+    'Montadora': 'first',
+    'Numero_Oficial': 'first'
+}
+
+SETORES = ['S1_Sec', 'S2_Sec', 'S3_Sec']
+
+# Versão de cada cálculo de agregados no processo: muda sempre que os dados da etapa mudam
+_versoes_agregados = itertools.count(1)
+
+
+def classificar_pilotos(df):
+    """Melhor volta de cada piloto, ordenada, com a posição na sessão"""
+    if df.empty or 'Lap_Sec' not in df.columns:
+        return pd.DataFrame(columns=['Nome_Piloto', *AGREGACOES_CLASSIFICACAO, 'Posicao'])
+
+    agregacoes = {coluna: funcao for coluna, funcao in AGREGACOES_CLASSIFICACAO.items() if coluna in df.columns}
+
+    classificacao = df.dropna(subset=['Lap_Sec']).groupby('Nome_Piloto', observed=True).agg(agregacoes).reset_index()
+    classificacao = classificacao.sort_values('Lap_Sec', kind='stable').reset_index(drop=True)
+    classificacao['Posicao'] = range(1, len(classificacao) + 1)
+
+    return classificacao
+
+
+def _speed_trap_por_montadora(df):
+    """Estatísticas de speed trap por montadora"""
+    if 'Speed_Trap_Kmh' not in df.columns:
+        return None
+
+    speed_por_montadora = df.dropna(subset=['Speed_Trap_Kmh']).groupby('Montadora', observed=True).agg({
+        'Speed_Trap_Kmh': ['max', 'mean', 'std', 'count'],
+        'Nome_Piloto': 'nunique'
+    }).round(2)
+
+    speed_por_montadora.columns = ['Max', 'Média', 'Desvio', 'Voltas', 'Pilotos']
+    return speed_por_montadora.reset_index()
+
+
+def _analise_setorial(df, setores):
+    """Melhor, média e desvio de cada setor por piloto"""
+    if not setores or 'Lap_Sec' not in df.columns:
+        return None
+
+    analise_setorial = df.dropna(subset=setores).groupby('Nome_Piloto', observed=True).agg({
+        **{setor: ['min', 'mean', 'std'] for setor in setores},
+        'Lap_Sec': 'min',
+        'Equipe': 'first',
+        'Montadora': 'first'
+    }).round(3)
+
+    analise_setorial.columns = ['_'.join(col).strip() for col in analise_setorial.columns]
+    analise_setorial = analise_setorial.reset_index()
+
+    # Identificar melhor setor por piloto
+    if len(setores) >= 3:
+        colunas_min = [f'{setor}_min' for setor in setores]
+        analise_setorial['Melhor_Setor'] = analise_setorial[colunas_min].idxmin(axis=1).str.replace('_Sec_min', '').str.replace('_', ' ')
+
+    return analise_setorial
+
+
+def _resumo_pilotos(df, setores):
+    """Estatísticas de cada piloto na etapa, em uma única passada agrupada"""
+    agregacoes = {
+        'equipe': ('Equipe', 'first'),
+        'montadora': ('Montadora', 'first'),
+        'numero': ('Numero_Oficial', 'first'),
+        'total_voltas': ('Nome_Piloto', 'size'),
+    }
+
+    if 'Lap_Sec' in df.columns:
+        agregacoes.update({
+            'voltas_validas': ('Lap_Sec', 'count'),
+            'melhor_volta': ('Lap_Sec', 'min'),
+            'pior_volta': ('Lap_Sec', 'max'),
+            'tempo_medio': ('Lap_Sec', 'mean'),
+            'consistencia': ('Lap_Sec', 'std'),
+        })
+
+    if 'Speed_Kmh' in df.columns:
+        agregacoes.update({
+            'velocidade_maxima': ('Speed_Kmh', 'max'),
+            'velocidade_media': ('Speed_Kmh', 'mean'),
+        })
+
+    if 'Speed_Trap_Kmh' in df.columns:
+        agregacoes['speed_trap_max'] = ('Speed_Trap_Kmh', 'max')
+
+    for i, setor in enumerate(setores, 1):
+        agregacoes[f'melhor_setor_{i}'] = (setor, 'min')
+        agregacoes[f'media_setor_{i}'] = (setor, 'mean')
+
+    resumo = df.groupby('Nome_Piloto', observed=True).agg(**agregacoes)
+
+    # Volta teórica: soma dos melhores setores do piloto, só quando ele tem tempo em todos
+    if setores and 'melhor_volta' in resumo.columns:
+        colunas_setores = [f'melhor_setor_{i}' for i in range(1, len(setores) + 1)]
+        resumo['volta_teorica'] = resumo[colunas_setores].sum(axis=1, min_count=len(setores))
+        resumo['ganho_teorico'] = resumo['melhor_volta'] - resumo['volta_teorica']
+
+    return resumo
+
+
+def _volta_ideal(pilotos, setores):
+    """Volta ideal do grid: o melhor tempo de cada setor entre todos os carros e quem o fez"""
+    if not setores or 'volta_teorica' not in pilotos.columns:
+        return None
+
+    tempos = pilotos[[f'melhor_setor_{i}' for i in range(1, len(setores) + 1)]]
+    if tempos.isna().all(axis=None):
+        return None
+
+    # Setor sem nenhum tempo (laço morto) fica sem dono, e a volta ideal sem valor
+    com_tempo = tempos.columns[tempos.notna().any()]
+    donos = tempos[com_tempo].idxmin(axis=0).reindex(tempos.columns)
+    setores_ideais = pd.DataFrame({
+        'setor': [setor.replace('_Sec', '') for setor in setores],
+        'tempo': tempos.min(axis=0).to_numpy(dtype=np.float64),
+        'piloto': donos.astype(object).to_numpy(),
+    })
+
+    melhor_volta = float(pilotos['melhor_volta'].min())
+    tempo_ideal = float(setores_ideais['tempo'].sum(min_count=len(setores)))
+
+    return {
+        'setores': setores_ideais,
+        'tempo': tempo_ideal,
+        'melhor_volta': melhor_volta,
+        'ganho': melhor_volta - tempo_ideal,
+    }
+
+
+def indexar_pilotos(df):
+    """Linhas de cada piloto na etapa: uma fatia quando o bloco é contíguo (o normal no Chronon), senão as posições"""
+    if df.empty or 'Nome_Piloto' not in df.columns:
+        return {}
+
+    nomes = df['Nome_Piloto']
+    if isinstance(nomes.dtype, pd.CategoricalDtype):
+        codigos, categorias = nomes.cat.codes.to_numpy(), nomes.cat.categories
+    else:
+        codigos, categorias = pd.factorize(nomes)
+
+    # Início de cada bloco de linhas consecutivas do mesmo piloto
+    inicios = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]])
+    fins = np.r_[inicios[1:], len(codigos)]
+    codigos_blocos = codigos[inicios]
+
+    if len(np.unique(codigos_blocos)) == len(codigos_blocos):
+        return {
+            categorias[codigo]: slice(int(inicio), int(fim))
+            for codigo, inicio, fim in zip(codigos_blocos, inicios, fins)
+            if codigo >= 0
+        }
+
+    # Piloto em mais de um bloco: posições de todas as suas linhas, na ordem da primeira aparição
+    ordem = np.argsort(codigos, kind='stable')
+    limites = np.searchsorted(codigos[ordem], np.arange(len(categorias) + 1))
+    indice = {}
+    for codigo in dict.fromkeys(codigos_blocos):
+        if codigo >= 0:
+            indice[categorias[codigo]] = ordem[limites[codigo]:limites[codigo + 1]]
+    return indice
+
+
+def voltas_piloto(agregados, nome_piloto):
+    """Voltas do piloto na etapa, pelo índice de linhas, sem varrer o DataFrame"""
+    linhas = agregados['indice_pilotos'].get(nome_piloto)
+    df = agregados['dataframe']
+    return df.iloc[0:0] if linhas is None else df.iloc[linhas]
+
+
+def calcular_agregados_etapa(df):
+    """Todas as agregações por piloto e por montadora usadas pelas seções do app"""
+    setores = [setor for setor in SETORES if setor in df.columns]
+    pilotos = _resumo_pilotos(df, setores)
+
+    return {
+        'dataframe': df,
+        'versao': next(_versoes_agregados),
+        'setores': setores,
+        'total_voltas': len(df),
+        'indice_pilotos': indexar_pilotos(df),
+        'melhor_volta': df['Lap_Sec'].min() if 'Lap_Sec' in df.columns else None,
+        'classificacao': classificar_pilotos(df),
+        'pilotos': pilotos,
+        'volta_ideal': _volta_ideal(pilotos, setores),
+        'stints': resumo_stints(df),
+        'speed_trap_montadora': _speed_trap_por_montadora(df),
+        'setorial': _analise_setorial(df, setores),
+    }
+
+
+def obter_agregados_etapa(dados_etapa):
+    """Agregados da etapa, recalculados só quando o DataFrame da etapa muda"""
+    df = dados_etapa['dataframe']
+    agregados = dados_etapa.get('agregados')
+
+    if agregados is None or agregados['dataframe'] is not df:
+        with medir('agregados', rotulo_etapa(dados_etapa), df):
+            agregados = calcular_agregados_etapa(df)
+        dados_etapa['agregados'] = agregados
+
+    return agregados
+
+
+def _melhores_voltas(agregados):
+    """Melhor volta e cadastro de cada piloto com tempo válido, indexados pelo nome em texto"""
+    pilotos = agregados['pilotos']
+    if 'melhor_volta' not in pilotos.columns:
+        return pd.DataFrame(columns=['melhor_volta', 'equipe', 'montadora'])
+
+    melhores = pilotos[['melhor_volta', 'equipe', 'montadora']].dropna(subset=['melhor_volta'])
+    melhores.index = melhores.index.astype(object)
+    return melhores.astype({'melhor_volta': 'float64'})
+
+
+def comparar_etapas(agregados1, agregados2):
+    """Evolução da melhor volta de cada piloto presente nas duas etapas, ordenada da maior melhora"""
+    comparacao = _melhores_voltas(agregados1).join(
+        _melhores_voltas(agregados2)['melhor_volta'].rename('Etapa2'), how='inner'
+    ).rename(columns={'melhor_volta': 'Etapa1', 'equipe': 'Equipe', 'montadora': 'Montadora'})
+
+    comparacao['Evolução'] = comparacao['Etapa2'] - comparacao['Etapa1']
+    comparacao['Evolução_Perc'] = comparacao['Evolução'] / comparacao['Etapa1'] * 100
+
+    comparacao = comparacao.rename_axis('Piloto').reset_index()
+    colunas = ['Piloto', 'Etapa1', 'Etapa2', 'Evolução', 'Evolução_Perc', 'Equipe', 'Montadora']
+    return comparacao[colunas].sort_values('Evolução', kind='stable').reset_index(drop=True)
+
+
+def matriz_melhores_voltas(agregados_etapas):
+    """Matriz piloto x etapa das melhores voltas, a partir de {rótulo: agregados} na ordem desejada"""
+    if not agregados_etapas:
+        return pd.DataFrame()
+
+    return pd.concat(
+        {rotulo: _melhores_voltas(agregados)['melhor_volta'] for rotulo, agregados in agregados_etapas.items()},
+        axis=1
+    ).rename_axis('Piloto')
+
+
+def progressao_pilotos(matriz):
+    """Etapas disputadas e evolução da primeira para a última delas, por piloto, da maior melhora"""
+    progressao = pd.DataFrame({
+        'Etapas': matriz.notna().sum(axis=1),
+        'Evolução': matriz.ffill(axis=1).iloc[:, -1] - matriz.bfill(axis=1).iloc[:, 0],
+    }, index=matriz.index)
+    return progressao.sort_values('Evolução', kind='stable')
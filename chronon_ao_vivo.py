@@ -0,0 +1,219 @@
+import io
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from chronon_agregados import SETORES
+from chronon_diagnostico import medir
+from chronon_parser import (
+    ler_csv_chronon, validar_csv_chronon, mascara_cabecalhos_pilotos, extrair_voltas_chronon,
+    calcular_metricas_avancadas_completas
+)
+
+# Resumo por piloto mantido a cada volta nova: (coluna das voltas, agregação das voltas, agregação entre resumos)
+RESUMO_PILOTOS = {
+    'Lap_Sec': ('Lap_Sec', 'min', 'min'),
+    'Speed_Kmh': ('Speed_Kmh', 'max', 'max'),
+    'Speed_Trap_Kmh': ('Speed_Trap_Kmh', 'max', 'max'),
+    **{setor: (setor, 'min', 'min') for setor in SETORES},
+    'Equipe': ('Equipe', 'last', 'last'),
+    'Montadora': ('Montadora', 'last', 'last'),
+    'Numero_Oficial': ('Numero_Oficial', 'last', 'last'),
+    'Voltas': ('Nome_Piloto', 'size', 'sum'),
+    'Ultima_Volta': ('Lap_Sec', 'last', 'last'),
+    'Lap_Number': ('Lap_Number', 'max', 'max'),
+}
+
+COLUNAS_CLASSIFICACAO = ['Nome_Piloto', 'Lap_Sec', 'Speed_Kmh', 'Speed_Trap_Kmh', 'Equipe', 'Montadora', 'Numero_Oficial']
+
+
+class LeitorIncremental:
+    """Lê de um CSV do Chronon em gravação só os bytes acrescentados desde a última leitura"""
+
+    def __init__(self, caminho, cadastro):
+        self.caminho = Path(caminho)
+        self.cadastro = cadastro
+        self.releituras = 0
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Volta ao começo do arquivo, sem cabeçalho de colunas nem piloto corrente"""
+        self.posicao = 0
+        self.identidade = None
+        self.linha_colunas = None
+        self.cabecalho_piloto = None
+        self.resto = b''
+
+    def ler_novas_voltas(self):
+        """Voltas das linhas completas gravadas desde a última leitura; arquivo trocado ou truncado é relido"""
+        try:
+            estado = self.caminho.stat()
+        except FileNotFoundError:
+            return pd.DataFrame()
+
+        identidade = (estado.st_dev, estado.st_ino)
+        if identidade != self.identidade or estado.st_size < self.posicao:
+            if self.identidade is not None:
+                self.releituras += 1
+            self.reiniciar()
+            self.identidade = identidade
+
+        if estado.st_size == self.posicao:
+            return pd.DataFrame()
+
+        with open(self.caminho, 'rb') as arquivo:
+            arquivo.seek(self.posicao)
+            novos = arquivo.read(estado.st_size - self.posicao)
+
+        self.posicao += len(novos)
+        return self.processar_bytes(novos)
+
+    def processar_bytes(self, novos):
+        """Voltas das linhas completas de 'novos'; a linha ainda incompleta no fim espera a próxima leitura"""
+        dados = self.resto + novos
+        fim = dados.rfind(b'\n') + 1
+        dados, self.resto = dados[:fim], dados[fim:]
+
+        # A primeira linha do arquivo traz as colunas e é repetida antes de cada trecho lido
+        if self.linha_colunas is None:
+            if not dados:
+                return pd.DataFrame()
+            quebra = dados.find(b'\n') + 1
+            self.linha_colunas, dados = dados[:quebra], dados[quebra:]
+
+        if not dados.strip():
+            return pd.DataFrame()
+
+        bloco = ler_csv_chronon(io.BytesIO(self.linha_colunas + dados))
+        validar_csv_chronon(bloco)
+
+        cabecalhos = mascara_cabecalhos_pilotos(bloco)
+        voltas = extrair_voltas_chronon(bloco, self.cadastro, cabecalhos, self.cabecalho_piloto)
+
+        # Linhas sem cabeçalho no trecho continuam sendo do último piloto visto
+        if cabecalhos.any():
+            self.cabecalho_piloto = str(bloco.iloc[np.flatnonzero(cabecalhos)[-1], 0])
+
+        if voltas.empty:
+            return voltas
+        return calcular_metricas_avancadas_completas(voltas)
+
+
+class AgregadosAoVivo:
+    """Melhor volta, setores e speed trap atualizados só com as voltas novas, sem reagrupar a sessão inteira"""
+
+    def __init__(self):
+        self.pilotos = pd.DataFrame()
+        self.montadoras = pd.DataFrame()
+        self.blocos = []
+        self.total_voltas = 0
+        self.versao = 0
+        self._dataframe = None
+
+    def aplicar(self, voltas):
+        """Soma as voltas novas ao resumo por piloto e por montadora"""
+        if voltas.empty or 'Nome_Piloto' not in voltas.columns:
+            return
+
+        resumo = {nome: (coluna, funcao) for nome, (coluna, funcao, _) in RESUMO_PILOTOS.items() if coluna in voltas.columns}
+        novos = voltas.groupby('Nome_Piloto', observed=True, sort=False).agg(**resumo)
+        novos.index = novos.index.astype(str)
+        self.pilotos = self._combinar(self.pilotos, novos, {nome: combinar for nome, (_, _, combinar) in RESUMO_PILOTOS.items()})
+
+        if 'Speed_Trap_Kmh' in voltas.columns and 'Montadora' in voltas.columns:
+            velocidades = voltas['Speed_Trap_Kmh'].astype(np.float64)
+            somas = pd.DataFrame({
+                'soma': velocidades, 'soma_quadrados': velocidades ** 2, 'voltas': velocidades.notna(), 'maxima': velocidades
+            })[velocidades.notna()].groupby(voltas['Montadora'].astype(str)[velocidades.notna()], sort=False).agg(
+                {'soma': 'sum', 'soma_quadrados': 'sum', 'voltas': 'sum', 'maxima': 'max'}
+            )
+            self.montadoras = self._combinar(
+                self.montadoras, somas, {'soma': 'sum', 'soma_quadrados': 'sum', 'voltas': 'sum', 'maxima': 'max'}
+            )
+
+        self.blocos.append(voltas)
+        self.total_voltas += len(voltas)
+        self.versao += 1
+        self._dataframe = None
+
+    @staticmethod
+    def _combinar(atual, novos, agregacoes):
+        if atual.empty:
+            return novos
+        combinado = pd.concat([atual, novos])
+        return combinado.groupby(level=0, sort=False).agg({col: agregacoes[col] for col in combinado.columns})
+
+    def classificacao(self):
+        """Melhor volta de cada piloto, no formato de classificar_pilotos"""
+        if self.pilotos.empty or 'Lap_Sec' not in self.pilotos.columns:
+            return pd.DataFrame(columns=COLUNAS_CLASSIFICACAO + ['Posicao'])
+
+        colunas = [col for col in COLUNAS_CLASSIFICACAO[1:] if col in self.pilotos.columns]
+        classificacao = self.pilotos.dropna(subset=['Lap_Sec'])[colunas].rename_axis('Nome_Piloto').reset_index()
+        classificacao = classificacao.sort_values('Lap_Sec', kind='stable').reset_index(drop=True)
+        classificacao['Posicao'] = range(1, len(classificacao) + 1)
+        return classificacao
+
+    def melhores_setores(self):
+        """Melhor tempo de cada setor no momento, com o piloto que o fez"""
+        setores = [setor for setor in SETORES if setor in self.pilotos.columns and self.pilotos[setor].notna().any()]
+        return pd.DataFrame({
+            'setor': [setor.replace('_Sec', '') for setor in setores],
+            'tempo': [self.pilotos[setor].min() for setor in setores],
+            'piloto': [self.pilotos[setor].idxmin() for setor in setores],
+        })
+
+    def volta_ideal(self):
+        """Soma dos melhores setores da sessão até agora, ou None sem setores"""
+        setores = self.melhores_setores()
+        return None if setores.empty else float(setores['tempo'].sum())
+
+    def speed_trap_montadora(self):
+        """Speed trap por montadora, nas mesmas colunas da análise da etapa importada"""
+        if self.montadoras.empty:
+            return None
+
+        voltas = self.montadoras['voltas']
+        media = self.montadoras['soma'] / voltas
+        with np.errstate(invalid='ignore', divide='ignore'):
+            desvio = np.sqrt(np.maximum(self.montadoras['soma_quadrados'] - self.montadoras['soma'] * media, 0) / (voltas - 1))
+
+        com_speed_trap = self.pilotos.dropna(subset=['Speed_Trap_Kmh']) if 'Speed_Trap_Kmh' in self.pilotos.columns else self.pilotos
+        return pd.DataFrame({
+            'Max': self.montadoras['maxima'],
+            'Média': media,
+            'Desvio': desvio.where(voltas > 1),
+            'Voltas': voltas.astype(np.int64),
+            'Pilotos': com_speed_trap.groupby('Montadora', sort=False).size().reindex(self.montadoras.index, fill_value=0),
+        }).round(2).rename_axis('Montadora').reset_index()
+
+    def dataframe(self):
+        """Todas as voltas recebidas, concatenadas só quando pedidas"""
+        if self._dataframe is None:
+            self._dataframe = pd.concat(self.blocos, ignore_index=True) if self.blocos else pd.DataFrame()
+            self.blocos = [self._dataframe] if self.blocos else []
+        return self._dataframe
+
+
+class AcompanhamentoAoVivo:
+    """Arquivo do Chronon em gravação e os agregados da sessão, atualizados a cada leitura"""
+
+    def __init__(self, caminho, cadastro):
+        self.leitor = LeitorIncremental(caminho, cadastro)
+        self.agregados = AgregadosAoVivo()
+        self.releituras = 0
+
+    def atualizar(self):
+        """Lê as voltas novas e as aplica aos agregados; devolve quantas chegaram"""
+        with medir('ao_vivo') as medicao:
+            voltas = medicao['df'] = self.leitor.ler_novas_voltas()
+
+            # Arquivo trocado ou truncado foi relido do começo: a sessão recomeça junto
+            if self.leitor.releituras != self.releituras:
+                self.releituras = self.leitor.releituras
+                self.agregados = AgregadosAoVivo()
+
+            self.agregados.aplicar(voltas)
+
+        return len(voltas)
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+from chronon_diagnostico import medir, rotulo_etapa
+from chronon_parser import COLUNAS_ESQUEMA_COMPACTO, compactar_voltas
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Diretório local onde cada etapa importada fica salva em Parquet
+DIRETORIO_ARMAZENAMENTO = Path(__file__).resolve().parent / 'dados_chronon'
+ARQUIVO_INDICE = 'indice.json'
+
+# Metadados da etapa gravados junto com o DataFrame processado
+CAMPOS_METADADOS_ETAPA = [
+    'temporada', 'etapa', 'sessao', 'pista', 'dados_pista', 'info_sessao', 'observacoes', 'data_importacao',
+    'pilotos', 'total_voltas'
+]
+
+
+def armazenamento_disponivel():
+    """Indica se o pyarrow está instalado para gravar e ler Parquet"""
+    return pq is not None
+
+
+def _nome_arquivo_etapa(chave):
+    """Nome de arquivo seguro e único para a chave da etapa"""
+    legivel = re.sub(r'[^\w.-]+', '_', chave).strip('_')[:60]
+    resumo = hashlib.sha1(chave.encode('utf-8')).hexdigest()[:10]
+    return f"{legivel}_{resumo}.parquet"
+
+
+def _gravar_atomico(caminho, gravar):
+    """Grava em arquivo temporário e substitui o destino só quando a escrita termina"""
+    temporario = caminho.with_name(caminho.name + '.tmp')
+    gravar(temporario)
+    os.replace(temporario, caminho)
+
+
+def _ler_indice(diretorio):
+    """Lê o índice de etapas salvas (metadados apenas, sem abrir os Parquet)"""
+    caminho = Path(diretorio) / ARQUIVO_INDICE
+    if not caminho.exists():
+        return {}
+
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def _gravar_indice(diretorio, indice):
+    """Grava o índice de etapas salvas"""
+    def gravar(caminho):
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump(indice, arquivo, ensure_ascii=False, indent=2)
+
+    _gravar_atomico(Path(diretorio) / ARQUIVO_INDICE, gravar)
+
+
+def resumo_voltas(df):
+    """Pilotos e total de voltas da etapa, guardados nos metadados para contar sem abrir o Parquet"""
+    pilotos = df['Nome_Piloto'].dropna().unique() if 'Nome_Piloto' in df.columns else []
+    return {'pilotos': sorted(str(piloto) for piloto in pilotos), 'total_voltas': len(df)}
+
+
+def metadados_voltas(dados_etapa):
+    """Garante pilotos e total de voltas nos metadados; etapas salvas antes deles leem as voltas uma vez"""
+    if dados_etapa.get('pilotos') is None or dados_etapa.get('total_voltas') is None:
+        dados_etapa.update(resumo_voltas(dados_etapa['dataframe']))
+    return dados_etapa
+
+
+def _serializar_metadados(dados_etapa):
+    """Converte os metadados da etapa para um formato JSON"""
+    metadados = {campo: dados_etapa.get(campo) for campo in CAMPOS_METADADOS_ETAPA}
+    if isinstance(metadados['data_importacao'], datetime):
+        metadados['data_importacao'] = metadados['data_importacao'].isoformat()
+    return metadados
+
+
+def _restaurar_metadados(metadados):
+    """Restaura os metadados lidos do índice para o formato usado na sessão"""
+    metadados = {campo: metadados.get(campo) for campo in CAMPOS_METADADOS_ETAPA}
+    if metadados['data_importacao']:
+        metadados['data_importacao'] = datetime.fromisoformat(metadados['data_importacao'])
+    return metadados
+
+
+def carregar_dataframe_etapa(caminho, colunas=None):
+    """Lê o DataFrame de uma etapa salva, com memory map do arquivo Parquet"""
+    return pq.read_table(caminho, columns=colunas, memory_map=True).to_pandas()
+
+
+def carregar_voltas_compactas(caminho, manter_colunas_brutas=False):
+    """Voltas da etapa no esquema compacto; as colunas brutas só são lidas se pedidas"""
+    colunas = None
+    if not manter_colunas_brutas:
+        colunas = [coluna for coluna in pq.read_schema(caminho).names if coluna in COLUNAS_ESQUEMA_COMPACTO]
+
+    return compactar_voltas(carregar_dataframe_etapa(caminho, colunas))
+
+
+class EtapaArmazenada(dict):
+    """Entrada de etapa cujo DataFrame só é lido do disco no primeiro acesso"""
+
+    def __init__(self, metadados, caminho, manter_colunas_brutas=False):
+        super().__init__(metadados)
+        self.caminho = Path(caminho)
+        self.manter_colunas_brutas = manter_colunas_brutas
+
+    def __missing__(self, campo):
+        if campo != 'dataframe':
+            raise KeyError(campo)
+
+        with medir('leitura_parquet', rotulo_etapa(self)) as medicao:
+            df = medicao['df'] = carregar_voltas_compactas(self.caminho, self.manter_colunas_brutas)
+        self['dataframe'] = df
+        return df
+
+    def __contains__(self, campo):
+        return campo == 'dataframe' or super().__contains__(campo)
+
+    def get(self, campo, padrao=None):
+        return self[campo] if campo in self else padrao
+
+    @property
+    def carregada(self):
+        """Indica se o DataFrame já foi lido do disco"""
+        return dict.__contains__(self, 'dataframe')
+
+
+def salvar_etapa(chave, dados_etapa, diretorio=DIRETORIO_ARMAZENAMENTO):
+    """Salva o DataFrame processado da etapa em Parquet e registra seus metadados no índice"""
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+
+    metadados = _serializar_metadados(metadados_voltas(dados_etapa))
+    nome_arquivo = _nome_arquivo_etapa(chave)
+
+    # Metadados também vão no próprio Parquet, para o arquivo ser autossuficiente
+    tabela = pa.Table.from_pandas(dados_etapa['dataframe'], preserve_index=False)
+    metadados_schema = dict(tabela.schema.metadata or {})
+    metadados_schema[b'chronon_etapa'] = json.dumps({'chave': chave, **metadados}, ensure_ascii=False).encode('utf-8')
+    tabela = tabela.replace_schema_metadata(metadados_schema)
+
+    with medir('gravacao_parquet', chave, dados_etapa['dataframe']):
+        _gravar_atomico(diretorio / nome_arquivo, lambda caminho: pq.write_table(tabela, caminho))
+
+    indice = _ler_indice(diretorio)
+    indice[chave] = {**metadados, 'arquivo': nome_arquivo, 'linhas': tabela.num_rows}
+    _gravar_indice(diretorio, indice)
+
+
+def carregar_etapas_salvas(diretorio=DIRETORIO_ARMAZENAMENTO, manter_colunas_brutas=False):
+    """Abre todas as etapas salvas de forma preguiçosa: só o índice é lido agora"""
+    diretorio = Path(diretorio)
+    etapas = {}
+
+    for chave, registro in _ler_indice(diretorio).items():
+        caminho = diretorio / registro['arquivo']
+        if caminho.exists():
+            etapas[chave] = EtapaArmazenada(_restaurar_metadados(registro), caminho, manter_colunas_brutas)
+
+    return etapas
+
+
+def carregar_etapa_completa(chave, diretorio=DIRETORIO_ARMAZENAMENTO):
+    """Voltas da etapa com todas as colunas gravadas, inclusive as brutas do Chronon, ou None"""
+    diretorio = Path(diretorio)
+    registro = _ler_indice(diretorio).get(chave)
+
+    if registro is None or not (diretorio / registro['arquivo']).exists():
+        return None
+
+    return carregar_voltas_compactas(diretorio / registro['arquivo'], manter_colunas_brutas=True)
+
+
+def remover_etapa_salva(chave, diretorio=DIRETORIO_ARMAZENAMENTO):
+    """Remove a etapa do disco e do índice"""
+    diretorio = Path(diretorio)
+    indice = _ler_indice(diretorio)
+    registro = indice.pop(chave, None)
+
+    if registro is not None:
+        (diretorio / registro['arquivo']).unlink(missing_ok=True)
+        _gravar_indice(diretorio, indice)
+
+
+def limpar_armazenamento(diretorio=DIRETORIO_ARMAZENAMENTO):
+    """Apaga todas as etapas salvas localmente"""
+    shutil.rmtree(diretorio, ignore_errors=True)
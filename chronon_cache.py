@@ -0,0 +1,238 @@
+import hashlib
+import os
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+
+from chronon_parser import VERSAO_PARSER
+from chronon_armazenamento import DIRETORIO_ARMAZENAMENTO, armazenamento_disponivel, carregar_dataframe_etapa
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Tamanho padrão do cache, igual ao valor inicial da configuração 'Tamanho do cache (MB)'
+TAMANHO_CACHE_PADRAO_MB = 100
+BYTES_POR_MB = 1024 * 1024
+
+DIRETORIO_CACHE_IMPORTACAO = DIRETORIO_ARMAZENAMENTO / 'cache_importacao'
+
+
+def tamanho_em_bytes(valor):
+    """Estimativa do espaço ocupado em memória por um valor guardado no cache"""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(index=True, deep=True).sum())
+    if isinstance(valor, (str, bytes)):
+        return len(valor)
+    return sys.getsizeof(valor)
+
+
+class CacheLRU:
+    """Cache em memória limitado por bytes, descartando primeiro o item usado há mais tempo"""
+
+    def __init__(self, limite_bytes, medir=tamanho_em_bytes):
+        self.limite_bytes = limite_bytes
+        self.medir = medir
+        self.itens = OrderedDict()
+        self.bytes_usados = 0
+        self.acertos = 0
+        self.falhas = 0
+
+    def __len__(self):
+        return len(self.itens)
+
+    def __contains__(self, chave):
+        return chave in self.itens
+
+    def obter(self, chave, padrao=None):
+        """Retorna o valor da chave e o marca como usado mais recentemente"""
+        if chave not in self.itens:
+            self.falhas += 1
+            return padrao
+
+        self.itens.move_to_end(chave)
+        self.acertos += 1
+        return self.itens[chave][0]
+
+    def guardar(self, chave, valor):
+        """Guarda o valor; itens maiores que o limite inteiro não são guardados"""
+        self.remover(chave)
+
+        tamanho = self.medir(valor)
+        if tamanho > self.limite_bytes:
+            return False
+
+        self.itens[chave] = (valor, tamanho)
+        self.bytes_usados += tamanho
+        self._descartar_excesso()
+        return True
+
+    def remover(self, chave):
+        """Remove a chave do cache, se existir"""
+        item = self.itens.pop(chave, None)
+        if item is not None:
+            self.bytes_usados -= item[1]
+
+    def ajustar_limite(self, limite_bytes):
+        """Altera o limite e descarta o que passar dele"""
+        self.limite_bytes = limite_bytes
+        self._descartar_excesso()
+
+    def limpar(self):
+        """Esvazia o cache"""
+        self.itens.clear()
+        self.bytes_usados = 0
+
+    def _descartar_excesso(self):
+        while self.bytes_usados > self.limite_bytes and self.itens:
+            _, (_, tamanho) = self.itens.popitem(last=False)
+            self.bytes_usados -= tamanho
+
+
+class CacheDiscoLRU:
+    """Cache de DataFrames em Parquet limitado por bytes; a data de modificação marca o último uso"""
+
+    def __init__(self, diretorio, limite_bytes):
+        self.diretorio = Path(diretorio)
+        self.limite_bytes = limite_bytes
+
+    def _caminho(self, chave):
+        return self.diretorio / f"{chave}.parquet"
+
+    def _arquivos(self):
+        if not self.diretorio.exists():
+            return []
+        return list(self.diretorio.glob('*.parquet'))
+
+    @property
+    def bytes_usados(self):
+        return sum(caminho.stat().st_size for caminho in self._arquivos())
+
+    def obter(self, chave):
+        """Lê o DataFrame da chave, ou None se não estiver no disco"""
+        caminho = self._caminho(chave)
+        if not caminho.exists():
+            return None
+
+        try:
+            df = carregar_dataframe_etapa(caminho)
+        except Exception:
+            # Arquivo corrompido ou de outra versão do pyarrow: descarta e reprocessa
+            caminho.unlink(missing_ok=True)
+            return None
+
+        os.utime(caminho)
+        return df
+
+    def guardar(self, chave, df):
+        """Grava o DataFrame e descarta os arquivos menos usados acima do limite"""
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        caminho = self._caminho(chave)
+        temporario = caminho.with_name(caminho.name + '.tmp')
+
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), temporario)
+        os.replace(temporario, caminho)
+        self._descartar_excesso()
+
+    def ajustar_limite(self, limite_bytes):
+        """Altera o limite e descarta o que passar dele"""
+        self.limite_bytes = limite_bytes
+        self._descartar_excesso()
+
+    def limpar(self):
+        """Apaga todos os arquivos do cache"""
+        for caminho in self._arquivos():
+            caminho.unlink(missing_ok=True)
+
+    def _descartar_excesso(self):
+        arquivos = []
+        for caminho in self._arquivos():
+            try:
+                estado = caminho.stat()
+            except FileNotFoundError:
+                continue
+            arquivos.append((estado.st_mtime, estado.st_size, caminho))
+
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, caminho in sorted(arquivos, key=lambda arquivo: arquivo[0]):
+            if total <= self.limite_bytes:
+                break
+            caminho.unlink(missing_ok=True)
+            total -= tamanho
+
+
+def chave_importacao(conteudo, cadastro):
+    """Hash do conteúdo do arquivo, da versão do parser e da versão do cadastro de pilotos usado"""
+    resumo = hashlib.sha256()
+    resumo.update(f"chronon-v{VERSAO_PARSER}-cadastro-{cadastro.versao}".encode('utf-8'))
+    resumo.update(conteudo)
+    return resumo.hexdigest()
+
+
+class CacheImportacao:
+    """Cache de arquivos já processados, em memória e em disco, ambos com o mesmo limite em MB"""
+
+    def __init__(self, tamanho_mb=TAMANHO_CACHE_PADRAO_MB, diretorio=DIRETORIO_CACHE_IMPORTACAO):
+        limite_bytes = tamanho_mb * BYTES_POR_MB
+        self.tamanho_mb = tamanho_mb
+        self.memoria = CacheLRU(limite_bytes)
+        self.disco = CacheDiscoLRU(diretorio, limite_bytes) if armazenamento_disponivel() else None
+
+    def ajustar_tamanho(self, tamanho_mb):
+        """Aplica um novo tamanho em MB às duas camadas"""
+        if tamanho_mb == self.tamanho_mb:
+            return
+
+        self.tamanho_mb = tamanho_mb
+        self.memoria.ajustar_limite(tamanho_mb * BYTES_POR_MB)
+        if self.disco is not None:
+            self.disco.ajustar_limite(tamanho_mb * BYTES_POR_MB)
+
+    def obter(self, chave):
+        """DataFrame processado da chave (memória, depois disco), ou None"""
+        df = self.memoria.obter(chave)
+
+        if df is None and self.disco is not None:
+            df = self.disco.obter(chave)
+            if df is not None:
+                self.memoria.guardar(chave, df)
+
+        # Cópia para que a etapa importada não altere o que está no cache
+        return None if df is None else df.copy()
+
+    def guardar(self, chave, df):
+        """Guarda o DataFrame processado nas duas camadas"""
+        self.memoria.guardar(chave, df.copy())
+
+        if self.disco is not None:
+            try:
+                self.disco.guardar(chave, df)
+            except Exception:
+                # Sem espaço ou sem permissão: o cache em memória continua valendo
+                pass
+
+    def limpar(self):
+        """Esvazia as duas camadas"""
+        self.memoria.limpar()
+        if self.disco is not None:
+            self.disco.limpar()
+
+
+_cache_importacao = None
+
+
+def obter_cache_importacao(tamanho_mb=None):
+    """Cache de importação do processo, compartilhado entre as execuções do script"""
+    global _cache_importacao
+
+    if _cache_importacao is None:
+        _cache_importacao = CacheImportacao(tamanho_mb or TAMANHO_CACHE_PADRAO_MB)
+    elif tamanho_mb is not None:
+        _cache_importacao.ajustar_tamanho(tamanho_mb)
+
+    return _cache_importacao
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+# Capacidade inicial dos vetores de pilotos; cresce em dobro quando necessário
+CAPACIDADE_INICIAL_PILOTOS = 64
+
+
+class ClassificacaoCampeonato:
+    """Classificação do campeonato mantida por deltas de cada etapa que vale pontos"""
+
+    def __init__(self, sistema_pontuacao):
+        maior_posicao = max(sistema_pontuacao, default=0)
+        self.pontos_por_posicao = np.zeros(maior_posicao + 1, dtype=np.int64)
+        for posicao, pontos in sistema_pontuacao.items():
+            self.pontos_por_posicao[posicao] = pontos
+
+        self.ids_pilotos = {}
+        self.nomes = []
+        self.equipes = []
+        self.montadoras = []
+
+        self.pontos = np.zeros(CAPACIDADE_INICIAL_PILOTOS, dtype=np.int64)
+        self.vitorias = np.zeros(CAPACIDADE_INICIAL_PILOTOS, dtype=np.int32)
+        self.podios = np.zeros(CAPACIDADE_INICIAL_PILOTOS, dtype=np.int32)
+        self.etapas = np.zeros(CAPACIDADE_INICIAL_PILOTOS, dtype=np.int32)
+
+        # Delta aplicado por etapa, para poder desfazê-lo na remoção
+        self.deltas = {}
+
+    def __contains__(self, chave_etapa):
+        return chave_etapa in self.deltas
+
+    def __len__(self):
+        return len(self.deltas)
+
+    def _garantir_capacidade(self, total):
+        capacidade = len(self.pontos)
+        if total <= capacidade:
+            return
+
+        while capacidade < total:
+            capacidade *= 2
+
+        for nome in ('pontos', 'vitorias', 'podios', 'etapas'):
+            atual = getattr(self, nome)
+            novo = np.zeros(capacidade, dtype=atual.dtype)
+            novo[:len(atual)] = atual
+            setattr(self, nome, novo)
+
+    def _ids(self, classificacao):
+        """Id inteiro de cada piloto da classificação, cadastrando os novos"""
+        ids = np.empty(len(classificacao), dtype=np.int64)
+        equipes = classificacao['Equipe'].tolist() if 'Equipe' in classificacao.columns else [None] * len(ids)
+        montadoras = classificacao['Montadora'].tolist() if 'Montadora' in classificacao.columns else [None] * len(ids)
+
+        for i, nome in enumerate(classificacao['Nome_Piloto'].tolist()):
+            id_piloto = self.ids_pilotos.get(nome)
+            if id_piloto is None:
+                id_piloto = len(self.nomes)
+                self.ids_pilotos[nome] = id_piloto
+                self.nomes.append(nome)
+                self.equipes.append(equipes[i])
+                self.montadoras.append(montadoras[i])
+            ids[i] = id_piloto
+
+        self._garantir_capacidade(len(self.nomes))
+        return ids
+
+    def _somar(self, delta, sinal):
+        ids, pontos, posicoes, nome_etapa = delta
+        np.add.at(self.pontos, ids, sinal * pontos)
+        np.add.at(self.vitorias, ids, sinal * (posicoes == 1))
+        np.add.at(self.podios, ids, sinal * (posicoes <= 3))
+        np.add.at(self.etapas, ids, sinal)
+
+    def aplicar_etapa(self, chave_etapa, classificacao, nome_etapa=None):
+        """Soma a classificação de uma etapa (substitui a anterior com a mesma chave)"""
+        self.remover_etapa(chave_etapa)
+
+        ids = self._ids(classificacao)
+        posicoes = np.arange(1, len(ids) + 1)
+        pontos = np.zeros(len(ids), dtype=np.int64)
+        com_pontos = posicoes < len(self.pontos_por_posicao)
+        pontos[com_pontos] = self.pontos_por_posicao[posicoes[com_pontos]]
+
+        delta = (ids, pontos, posicoes, nome_etapa or chave_etapa)
+        self._somar(delta, 1)
+        self.deltas[chave_etapa] = delta
+
+    def remover_etapa(self, chave_etapa):
+        """Desfaz a soma de uma etapa já aplicada"""
+        delta = self.deltas.pop(chave_etapa, None)
+        if delta is not None:
+            self._somar(delta, -1)
+
+    @property
+    def etapas_computadas(self):
+        """Nomes das etapas somadas, na ordem de aplicação"""
+        return [delta[3] for delta in self.deltas.values()]
+
+    def tabela(self):
+        """Classificação atual, ordenada por pontos, só com pilotos que disputaram alguma etapa"""
+        total = len(self.nomes)
+        ids = np.flatnonzero(self.etapas[:total] > 0)
+
+        nomes = np.array(self.nomes, dtype=object)
+
+        # Empates em pontos vão por vitórias, pódios e nome, para a ordem não depender de quando cada piloto apareceu
+        ordem = np.lexsort((nomes[ids].astype(str), -self.podios[ids], -self.vitorias[ids], -self.pontos[ids]))
+        ids = ids[ordem]
+        pontos, etapas = self.pontos[ids], self.etapas[ids]
+
+        equipes = np.array(self.equipes, dtype=object)
+        montadoras = np.array(self.montadoras, dtype=object)
+
+        return pd.DataFrame({
+            'Piloto': nomes[ids],
+            'Pontos': pontos,
+            'Equipe': equipes[ids],
+            'Montadora': montadoras[ids],
+            'Vitórias': self.vitorias[ids],
+            'Pódios': self.podios[ids],
+            'Etapas': etapas,
+            'Média': pontos / etapas,
+            'Posição': np.arange(1, len(ids) + 1),
+        })
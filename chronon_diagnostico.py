@@ -0,0 +1,220 @@
+import contextvars
+import os
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Arquivo de métricas do modo diagnóstico, junto das etapas salvas
+ARQUIVO_METRICAS = Path(__file__).resolve().parent / 'dados_chronon' / 'metricas_chronon.prom'
+
+# Quantas execuções ficam guardadas para a aba de diagnóstico
+HISTORICO_EXECUCOES = 50
+
+# Descrição das séries gravadas, escrita uma vez no início do arquivo
+CABECALHO_METRICAS = (
+    "# HELP chronon_estagio_segundos Duracao de cada estagio do rerun.\n"
+    "# TYPE chronon_estagio_segundos gauge\n"
+    "# HELP chronon_estagio_linhas Linhas do DataFrame medido no estagio.\n"
+    "# TYPE chronon_estagio_linhas gauge\n"
+    "# HELP chronon_estagio_bytes Memoria do DataFrame medido no estagio.\n"
+    "# TYPE chronon_estagio_bytes gauge\n"
+    "# HELP chronon_execucao_segundos Duracao total do ultimo rerun de cada secao.\n"
+    "# TYPE chronon_execucao_segundos gauge\n"
+    "# HELP chronon_processo_memoria_bytes Pico de memoria residente do processo.\n"
+    "# TYPE chronon_processo_memoria_bytes gauge\n"
+)
+
+# Instrumentação ativa na thread atual (cada rerun do Streamlit roda na sua)
+_instrumentacao_ativa = contextvars.ContextVar('instrumentacao_chronon', default=None)
+
+
+def memoria_processo_bytes():
+    """Pico de memória residente do processo, ou None onde não há como medir"""
+    if resource is None:
+        return None
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS informa em bytes, Linux em KB
+    return pico if sys.platform == 'darwin' else pico * 1024
+
+
+def tamanho_dataframe(df):
+    """Linhas e bytes do DataFrame, sem varrer o conteúdo das colunas de texto"""
+    if df is None:
+        return None, None
+    return len(df), int(df.memory_usage(index=True, deep=False).sum())
+
+
+def rotulo_etapa(dados_etapa):
+    """Rótulo da etapa nas medições, no mesmo formato da chave da sessão"""
+    return f"{dados_etapa.get('temporada')}_{dados_etapa.get('etapa')}_{dados_etapa.get('sessao')}"
+
+
+class Instrumentacao:
+    """Tempos de cada estágio de uma execução, por seção e por etapa, com tamanho dos dados e memória"""
+
+    def __init__(self, historico=HISTORICO_EXECUCOES):
+        self.execucoes = deque(maxlen=historico)
+        self.atual = None
+        self.total_execucoes = 0
+
+    def iniciar_execucao(self, secao):
+        """Abre as medições de um rerun (ou de uma execução sem interface)"""
+        self.total_execucoes += 1
+        self.atual = {
+            'execucao': self.total_execucoes,
+            'secao': secao,
+            'inicio': datetime.now(),
+            'relogio': time.perf_counter(),
+            'estagios': [],
+        }
+        return self.atual
+
+    def registrar(self, estagio, segundos, etapa=None, df=None):
+        """Guarda uma medição na execução atual; sem execução aberta, é ignorada"""
+        if self.atual is None:
+            return
+
+        linhas, bytes_df = tamanho_dataframe(df)
+        self.atual['estagios'].append({
+            'estagio': estagio,
+            'etapa': etapa or '',
+            'segundos': segundos,
+            'linhas': linhas,
+            'bytes': bytes_df,
+        })
+
+    @contextmanager
+    def medir(self, estagio, etapa=None, df=None):
+        """Mede o bloco; 'df' pode ser atualizado com medicao['df'] para registrar o resultado"""
+        medicao = {'df': df}
+        inicio = time.perf_counter()
+        try:
+            yield medicao
+        finally:
+            self.registrar(estagio, time.perf_counter() - inicio, etapa, medicao['df'])
+
+    def finalizar_execucao(self):
+        """Fecha a execução atual com o tempo total e a memória do processo"""
+        execucao = self.atual
+        if execucao is None:
+            return None
+
+        execucao['segundos'] = time.perf_counter() - execucao.pop('relogio')
+        execucao['memoria_bytes'] = memoria_processo_bytes()
+        self.execucoes.append(execucao)
+        self.atual = None
+        return execucao
+
+    def tabela_estagios(self):
+        """Todas as medições guardadas, uma linha por estágio"""
+        linhas = [
+            {'Execução': execucao['execucao'], 'Seção': execucao['secao'], 'Etapa': medicao['etapa'],
+             'Estágio': medicao['estagio'], 'Tempo (ms)': medicao['segundos'] * 1000,
+             'Linhas': medicao['linhas'], 'Memória (KB)': None if medicao['bytes'] is None else medicao['bytes'] / 1024}
+            for execucao in self.execucoes
+            for medicao in execucao['estagios']
+        ]
+        return pd.DataFrame(linhas, columns=['Execução', 'Seção', 'Etapa', 'Estágio', 'Tempo (ms)', 'Linhas', 'Memória (KB)'])
+
+    def tabela_execucoes(self):
+        """Resumo de cada execução guardada: seção, tempo total e memória do processo"""
+        linhas = [
+            {'Execução': execucao['execucao'], 'Início': execucao['inicio'], 'Seção': execucao['secao'],
+             'Tempo total (ms)': execucao['segundos'] * 1000,
+             'Tempo medido (ms)': sum(medicao['segundos'] for medicao in execucao['estagios']) * 1000,
+             'Memória do processo (MB)': None if execucao['memoria_bytes'] is None else execucao['memoria_bytes'] / (1024 * 1024)}
+            for execucao in self.execucoes
+        ]
+        return pd.DataFrame(linhas, columns=['Execução', 'Início', 'Seção', 'Tempo total (ms)', 'Tempo medido (ms)', 'Memória do processo (MB)'])
+
+    def gravar_metricas(self, caminho):
+        """Regrava o arquivo de métricas, de uma vez, com o valor mais recente de cada série"""
+        if not self.execucoes:
+            return
+
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_name(caminho.name + '.tmp')
+
+        # O coletor de textfile do node_exporter pode ler o arquivo a qualquer momento: nunca meio escrito
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(CABECALHO_METRICAS)
+            arquivo.write(formatar_metricas(self.execucoes))
+        os.replace(temporario, caminho)
+
+
+def _valor_rotulo(valor):
+    """Escapa o valor de um rótulo do Prometheus"""
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(**rotulos):
+    return '{' + ','.join(f'{nome}="{_valor_rotulo(valor)}"' for nome, valor in rotulos.items()) + '}'
+
+
+def formatar_metricas(execucoes):
+    """Gauges no formato texto do Prometheus, sem horário: última execução de cada seção e último valor de cada estágio"""
+    estagios = {}
+    totais = {}
+    memoria = None
+
+    for execucao in execucoes:
+        # Estágio medido várias vezes no mesmo rerun (um por gráfico, por exemplo) soma o tempo
+        deste_rerun = {}
+        for medicao in execucao['estagios']:
+            chave = (execucao['secao'], medicao['etapa'], medicao['estagio'])
+            segundos = deste_rerun.get(chave, {}).get('segundos', 0.0) + medicao['segundos']
+            deste_rerun[chave] = {**medicao, 'segundos': segundos}
+        estagios.update(deste_rerun)
+
+        totais[execucao['secao']] = execucao['segundos']
+        if execucao['memoria_bytes'] is not None:
+            memoria = execucao['memoria_bytes']
+
+    linhas = []
+    for (secao, etapa, estagio), medicao in estagios.items():
+        rotulos = _rotulos(secao=secao, etapa=etapa, estagio=estagio)
+        linhas.append(f"chronon_estagio_segundos{rotulos} {medicao['segundos']:.6f}")
+        if medicao['linhas'] is not None:
+            linhas.append(f"chronon_estagio_linhas{rotulos} {medicao['linhas']}")
+            linhas.append(f"chronon_estagio_bytes{rotulos} {medicao['bytes']}")
+
+    for secao, segundos in totais.items():
+        linhas.append(f"chronon_execucao_segundos{_rotulos(secao=secao)} {segundos:.6f}")
+    if memoria is not None:
+        linhas.append(f"chronon_processo_memoria_bytes {memoria}")
+
+    return '\n'.join(linhas) + '\n'
+
+
+def ativar_instrumentacao(instrumentacao):
+    """Define a instrumentação que recebe as medições dos módulos nesta thread"""
+    _instrumentacao_ativa.set(instrumentacao)
+    return instrumentacao
+
+
+def instrumentacao_ativa():
+    return _instrumentacao_ativa.get()
+
+
+@contextmanager
+def medir(estagio, etapa=None, df=None):
+    """Mede um estágio na instrumentação ativa; sem instrumentação ativa não custa nada"""
+    instrumentacao = _instrumentacao_ativa.get()
+    if instrumentacao is None:
+        yield {'df': df}
+        return
+
+    with instrumentacao.medir(estagio, etapa, df) as medicao:
+        yield medicao
@@ -0,0 +1,175 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+# Chave das voltas e dos cadastros sem correspondência na dimensão
+SEM_CADASTRO = -1
+
+# Vigência aberta: cadastro sem temporada inicial ou final vale para todas
+TEMPORADA_MINIMA, TEMPORADA_MAXIMA = 0, 9999
+
+# Ano no fim da categoria do cabeçalho ('Stock Car PRO 2024')
+PADRAO_TEMPORADA_CATEGORIA = r'(\d{4})\s*$'
+
+# Colunas de texto das voltas -> (dimensão, coluna da chave inteira)
+COLUNAS_DIMENSOES = {
+    'Equipe': ('equipes', 'Id_Equipe'),
+    'Montadora': ('montadoras', 'Id_Montadora'),
+    'Numero_Oficial': ('numeros', None),
+}
+
+# Valor exibido quando o piloto não tem cadastro na temporada (None deixa nulo)
+PADROES_CADASTRO = {'Equipe': 'Independente', 'Montadora': 'Outras', 'Numero_Oficial': None}
+
+COLUNAS_REGISTRO = ['piloto', 'equipe', 'montadora', 'numero', 'desde', 'ate']
+
+
+def normalizar_nomes(nomes):
+    """Nomes sem acentos, em minúsculas e com separadores virando espaço, para a coluna inteira de uma vez"""
+    textos = pd.Series(nomes, dtype=object).astype(str)
+    return (
+        textos.str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+        .str.lower().str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip()
+    )
+
+
+def temporadas_categorias(categorias):
+    """Temporada (ano) de cada categoria do cabeçalho, NaN quando não há ano"""
+    anos = pd.Series(categorias, dtype=object).astype(str).str.extract(PADRAO_TEMPORADA_CATEGORIA, expand=False)
+    return pd.to_numeric(anos, errors='coerce').to_numpy(dtype=np.float64)
+
+
+def _dimensao(valores, coluna):
+    """Dimensão com id inteiro na ordem da primeira aparição do valor"""
+    distintos = pd.unique(pd.Series(valores, dtype=object).dropna().astype(str))
+    return pd.DataFrame({coluna: distintos}, index=pd.RangeIndex(len(distintos), name=f'id_{coluna}'))
+
+
+def _ids(valores, dimensao):
+    """Id de cada valor na dimensão, SEM_CADASTRO quando não existe"""
+    valores = pd.Series(valores, dtype=object)
+    ids = pd.Index(dimensao.iloc[:, 0]).get_indexer(valores.where(valores.isna(), valores.astype(str)))
+    return ids.astype(np.int16)
+
+
+def _temporada(valor, padrao):
+    return padrao if valor is None or pd.isna(valor) else int(valor)
+
+
+class DimensoesCadastro:
+    """Dimensões de pilotos, equipes, montadoras e números com id inteiro, vigência por temporada e apelidos"""
+
+    def __init__(self, registros, apelidos=None):
+        registros = pd.DataFrame(list(registros), columns=COLUNAS_REGISTRO)
+        apelidos = dict(apelidos or {})
+
+        self.pilotos = _dimensao(registros['piloto'], 'piloto')
+        self.equipes = _dimensao(registros['equipe'], 'equipe')
+        self.montadoras = _dimensao(registros['montadora'], 'montadora')
+        self.numeros = _dimensao(registros['numero'], 'numero')
+
+        # Uma linha por versão do cadastro de um piloto; a de início mais recente vence quando se sobrepõem
+        self.vigencias = pd.DataFrame({
+            'id_piloto': _ids(registros['piloto'], self.pilotos),
+            'id_equipe': _ids(registros['equipe'], self.equipes),
+            'id_montadora': _ids(registros['montadora'], self.montadoras),
+            'id_numero': _ids(registros['numero'], self.numeros),
+            'desde': [_temporada(valor, TEMPORADA_MINIMA) for valor in registros['desde']],
+            'ate': [_temporada(valor, TEMPORADA_MAXIMA) for valor in registros['ate']],
+        }).sort_values('desde', kind='stable', ignore_index=True)
+
+        # Grafias aceitas (nome do cadastro e apelidos), comparadas sem acento nem caixa
+        grafias = pd.concat([
+            pd.Series(self.pilotos.index.to_numpy(dtype=np.int16), index=normalizar_nomes(self.pilotos['piloto'])),
+            pd.Series(_ids(list(apelidos.values()), self.pilotos), index=normalizar_nomes(list(apelidos))),
+        ])
+        grafias = grafias[grafias != SEM_CADASTRO]
+        self.grafias = grafias[~grafias.index.duplicated()]
+
+        conteudo = json.dumps({'registros': registros.astype(object).where(registros.notna(), None).values.tolist(),
+                               'apelidos': sorted(apelidos.items())}, ensure_ascii=False)
+        self.versao = hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def de_mapeamento(cls, mapeamento, apelidos=None, desde=None, ate=None, historico=()):
+        """Dimensões a partir de um dicionário {piloto: {'Equipe', 'Montadora', 'Numero'}}, mais os registros de 'historico'"""
+        registros = [[piloto, dados.get('Equipe'), dados.get('Montadora'), dados.get('Numero'), desde, ate]
+                     for piloto, dados in mapeamento.items()]
+        return cls(registros + [list(registro) for registro in historico], apelidos)
+
+    def ids_pilotos(self, nomes):
+        """Id do piloto para cada grafia (com ou sem acento, apelidos incluídos), SEM_CADASTRO se desconhecido"""
+        ids = self.grafias.reindex(normalizar_nomes(nomes).to_numpy())
+        return ids.fillna(SEM_CADASTRO).to_numpy(dtype=np.int16)
+
+    def vigencias_pilotos(self, ids_pilotos, temporadas):
+        """Linha de self.vigencias válida para cada (piloto, temporada); temporada NaN aceita qualquer versão"""
+        pares = pd.DataFrame({'par': np.arange(len(ids_pilotos)), 'id_piloto': ids_pilotos, 'temporada': temporadas})
+        juntos = pares.merge(self.vigencias.reset_index(names='vigencia'), on='id_piloto', sort=False)
+
+        temporada = juntos['temporada']
+        validos = temporada.isna() | ((juntos['desde'] <= temporada) & (temporada <= juntos['ate']))
+        juntos = juntos[validos].sort_values(['par', 'desde'], kind='stable').drop_duplicates('par', keep='last')
+
+        vigencias = np.full(len(ids_pilotos), SEM_CADASTRO, dtype=np.int64)
+        vigencias[juntos['par'].to_numpy()] = juntos['vigencia'].to_numpy()
+        return vigencias
+
+    def anexar_voltas(self, voltas, padroes=PADROES_CADASTRO, temporada=None):
+        """Chaves inteiras e cadastro das voltas, resolvidos uma vez por (piloto, temporada) e juntados por código"""
+        codigos_nome, nomes = pd.factorize(voltas['Nome_Piloto'], use_na_sentinel=False)
+
+        # Temporada de cada bloco pela categoria do cabeçalho; sem ela, a informada (ou qualquer vigência)
+        if 'Categoria' in voltas.columns:
+            codigos_categoria, categorias = pd.factorize(voltas['Categoria'], use_na_sentinel=False)
+            temporadas_categoria = temporadas_categorias(categorias)
+        else:
+            codigos_categoria = np.zeros(len(voltas), dtype=np.intp)
+            temporadas_categoria = np.array([np.nan if temporada is None else float(temporada)])
+
+        quantidade_categorias = len(temporadas_categoria)
+        codigos_par, pares = pd.factorize(codigos_nome * quantidade_categorias + codigos_categoria)
+
+        ids_nomes = self.ids_pilotos(nomes)
+
+        # Grafias reconhecidas passam a usar o nome do cadastro, para as etapas juntarem o mesmo piloto
+        canonicos = np.where(ids_nomes == SEM_CADASTRO, np.asarray(nomes, dtype=object),
+                             self.pilotos['piloto'].to_numpy(dtype=object)[np.maximum(ids_nomes, 0)])
+        codigos_canonicos, nomes_canonicos = pd.factorize(canonicos)
+        voltas['Nome_Piloto'] = pd.Categorical.from_codes(codigos_canonicos[codigos_nome], nomes_canonicos)
+        ids_pares = ids_nomes[pares // quantidade_categorias]
+        vigencias = self.vigencias_pilotos(ids_pares, temporadas_categoria[pares % quantidade_categorias])
+
+        # Pares sem cadastro leem a linha 0 e têm as chaves trocadas por SEM_CADASTRO logo abaixo
+        cadastrados = vigencias != SEM_CADASTRO
+        tabela = self.vigencias.iloc[np.where(cadastrados, vigencias, 0)]
+        voltas['Id_Piloto'] = np.where(cadastrados, ids_pares, SEM_CADASTRO).astype(np.int16)[codigos_par]
+
+        for coluna, padrao in padroes.items():
+            nome_dimensao, coluna_id = COLUNAS_DIMENSOES[coluna]
+            dimensao = getattr(self, nome_dimensao)
+            ids = np.where(cadastrados, tabela[f'id_{dimensao.columns[0]}'].to_numpy(), SEM_CADASTRO).astype(np.int16)
+
+            if coluna_id is not None:
+                voltas[coluna_id] = ids[codigos_par]
+
+            # A coluna de texto sai categórica, com códigos vindos direto da chave inteira
+            categorias = dimensao.iloc[:, 0].tolist()
+            if padrao is not None:
+                if padrao not in categorias:
+                    categorias.append(padrao)
+                ids = np.where(ids == SEM_CADASTRO, categorias.index(padrao), ids)
+            voltas[coluna] = pd.Categorical.from_codes(ids[codigos_par], categorias).remove_unused_categories()
+
+        return voltas
+
+
+def pilotos_sem_cadastro(voltas):
+    """Nomes das voltas que não encontraram piloto no cadastro da temporada"""
+    if voltas.empty or 'Id_Piloto' not in voltas.columns:
+        return []
+
+    sem_cadastro = voltas['Id_Piloto'].to_numpy(dtype=np.float64, na_value=np.nan) == SEM_CADASTRO
+    return sorted(pd.unique(voltas.loc[sem_cadastro, 'Nome_Piloto'].astype(str)))
@@ -0,0 +1,152 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from chronon_diagnostico import medir
+
+# Opções de 'precisao_tempo' nas configurações e as casas decimais de cada uma
+PRECISOES_TEMPO = {
+    "Milissegundos (0.001s)": 3,
+    "Centésimos (0.01s)": 2,
+    "Décimos (0.1s)": 1,
+}
+CASAS_TEMPO_PADRAO = 3
+
+# Maior inteiro convertido por tabela pronta; acima disso o texto é gerado elemento a elemento
+LIMITE_TABELA_INTEIROS = 1 << 16
+
+# Colunas de exibição de cada tabela dos agregados: coluna de origem -> formato
+FORMATOS_TABELAS = {
+    'classificacao': {'Lap_Sec': 'tempo', 'Speed_Kmh': 'velocidade', 'Speed_Trap_Kmh': 'velocidade'},
+    'setorial': {
+        'Lap_Sec_min': 'tempo', 'S1_Sec_min': 'tempo', 'S2_Sec_min': 'tempo', 'S3_Sec_min': 'tempo'
+    },
+    'pilotos': {
+        'melhor_volta': 'tempo', 'pior_volta': 'tempo', 'tempo_medio': 'tempo', 'consistencia': 'tempo',
+        'volta_teorica': 'tempo', 'ganho_teorico': 'delta',
+        'velocidade_maxima': 'velocidade', 'velocidade_media': 'velocidade', 'speed_trap_max': 'velocidade'
+    },
+}
+
+
+def casas_precisao(precisao_tempo):
+    """Casas decimais de uma opção de 'precisao_tempo' (milissegundos quando não informada)"""
+    return PRECISOES_TEMPO.get(precisao_tempo, CASAS_TEMPO_PADRAO)
+
+
+@lru_cache(maxsize=None)
+def _tabela_fracoes(casas):
+    """'000'...'999' (para 3 casas), indexados pelo valor da fração"""
+    return np.array([f"{i:0{casas}d}" for i in range(10 ** casas)], dtype=object)
+
+
+@lru_cache(maxsize=None)
+def _tabela_segundos(preenchidos):
+    """'0.'...'59.' ou, depois dos minutos, ':00.'...':59.'"""
+    return np.array([f":{i:02d}." if preenchidos else f"{i}." for i in range(60)], dtype=object)
+
+
+@lru_cache(maxsize=None)
+def _tabela_inteiros(tamanho):
+    return np.array([str(i) for i in range(tamanho)], dtype=object)
+
+
+def _texto_inteiros(inteiros):
+    """Inteiros não negativos como texto, por tabela enquanto forem pequenos"""
+    maior = int(inteiros.max()) if len(inteiros) else 0
+    if maior >= LIMITE_TABELA_INTEIROS:
+        return inteiros.astype(str).astype(object)
+    return _tabela_inteiros(max(64, 1 << maior.bit_length()))[inteiros]
+
+
+def _valores(valores):
+    """Valores como vetor float64, com nulos do pandas virando NaN"""
+    return pd.to_numeric(pd.Series(valores, copy=False), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _unidades(valores, casas):
+    """|valores| arredondados para a precisão, em unidades inteiras da última casa"""
+    return np.rint(np.abs(np.nan_to_num(valores)) * 10 ** casas).astype(np.int64)
+
+
+def _decimais(unidades, casas):
+    """Texto 'inteiro.fração' de unidades inteiras"""
+    inteiros, fracao = np.divmod(unidades, 10 ** casas)
+    return _texto_inteiros(inteiros) + '.' + _tabela_fracoes(casas)[fracao]
+
+
+def _com_vazios(valores, texto, vazio):
+    texto[np.isnan(valores)] = vazio
+    return texto
+
+
+def formatar_tempos(valores, casas=CASAS_TEMPO_PADRAO, vazio='N/A'):
+    """Tempos em segundos como 'SS.sssS' abaixo de um minuto e 'M:SS.sss' acima, de uma vez só"""
+    valores = _valores(valores)
+    escala = 10 ** casas
+
+    minutos, resto = np.divmod(_unidades(valores, casas), 60 * escala)
+    segundos, fracao = np.divmod(resto, escala)
+    fracao = _tabela_fracoes(casas)[fracao]
+
+    texto = _tabela_segundos(False)[segundos] + fracao + 's'
+
+    longos = minutos > 0
+    if longos.any():
+        texto[longos] = _texto_inteiros(minutos[longos]) + _tabela_segundos(True)[segundos[longos]] + fracao[longos]
+
+    return _com_vazios(valores, texto, vazio)
+
+
+def formatar_deltas(valores, casas=CASAS_TEMPO_PADRAO, sufixo='s', vazio='N/A'):
+    """Diferenças com sinal, como '+0.123s' ou '-1.50%'"""
+    valores = _valores(valores)
+    unidades = _unidades(valores, casas)
+
+    sinal = np.where((valores < 0) & (unidades > 0), '-', '+').astype(object)
+    texto = sinal + _decimais(unidades, casas) + sufixo
+
+    return _com_vazios(valores, texto, vazio)
+
+
+def formatar_velocidades(valores, casas=1, sufixo=' km/h', vazio='N/A'):
+    """Velocidades como '215.3 km/h'"""
+    valores = _valores(valores)
+    texto = _decimais(_unidades(valores, casas), casas) + sufixo
+
+    negativos = valores < 0
+    texto[negativos] = '-' + texto[negativos]
+
+    return _com_vazios(valores, texto, vazio)
+
+
+FORMATADORES = {
+    'tempo': formatar_tempos,
+    'delta': formatar_deltas,
+    'velocidade': lambda valores, casas: formatar_velocidades(valores),
+}
+
+
+def formatar_tabela(df, formatos, casas=CASAS_TEMPO_PADRAO):
+    """Colunas de exibição de uma tabela, alinhadas ao índice dela"""
+    return pd.DataFrame({
+        coluna: FORMATADORES[formato](df[coluna], casas)
+        for coluna, formato in formatos.items()
+        if coluna in df.columns
+    }, index=df.index)
+
+
+def tabela_formatada(agregados, nome_tabela, casas=CASAS_TEMPO_PADRAO):
+    """Colunas de exibição de uma tabela dos agregados, formatadas uma vez por precisão"""
+    formatadas = agregados.setdefault('formatadas', {})
+    chave = (nome_tabela, casas)
+
+    if chave not in formatadas:
+        tabela = agregados[nome_tabela]
+        with medir('formatacao', df=tabela):
+            formatadas[chave] = (
+                pd.DataFrame() if tabela is None else formatar_tabela(tabela, FORMATOS_TABELAS[nome_tabela], casas)
+            )
+
+    return formatadas[chave]
@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from chronon_cache import BYTES_POR_MB, CacheLRU
+from chronon_reducao import (
+    PONTOS_POR_SERIE_PADRAO, BARRAS_HISTOGRAMA, reduzir_serie, estatisticas_caixas, estatisticas_histograma
+)
+
+# Cores fixas das montadoras em todos os gráficos
+CORES_MONTADORAS = {
+    'Chevrolet': '#FFD700',
+    'Toyota': '#DC143C',
+    'Volkswagen': '#4682B4',
+    'Outras': '#808080'
+}
+
+# Limite do cache de figuras, compartilhado por todas as sessões do processo
+TAMANHO_CACHE_FIGURAS_MB = 64
+
+# Template do Plotly de cada tema de cores das configurações
+TEMAS_GRAFICOS = {
+    'Padrão Stock Car': 'plotly',
+    'Modo Escuro': 'plotly_dark',
+    'Alto Contraste': 'simple_white',
+    'Personalizado': 'plotly',
+}
+
+
+def _grupos(df, cor):
+    """(nome, linhas) de cada grupo de cor, na ordem de aparição; sem cor, uma série só"""
+    if cor is None:
+        return [(None, df)]
+    return [(str(nome), linhas) for nome, linhas in df.groupby(cor, observed=True, sort=False)]
+
+
+def _trechos(linhas, separar):
+    """Partes da série que não são ligadas por linha entre si, como os stints de um piloto"""
+    if separar is None or separar not in linhas.columns:
+        return [linhas]
+    return [trecho for _, trecho in linhas.groupby(separar, observed=True, sort=True, dropna=False)]
+
+
+def _com_quebras(valores, quebras, vazio=np.nan):
+    """Valores com um item vazio em cada quebra, onde a linha da série é interrompida"""
+    return np.insert(valores, quebras, vazio) if len(quebras) else valores
+
+
+def figura_series_voltas(df, x, y, cor=None, titulo=None, rotulos=None, limite_pontos=PONTOS_POR_SERIE_PADRAO,
+                         modo='markers', simbolo=None, cores=None, erro=None, separar=None):
+    """Séries volta a volta em WebGL reduzidas no servidor (LTTB); 'erro' dá as barras de erro e 'separar' quebra a linha, p.ex. entre stints"""
+    rotulos = rotulos or {}
+    figura = go.Figure()
+
+    for nome, linhas in _grupos(df, cor):
+        # Cada trecho é reduzido à sua parte do limite, para a série toda continuar dentro dele
+        trechos = _trechos(linhas, separar)
+        limite = max(limite_pontos // len(trechos), 3)
+        partes = [
+            trecho.iloc[reduzir_serie(trecho[x].to_numpy(dtype=np.float64, na_value=np.nan),
+                                      trecho[y].to_numpy(dtype=np.float64, na_value=np.nan), limite)]
+            for trecho in trechos
+        ]
+        pontos = pd.concat(partes) if len(partes) > 1 else partes[0]
+
+        # Um ponto vazio entre trechos interrompe a linha, já que o Scattergl não liga lacunas
+        quebras = np.cumsum([len(parte) for parte in partes[:-1]], dtype=np.int64)
+
+        marcador = {'color': cores[nome]} if cores and nome in cores else {}
+        detalhe = {}
+        if simbolo is not None and simbolo in pontos.columns:
+            # Símbolo pelo código da categoria; o nome dela aparece no hover
+            categorias = pd.Series(pontos[simbolo]).astype('category')
+            marcador['symbol'] = _com_quebras(categorias.cat.codes.to_numpy(), quebras, 0)
+            detalhe = {
+                'customdata': _com_quebras(categorias.astype(str).to_numpy(dtype=object), quebras, ''),
+                'hovertemplate': f"%{{customdata}}<br>{rotulos.get(x, x)}: %{{x}}<br>{rotulos.get(y, y)}: %{{y}}<extra>{nome}</extra>",
+            }
+        if erro is not None and erro in pontos.columns:
+            detalhe['error_y'] = {
+                'type': 'data', 'visible': True,
+                'array': _com_quebras(pontos[erro].to_numpy(dtype=np.float64, na_value=np.nan), quebras),
+            }
+
+        figura.add_trace(go.Scattergl(
+            x=_com_quebras(pontos[x].to_numpy(dtype=np.float64, na_value=np.nan), quebras),
+            y=_com_quebras(pontos[y].to_numpy(dtype=np.float64, na_value=np.nan), quebras),
+            mode=modo, name=nome, marker=marcador or None, **detalhe
+        ))
+
+    figura.update_layout(title=titulo, xaxis_title=rotulos.get(x, x), yaxis_title=rotulos.get(y, y))
+    return figura
+
+
+def figura_dispersao_voltas(df, x, y, cor=None, titulo=None, rotulos=None, detalhe=None, cores=None):
+    """Dispersão de todas as voltas em WebGL; o detalhe vai em customdata em vez de um texto por ponto"""
+    rotulos = rotulos or {}
+    figura = go.Figure()
+
+    for nome, linhas in _grupos(df.dropna(subset=[x, y]), cor):
+        figura.add_trace(go.Scattergl(
+            x=linhas[x].to_numpy(), y=linhas[y].to_numpy(), mode='markers', name=nome,
+            marker={'color': cores[nome]} if cores and nome in cores else None,
+            customdata=linhas[detalhe].astype(str).to_numpy() if detalhe else None,
+            hovertemplate=(f"%{{customdata}}<br>{rotulos.get(x, x)}: %{{x}}<br>{rotulos.get(y, y)}: %{{y}}<extra>{nome}</extra>"
+                           if detalhe else None),
+        ))
+
+    figura.update_layout(title=titulo, xaxis_title=rotulos.get(x, x), yaxis_title=rotulos.get(y, y))
+    return figura
+
+
+def figura_caixas(df, valor, grupo, titulo=None, cores=None):
+    """Box plot com quartis e cercas calculados no servidor: o navegador recebe 5 números por grupo"""
+    estatisticas = estatisticas_caixas(df, valor, grupo)
+    figura = go.Figure()
+
+    for nome, linha in estatisticas.iterrows():
+        figura.add_trace(go.Box(
+            name=str(nome), x=[str(nome)],
+            q1=[linha['q1']], median=[linha['mediana']], q3=[linha['q3']],
+            lowerfence=[linha['cerca_inferior']], upperfence=[linha['cerca_superior']], mean=[linha['media']],
+            marker_color=(cores or {}).get(str(nome)),
+        ))
+
+    figura.update_layout(title=titulo, xaxis_title=grupo, yaxis_title=valor)
+    return figura
+
+
+def figura_histograma(valores, titulo=None, rotulo=None, barras=BARRAS_HISTOGRAMA):
+    """Histograma com as contagens calculadas no servidor"""
+    contagens, bordas = estatisticas_histograma(valores, barras)
+    figura = go.Figure(go.Bar(
+        x=(bordas[:-1] + bordas[1:]) / 2, y=contagens, width=np.diff(bordas),
+    ))
+    figura.update_layout(title=titulo, xaxis_title=rotulo, yaxis_title='Voltas', bargap=0)
+    return figura
+
+
+def _congelar(valor):
+    """Valor de filtro em forma imutável, para entrar na chave do cache"""
+    if isinstance(valor, (list, tuple, pd.Index, pd.Series, np.ndarray)):
+        return tuple(_congelar(item) for item in valor)
+    if isinstance(valor, (set, frozenset)):
+        return tuple(sorted(valor, key=str))
+    if isinstance(valor, dict):
+        return tuple(sorted((nome, _congelar(item)) for nome, item in valor.items()))
+    return valor
+
+
+def chave_figura(tipo, etapa=None, versao=None, filtros=None, visual=None):
+    """Chave do cache: tipo do gráfico, etapa, versão dos dados, filtros selecionados e configuração visual"""
+    return (tipo, etapa, versao, _congelar(filtros or {}), _congelar(visual))
+
+
+def aplicar_visual(figura, tema=None, altura=None):
+    """Template do tema escolhido e altura padrão para figuras que não definem a sua"""
+    figura.update_layout(template=TEMAS_GRAFICOS.get(tema, 'plotly'))
+    if altura and figura.layout.height is None:
+        figura.update_layout(height=altura)
+    return figura
+
+
+class CacheFiguras:
+    """Figuras Plotly guardadas como dicionário já validado, limitadas por bytes com descarte LRU"""
+
+    def __init__(self, tamanho_mb=TAMANHO_CACHE_FIGURAS_MB):
+        # Cada item é (dicionário da figura, tamanho do JSON dela)
+        self.memoria = CacheLRU(tamanho_mb * BYTES_POR_MB, medir=lambda item: item[1])
+
+    def __len__(self):
+        return len(self.memoria)
+
+    def figura(self, chave, construir):
+        """Figura da chave, montada por 'construir' só na primeira vez"""
+        item = self.memoria.obter(chave)
+        if item is None:
+            figura = construir()
+            self.memoria.guardar(chave, (figura.to_dict(), len(figura.to_json(validate=False))))
+            return figura
+
+        # O dicionário foi validado quando a figura foi montada: refazer a validação custaria quase o mesmo que montá-la
+        return go.Figure(item[0], _validate=False)
+
+    def limpar(self):
+        """Esvazia o cache"""
+        self.memoria.limpar()
+
+
+_cache_figuras = None
+
+
+def obter_cache_figuras():
+    """Cache de figuras do processo, compartilhado entre as execuções do script"""
+    global _cache_figuras
+
+    if _cache_figuras is None:
+        _cache_figuras = CacheFiguras()
+
+    return _cache_figuras
@@ -0,0 +1,132 @@
+import io
+import os
+import re
+import unicodedata
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import PurePosixPath
+
+from chronon_parser import (
+    ler_csv_chronon, validar_csv_chronon, mascara_cabecalhos_pilotos, extrair_voltas_chronon,
+    calcular_metricas_avancadas_completas
+)
+
+# Outras grafias das sessões oficiais encontradas nos nomes de arquivo exportados
+APELIDOS_SESSOES = {
+    "Treino Rookies": ["rookies", "treino rookie", "rookie"],
+    "Shake Down": ["shakedown", "shake"],
+    "T1": ["treino 1", "tl1", "fp1"],
+    "T2": ["treino 2", "tl2", "fp2"],
+    "Q1-G1": ["q1g1", "q1 grupo 1"],
+    "Q1-G2": ["q1g2", "q1 grupo 2"],
+    "QF": ["super pole", "superpole", "quali final"],
+    "Prova1 Sprint": ["prova 1", "prova1", "corrida 1", "sprint", "race 1"],
+    "P2": ["prova 2", "prova2", "corrida 2", "corrida principal", "race 2"],
+    "Warm Up": ["warmup", "aquecimento"],
+}
+
+PADRAO_ANO = re.compile(r'(?<!\d)(\d{4})(?!\d)')
+
+
+def normalizar_texto(texto):
+    """Minúsculas, sem acentos e com qualquer separador virando espaço simples"""
+    sem_acentos = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', sem_acentos.lower()).split())
+
+
+def _encontrar_nome(texto, candidatos):
+    """Candidato cuja grafia aparece como palavra inteira no texto (a mais longa vence)"""
+    texto = f" {normalizar_texto(texto)} "
+    encontrados = [
+        (len(grafia), nome)
+        for nome, grafias in candidatos.items()
+        for grafia in grafias
+        if grafia and f" {grafia} " in texto
+    ]
+    return max(encontrados)[1] if encontrados else None
+
+
+def inferir_sessao(nome_arquivo, sessoes):
+    """Sessão oficial indicada no nome do arquivo, ou None"""
+    candidatos = {
+        sessao: [normalizar_texto(sessao)] + APELIDOS_SESSOES.get(sessao, [])
+        for sessao in sessoes
+    }
+    return _encontrar_nome(PurePosixPath(nome_arquivo).stem, candidatos)
+
+
+def inferir_pista(nome_arquivo, pistas):
+    """Pista oficial indicada no nome do arquivo (ou na pasta do ZIP), ou None"""
+    # Aceita também o nome sem espaços ('BeloHorizonte')
+    candidatos = {
+        pista: [normalizar_texto(pista), normalizar_texto(pista).replace(' ', '')]
+        for pista in pistas
+    }
+    return _encontrar_nome(str(PurePosixPath(nome_arquivo).with_suffix('')), candidatos)
+
+
+def inferir_temporada(df, nome_arquivo, temporadas):
+    """Temporada do cabeçalho dos pilotos ('... Stock Car PRO 2024') ou do nome do arquivo"""
+    textos = []
+    if 'Categoria' in df.columns and not df.empty:
+        textos.append(str(df['Categoria'].mode().iloc[0]))
+    textos.append(PurePosixPath(nome_arquivo).stem)
+
+    for texto in textos:
+        for ano in PADRAO_ANO.findall(texto):
+            if ano in temporadas:
+                return ano
+
+    return None
+
+
+def expandir_arquivos(arquivos):
+    """Lista (nome, bytes) dos CSVs enviados, abrindo os ZIPs"""
+    expandidos = []
+
+    for nome, conteudo in arquivos:
+        if not nome.lower().endswith('.zip'):
+            expandidos.append((nome, conteudo))
+            continue
+
+        with zipfile.ZipFile(io.BytesIO(conteudo)) as pacote:
+            for membro in pacote.infolist():
+                caminho = PurePosixPath(membro.filename)
+                if membro.is_dir() or caminho.suffix.lower() != '.csv' or '__MACOSX' in caminho.parts:
+                    continue
+                expandidos.append((membro.filename, pacote.read(membro)))
+
+    return expandidos
+
+
+def processar_arquivo_lote(nome, conteudo, cadastro):
+    """Processa um CSV do lote; roda nos processos de trabalho e devolve (nome, voltas, erro)"""
+    try:
+        df = ler_csv_chronon(io.BytesIO(conteudo))
+        validar_csv_chronon(df)
+
+        cabecalhos = mascara_cabecalhos_pilotos(df)
+        if not cabecalhos.any():
+            raise ValueError("Formato de arquivo não reconhecido. Verifique se é um CSV do Chronon oficial.")
+
+        voltas = calcular_metricas_avancadas_completas(extrair_voltas_chronon(df, cadastro, cabecalhos))
+        return nome, voltas, None
+
+    except Exception as e:
+        return nome, None, str(e)
+
+
+def processar_lote_chronon(arquivos, cadastro, max_processos=None):
+    """Processa vários CSVs em paralelo, um por processo, na ordem recebida"""
+    if not arquivos:
+        return []
+
+    processos = min(len(arquivos), max_processos or os.cpu_count() or 1)
+
+    # Um arquivo só não compensa o custo de subir o pool
+    if processos == 1:
+        return [processar_arquivo_lote(nome, conteudo, cadastro) for nome, conteudo in arquivos]
+
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        futuros = [executor.submit(processar_arquivo_lote, nome, conteudo, cadastro) for nome, conteudo in arquivos]
+        return [futuro.result() for futuro in futuros]
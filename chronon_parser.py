@@ -0,0 +1,309 @@
+import pandas as pd
+import numpy as np
+
+# Versão do formato das voltas processadas; mudar invalida o cache de importação
+VERSAO_PARSER = 4
+
+# Tempo do Chronon já sem espaços e com ponto decimal: 'M:SS.sss' ou 'SS.sss'
+# Até 14 dígitos, minutos * 60 é exato em float64, como a conta com int do conversor escalar
+PADRAO_TEMPO = r'(?:[0-9]{1,14}:)?(?:[0-9]+\.?[0-9]*|\.[0-9]+)'
+
+# Linha que abre o bloco de voltas de cada piloto no CSV oficial
+PADRAO_CABECALHO_PILOTO = r'^\d+ - .+ - Stock Car PRO \d{4}$'
+
+# Estrutura mínima do CSV oficial e tamanho dos blocos na importação em streaming
+COLUNAS_MINIMAS_CHRONON = 5
+LINHAS_POR_BLOCO_LEITURA = 50000
+
+# Esquema compacto das voltas processadas; o que fica fora dele são as colunas brutas do Chronon
+COLUNAS_CATEGORICAS = ['Nome_Piloto', 'Equipe', 'Montadora', 'Categoria', 'Numero_Oficial', 'Numero_Carro', 'Tipo_Volta']
+COLUNAS_FLOAT32 = ['Lap_Sec', 'S1_Sec', 'S2_Sec', 'S3_Sec', 'Speed_Kmh', 'Speed_Trap_Kmh', 'Signal_Strength']
+COLUNAS_INT16 = ['Lap_Number', 'Transponder_Hits', 'Id_Piloto', 'Id_Equipe', 'Id_Montadora', 'Stint']
+COLUNAS_INT32 = ['Hora_Ms']
+COLUNAS_ESQUEMA_COMPACTO = COLUNAS_CATEGORICAS + COLUNAS_FLOAT32 + COLUNAS_INT16 + COLUNAS_INT32
+LIMITES_INT16 = (np.iinfo(np.int16).min, np.iinfo(np.int16).max)
+
+
+def converter_tempo_para_segundos_completo(tempo_str):
+    """Conversão completa e robusta de tempos"""
+    try:
+        if pd.isna(tempo_str) or tempo_str == '' or 'No Time' in str(tempo_str):
+            return None
+
+        tempo_str = str(tempo_str).strip().replace(',', '.')
+
+        if ':' in tempo_str:
+            partes = tempo_str.split(':')
+            minutos = int(partes[0])
+            segundos = float(partes[1])
+            return minutos * 60 + segundos
+
+        return float(tempo_str)
+    except:
+        return None
+
+
+def converter_tempos_vetorizado(serie):
+    """Converte uma coluna inteira de tempos do Chronon (M:SS.sss, vírgula decimal, No Time) para segundos"""
+    serie = pd.Series(serie)
+    valores = serie.to_numpy(dtype=object)
+    resultado = np.full(len(valores), np.nan)
+
+    ausentes = pd.isna(valores)
+    textos = pd.Series(valores[~ausentes], dtype=object).astype(str).str.strip().str.replace(',', '.', regex=False)
+    reconhecidos = textos.str.fullmatch(PADRAO_TEMPO).to_numpy(dtype=bool)
+    validos = textos[reconhecidos]
+
+    # Segundos é o que sobra sem os minutos; minutos, o que vem antes do ':'
+    # astype usa o float() do Python: to_numeric arredonda diferente acima de 15 dígitos significativos
+    segundos = validos.str.replace(r'^[0-9]*:', '', regex=True).astype(np.float64).to_numpy()
+    com_minutos = validos.str.contains(':', regex=False).to_numpy(dtype=bool)
+    minutos = np.zeros(len(validos))
+    minutos[com_minutos] = validos[com_minutos].str.replace(r':.*$', '', regex=True).astype(np.float64).to_numpy()
+
+    posicoes = np.flatnonzero(~ausentes)
+    resultado[posicoes[reconhecidos]] = minutos * 60 + segundos
+
+    # 'No Time', vazios e formatos incomuns (sinais, expoentes, '_') seguem o conversor escalar
+    restantes = posicoes[~reconhecidos]
+    resultado[restantes] = [np.nan if tempo is None else tempo
+                            for tempo in map(converter_tempo_para_segundos_completo, valores[restantes])]
+
+    return pd.Series(resultado, index=serie.index, dtype='float64')
+
+
+def converter_horas_vetorizado(serie):
+    """Converte o 'Time of Day' (HH:MM:SS.sss) para milissegundos desde a meia-noite, nulo quando não reconhecido"""
+    serie = pd.Series(serie)
+    partes = serie.astype(str).str.strip().str.replace(',', '.').str.split(':', n=2, expand=True)
+
+    if partes.shape[1] < 3:
+        return pd.Series(pd.NA, index=serie.index, dtype='Int32')
+
+    horas, minutos, segundos = (pd.to_numeric(partes[i], errors='coerce') for i in range(3))
+    milissegundos = ((horas * 3600 + minutos * 60 + segundos) * 1000).round()
+    return milissegundos.where(serie.notna()).astype('Int32')
+
+
+def _coluna_cabecalho(df, coluna):
+    """Coluna onde o Chronon escreve os cabeçalhos, por posição ou por nome"""
+    return df.iloc[:, coluna] if isinstance(coluna, int) else df[coluna]
+
+
+def mascara_cabecalhos_pilotos(df, coluna=0, padrao=PADRAO_CABECALHO_PILOTO):
+    """Marca as linhas de cabeçalho 'NN - Nome - Categoria' que abrem o bloco de cada piloto"""
+    return _coluna_cabecalho(df, coluna).astype(str).str.match(padrao, na=False).to_numpy(dtype=bool)
+
+
+def segmentar_blocos_chronon(df, cabecalhos=None, coluna=0, incluir_categoria=True, cabecalho_anterior=None):
+    """Separa as voltas de todos os pilotos em uma única passada, propagando o cabeçalho de cada bloco"""
+    if cabecalhos is None:
+        cabecalhos = mascara_cabecalhos_pilotos(df, coluna)
+
+    # Cada cabeçalho abre um grupo; linhas antes do primeiro cabeçalho ficam no grupo 0,
+    # que pertence ao cabeçalho anterior quando a leitura vem em blocos
+    grupos = np.cumsum(cabecalhos)
+    textos_cabecalho = _coluna_cabecalho(df, coluna)[cabecalhos].astype(str).tolist()
+
+    if cabecalho_anterior is not None:
+        textos_cabecalho.insert(0, cabecalho_anterior)
+        linhas_voltas = ~cabecalhos
+        bloco_da_volta = grupos[linhas_voltas]
+    else:
+        linhas_voltas = (grupos > 0) & ~cabecalhos
+        bloco_da_volta = grupos[linhas_voltas] - 1
+
+    if not linhas_voltas.any():
+        return pd.DataFrame()
+
+    partes = pd.Series(textos_cabecalho, dtype=object).str.split(' - ', n=3, expand=True)
+
+    voltas = df.take(np.flatnonzero(linhas_voltas))
+    voltas.index = pd.RangeIndex(len(voltas))
+
+    voltas['Numero_Carro'] = partes[0].to_numpy(dtype=object)[bloco_da_volta]
+    voltas['Nome_Piloto'] = partes[1].to_numpy(dtype=object)[bloco_da_volta]
+    if incluir_categoria:
+        voltas['Categoria'] = partes[2].to_numpy(dtype=object)[bloco_da_volta]
+
+    return voltas
+
+
+def ler_csv_chronon(arquivo, **opcoes_leitura):
+    """Lê o CSV oficial mantendo as colunas do Chronon como texto, exatamente como exportadas"""
+    return pd.read_csv(arquivo, dtype=str, **opcoes_leitura)
+
+
+def validar_csv_chronon(df):
+    """Confere se o conteúdo lido tem a estrutura mínima de um arquivo do Chronon"""
+    if df.empty or len(df.columns) < COLUNAS_MINIMAS_CHRONON:
+        raise ValueError("Arquivo CSV inválido. Verifique se é um arquivo do Chronon.")
+
+
+def extrair_voltas_chronon(df, cadastro, cabecalhos=None, cabecalho_anterior=None):
+    """Voltas de todos os pilotos com as chaves e o cadastro da temporada (equipe, montadora e número oficial)"""
+    voltas = segmentar_blocos_chronon(df, cabecalhos, cabecalho_anterior=cabecalho_anterior)
+
+    if not voltas.empty:
+        cadastro.anexar_voltas(voltas)
+
+        # Pilotos sem cadastro mantêm o número do cabeçalho do Chronon
+        numeros_oficiais = voltas['Numero_Oficial'].to_numpy(dtype=object)
+        voltas['Numero_Oficial'] = np.where(
+            pd.isna(numeros_oficiais), voltas['Numero_Carro'].to_numpy(dtype=object), numeros_oficiais
+        )
+
+    return voltas
+
+
+def calcular_metricas_avancadas_completas(df):
+    """Calcula todas as métricas possíveis dos dados do Chronon"""
+    if df.empty:
+        return df
+
+    df_calc = df.copy()
+
+    # Colunas de tempo
+    colunas_tempo = ['Lap Tm', 'S1 Tm', 'S2 Tm', 'S3 Tm']
+    for col in colunas_tempo:
+        if col in df.columns:
+            nova_coluna = col.replace(' Tm', '_Sec').replace(' ', '_')
+            df_calc[nova_coluna] = converter_tempos_vetorizado(df_calc[col])
+
+    # Velocidades
+    if 'Speed' in df.columns:
+        df_calc['Speed_Kmh'] = pd.to_numeric(df_calc['Speed'].astype(str).str.replace(',', '.'), errors='coerce')
+
+    if 'SPT' in df.columns:
+        df_calc['Speed_Trap_Kmh'] = pd.to_numeric(df_calc['SPT'].astype(str).str.replace(',', '.'), errors='coerce')
+
+    # Qualidade do sinal
+    if 'Strength' in df.columns:
+        df_calc['Signal_Strength'] = pd.to_numeric(df_calc['Strength'], errors='coerce')
+
+    if 'Hits' in df.columns:
+        df_calc['Transponder_Hits'] = pd.to_numeric(df_calc['Hits'], errors='coerce')
+
+    # Número da volta
+    if 'Lap' in df.columns:
+        df_calc['Lap_Number'] = pd.to_numeric(df_calc['Lap'], errors='coerce')
+
+    # Hora da passagem, usada para ordenar as voltas e medir paradas
+    if 'Time of Day' in df.columns:
+        df_calc['Hora_Ms'] = converter_horas_vetorizado(df_calc['Time of Day'])
+
+    return df_calc
+
+
+def iterar_voltas_chronon(arquivo, cadastro, linhas_por_bloco=LINHAS_POR_BLOCO_LEITURA):
+    """Lê o CSV em blocos de linhas e emite as voltas já tipadas de cada bloco, sem carregar o arquivo inteiro"""
+    cabecalho_anterior = None
+    primeiro_bloco = True
+
+    for bloco in ler_csv_chronon(arquivo, chunksize=linhas_por_bloco):
+        if primeiro_bloco:
+            validar_csv_chronon(bloco)
+            primeiro_bloco = False
+
+        cabecalhos = mascara_cabecalhos_pilotos(bloco)
+        voltas = extrair_voltas_chronon(bloco, cadastro, cabecalhos, cabecalho_anterior)
+
+        # O piloto corrente continua no próximo bloco até aparecer outro cabeçalho
+        if cabecalhos.any():
+            cabecalho_anterior = str(bloco.iloc[np.flatnonzero(cabecalhos)[-1], 0])
+
+        if not voltas.empty:
+            yield calcular_metricas_avancadas_completas(voltas)
+
+    if primeiro_bloco:
+        raise ValueError("Arquivo CSV inválido. Verifique se é um arquivo do Chronon.")
+    if cabecalho_anterior is None:
+        raise ValueError("Formato de arquivo não reconhecido. Verifique se é um CSV do Chronon oficial.")
+
+
+def _concatenar_compactos(blocos):
+    """Concatena blocos já compactos mantendo as colunas categóricas, com as categorias unidas e ordenadas"""
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna not in blocos[0].columns:
+            continue
+        # Ordenadas como as de cada bloco (compactar_voltas), para o resultado ser o da leitura de uma vez
+        categorias = pd.Index([], dtype=object)
+        for bloco in blocos:
+            categorias = categorias.union(bloco[coluna].cat.categories)
+        categorias = categorias.sort_values()
+        for bloco in blocos:
+            bloco[coluna] = bloco[coluna].cat.set_categories(categorias)
+
+    return pd.concat(blocos, ignore_index=True)
+
+
+def processar_csv_chronon_streaming(arquivo, cadastro, linhas_por_bloco=LINHAS_POR_BLOCO_LEITURA,
+                                    manter_colunas_brutas=True):
+    """Importação em blocos: cada bloco é compactado assim que lido, limitando a memória ao resultado compacto"""
+    blocos = [
+        compactar_voltas(voltas, manter_colunas_brutas=manter_colunas_brutas)
+        for voltas in iterar_voltas_chronon(arquivo, cadastro, linhas_por_bloco)
+    ]
+
+    if not blocos:
+        return pd.DataFrame()
+
+    return _concatenar_compactos(blocos)
+
+
+def _inteiros_compactos(serie):
+    """Int16 com nulos quando todos os valores cabem, senão float32"""
+    valores = serie.dropna()
+    inteiros = (valores == valores.round()).all()
+    if inteiros and (valores.empty or (valores.min() >= LIMITES_INT16[0] and valores.max() <= LIMITES_INT16[1])):
+        return serie.astype('Int16')
+    return serie.astype(np.float32)
+
+
+def _esquema_compacto(df):
+    """Indica se as colunas do esquema já estão nos tipos compactos"""
+    tipos = df.dtypes
+    return (
+        all(isinstance(tipos[col], pd.CategoricalDtype) and tipos[col].categories.is_monotonic_increasing
+            for col in COLUNAS_CATEGORICAS if col in tipos)
+        and all(tipos[col] == np.float32 for col in COLUNAS_FLOAT32 if col in tipos)
+        and all(tipos[col] in ('Int16', np.float32) for col in COLUNAS_INT16 if col in tipos)
+        and all(tipos[col] == 'Int32' for col in COLUNAS_INT32 if col in tipos)
+    )
+
+
+def compactar_voltas(df, manter_colunas_brutas=True):
+    """Esquema compacto das voltas: categorias para identificação, float32/Int16 para medidas"""
+    if df.empty:
+        return df
+
+    # Etapa já compacta (reimportada do cache ou do disco) volta sem cópia
+    if manter_colunas_brutas and _esquema_compacto(df):
+        return df
+
+    compacto = df if manter_colunas_brutas else df[[col for col in df.columns if col in COLUNAS_ESQUEMA_COMPACTO]]
+    compacto = compacto.copy()
+
+    # Categorias sempre ordenadas, venham do cadastro, da ordem de aparição ou do astype: a leitura em blocos
+    # chega às mesmas categorias que a leitura de uma vez
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna not in compacto.columns:
+            continue
+        if not isinstance(compacto[coluna].dtype, pd.CategoricalDtype):
+            compacto[coluna] = compacto[coluna].astype('category')
+        elif not compacto[coluna].cat.categories.is_monotonic_increasing:
+            compacto[coluna] = compacto[coluna].cat.reorder_categories(compacto[coluna].cat.categories.sort_values())
+
+    for coluna in COLUNAS_FLOAT32:
+        if coluna in compacto.columns:
+            compacto[coluna] = compacto[coluna].astype(np.float32)
+
+    for coluna in COLUNAS_INT16:
+        if coluna in compacto.columns and compacto[coluna].dtype != 'Int16':
+            compacto[coluna] = _inteiros_compactos(compacto[coluna])
+
+    for coluna in COLUNAS_INT32:
+        if coluna in compacto.columns and compacto[coluna].dtype != 'Int32':
+            compacto[coluna] = compacto[coluna].astype('Int32')
+
+    return compacto
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+# Pontos por série nos gráficos de voltas, igual ao valor inicial da configuração
+PONTOS_POR_SERIE_PADRAO = 1000
+
+# Barras dos histogramas calculados no servidor
+BARRAS_HISTOGRAMA = 30
+
+
+def indices_lttb(x, y, limite):
+    """Posições escolhidas pelo Largest-Triangle-Three-Buckets, mantendo primeiro e último ponto"""
+    n = len(x)
+    if limite >= n or limite < 3:
+        return np.arange(n)
+
+    # limite - 2 baldes entre o primeiro e o último ponto
+    bordas = np.linspace(1, n - 1, limite - 1).astype(np.int64)
+    escolhidos = np.empty(limite, dtype=np.int64)
+    escolhidos[0], escolhidos[-1] = 0, n - 1
+    anterior = 0
+
+    for i in range(limite - 2):
+        inicio, fim = bordas[i], bordas[i + 1]
+        proximo_inicio, proximo_fim = (bordas[i + 1], bordas[i + 2]) if i + 2 < len(bordas) else (n - 1, n)
+
+        # Ponto do balde que forma o maior triângulo com o escolhido anterior e a média do próximo balde
+        media_x, media_y = x[proximo_inicio:proximo_fim].mean(), y[proximo_inicio:proximo_fim].mean()
+        areas = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        escolhidos[i + 1] = anterior
+
+    return escolhidos
+
+
+def indices_min_max(y, limite):
+    """Posições do mínimo e do máximo de cada balde de pontos consecutivos, em ordem"""
+    n = len(y)
+    baldes = limite // 2
+    if baldes < 1 or 2 * baldes >= n:
+        return np.arange(n)
+
+    balde = np.arange(n) * baldes // n
+    ordem = np.lexsort((y, balde))
+    inicios = np.searchsorted(balde[ordem], np.arange(baldes))
+    fins = np.r_[inicios[1:], n] - 1
+    return np.unique(np.r_[ordem[inicios], ordem[fins]])
+
+
+def reduzir_serie(x, y, limite=PONTOS_POR_SERIE_PADRAO, metodo='lttb'):
+    """Série (x ordenado, y) com no máximo 'limite' pontos; nulos de y ficam de fora"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    validos = ~(np.isnan(x) | np.isnan(y))
+    posicoes = np.flatnonzero(validos)
+    posicoes = posicoes[np.argsort(x[posicoes], kind='stable')]
+
+    if metodo == 'min_max':
+        selecionados = indices_min_max(y[posicoes], limite)
+    else:
+        selecionados = indices_lttb(x[posicoes], y[posicoes], limite)
+
+    return posicoes[selecionados]
+
+
+def estatisticas_caixas(df, valor, grupo):
+    """Quartis, cercas de 1,5 IQR (presas aos dados) e média de cada grupo, para o box plot sem as voltas"""
+    dados = df[[grupo, valor]].dropna(subset=[valor])
+    if dados.empty:
+        return pd.DataFrame(columns=['q1', 'mediana', 'q3', 'cerca_inferior', 'cerca_superior', 'media', 'voltas'])
+
+    valores = dados[valor].astype(np.float64)
+    agrupado = valores.groupby(dados[grupo], observed=True)
+    quartis = agrupado.quantile([0.25, 0.5, 0.75]).unstack()
+
+    estatisticas = pd.DataFrame({
+        'q1': quartis[0.25],
+        'mediana': quartis[0.5],
+        'q3': quartis[0.75],
+        'media': agrupado.mean(),
+        'voltas': agrupado.size(),
+    })
+
+    # Cercas: valores extremos dentro de q1 - 1,5 IQR e q3 + 1,5 IQR de cada grupo
+    iqr = (estatisticas['q3'] - estatisticas['q1']) * 1.5
+    limite_inferior = (estatisticas['q1'] - iqr).reindex(dados[grupo]).to_numpy()
+    limite_superior = (estatisticas['q3'] + iqr).reindex(dados[grupo]).to_numpy()
+    dentro = (valores.to_numpy() >= limite_inferior) & (valores.to_numpy() <= limite_superior)
+
+    dentro_cercas = valores[dentro].groupby(dados[grupo][dentro], observed=True)
+    estatisticas['cerca_inferior'] = dentro_cercas.min()
+    estatisticas['cerca_superior'] = dentro_cercas.max()
+
+    return estatisticas
+
+
+def estatisticas_histograma(valores, barras=BARRAS_HISTOGRAMA):
+    """Contagens e bordas das barras, calculadas com NumPy em vez de enviar cada volta ao navegador"""
+    valores = pd.Series(valores).to_numpy(dtype=np.float64, na_value=np.nan)
+    valores = valores[~np.isnan(valores)]
+    if len(valores) == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+
+    return np.histogram(valores, bins=barras)
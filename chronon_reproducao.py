@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+
+from chronon_ao_vivo import AgregadosAoVivo
+from chronon_diagnostico import medir
+
+# Multiplicador padrão: 1 reproduz a sessão no tempo real, 10 dez vezes mais rápido
+VELOCIDADE_PADRAO = 1.0
+
+
+def ordem_passagens(df):
+    """Voltas em ordem de 'Time of Day'; passagens sem hora ficam no fim, na ordem do arquivo"""
+    if 'Hora_Ms' not in df.columns:
+        raise ValueError("Sessão sem 'Time of Day': não há como reproduzir as passagens na ordem em que aconteceram.")
+
+    horas = df['Hora_Ms'].to_numpy(dtype=np.float64, na_value=np.nan)
+    if np.isnan(horas).all():
+        raise ValueError("Sessão sem 'Time of Day': não há como reproduzir as passagens na ordem em que aconteceram.")
+
+    posicoes = np.argsort(horas, kind='stable')
+    horas = horas[posicoes]
+
+    # Segundos desde a primeira passagem; as sem hora saem junto com a última
+    segundos = (horas - horas[0]) / 1000
+    segundos[np.isnan(segundos)] = np.nanmax(segundos)
+    return df.iloc[posicoes].reset_index(drop=True), segundos
+
+
+class ReproducaoSessao:
+    """Reproduz uma sessão gravada, entregando as voltas na ordem e no ritmo do 'Time of Day'"""
+
+    def __init__(self, df, velocidade=VELOCIDADE_PADRAO, agregados=None, relogio=time.monotonic, dormir=asyncio.sleep):
+        if not velocidade > 0:
+            raise ValueError("A velocidade da reprodução precisa ser maior que zero.")
+
+        self.voltas, self.segundos = ordem_passagens(df)
+        self.velocidade = velocidade
+        self.agregados = agregados if agregados is not None else AgregadosAoVivo()
+        self.relogio = relogio
+        self.dormir = dormir
+        self.posicao = 0
+        self.inicio = None
+        self.pausada_em = None
+        self.atrasos = []
+
+    @property
+    def concluida(self):
+        return self.posicao >= len(self.voltas)
+
+    @property
+    def duracao_sessao(self):
+        """Segundos entre a primeira e a última passagem"""
+        return float(self.segundos[-1]) if len(self.segundos) else 0.0
+
+    def instante_previsto(self, posicao):
+        """Hora do relógio em que a volta da posição deve ser entregue"""
+        return self.inicio + self.segundos[posicao] / self.velocidade
+
+    def segundos_decorridos(self):
+        """Ponto da sessão que a reprodução já alcançou, em segundos desde a primeira passagem"""
+        if np.isinf(self.velocidade):
+            return np.inf
+        return (self.relogio() - self.inicio) * self.velocidade
+
+    def pausar(self):
+        """Congela a reprodução no ponto da sessão em que está"""
+        if self.inicio is not None and self.pausada_em is None:
+            self.pausada_em = self.relogio()
+
+    def retomar(self):
+        """Continua de onde parou: o tempo parado não conta como sessão decorrida nem como atraso"""
+        if self.pausada_em is not None:
+            self.inicio += self.relogio() - self.pausada_em
+            self.pausada_em = None
+
+    async def emitir(self, limite=None):
+        """Lotes de voltas em ordem de passagem, cada um no seu instante; para no fim ou no 'limite' do relógio"""
+        if self.inicio is None:
+            self.inicio = self.relogio()
+        self.retomar()
+
+        while not self.concluida:
+            previsto = self.instante_previsto(self.posicao)
+            if limite is not None and previsto > limite:
+                await self.dormir(max(limite - self.relogio(), 0))
+                return
+
+            espera = previsto - self.relogio()
+            if espera > 0:
+                await self.dormir(espera)
+
+            # Vai junto tudo o que já passou da hora, para o painel não acumular atraso volta a volta
+            fim = int(np.searchsorted(
+                self.segundos, max(self.segundos[self.posicao], self.segundos_decorridos()), side='right'
+            ))
+            lote = self.voltas.iloc[self.posicao:fim]
+            self.posicao = fim
+
+            # Atraso da entrega em relação ao instante da sessão, para medir a latência do painel
+            self.atrasos.append(self.relogio() - previsto)
+            yield lote
+
+    async def reproduzir(self, duracao=None, ao_receber=None):
+        """Aplica cada lote aos agregados ao vivo, como as voltas lidas do arquivo em gravação"""
+        limite = None if duracao is None else self.relogio() + duracao
+
+        async for lote in self.emitir(limite):
+            with medir('reproducao', df=lote):
+                self.agregados.aplicar(lote)
+
+            if ao_receber is not None:
+                resultado = ao_receber(lote, self.agregados)
+                if asyncio.iscoroutine(resultado):
+                    await resultado
+
+        return self.agregados
+
+    def resumo_atrasos(self):
+        """Atraso médio, p95 e máximo das entregas, em segundos"""
+        if not self.atrasos:
+            return pd.Series({'entregas': 0, 'atraso_medio': np.nan, 'atraso_p95': np.nan, 'atraso_maximo': np.nan})
+
+        atrasos = np.asarray(self.atrasos)
+        return pd.Series({
+            'entregas': len(atrasos),
+            'atraso_medio': atrasos.mean(),
+            'atraso_p95': np.percentile(atrasos, 95),
+            'atraso_maximo': atrasos.max(),
+        })
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+from chronon_diagnostico import medir
+from chronon_stints import LIMITE_VOLTA_LENTA
+
+# Voltas na janela móvel e mínimo de voltas válidas para a janela ter valor
+JANELA_RITMO = 5
+MINIMO_VOLTAS_JANELA = 3
+
+# Tempos com média móvel, desvio móvel e degradação
+COLUNAS_RITMO = ['Lap_Sec', 'S1_Sec', 'S2_Sec', 'S3_Sec']
+
+
+def _voltas_validas(df, posicoes, tempos, codigos):
+    """Voltas de ritmo: as 'Normal' da segmentação de stints ou, sem ela, as que não fogem da mediana do piloto"""
+    if 'Tipo_Volta' in df.columns:
+        return (df['Tipo_Volta'].to_numpy()[posicoes] == 'Normal') & ~np.isnan(tempos)
+
+    mediana = pd.Series(tempos).groupby(codigos).transform('median').to_numpy()
+    return tempos <= mediana * LIMITE_VOLTA_LENTA
+
+
+def _somas_janela(valores, inicio_janela):
+    """Soma de cada janela [inicio_janela, i] por diferença de somas acumuladas"""
+    acumulado = np.concatenate([[0.0], np.cumsum(valores)])
+    return acumulado[1:] - acumulado[inicio_janela]
+
+
+def calcular_metricas_ritmo(df, janela=JANELA_RITMO):
+    """Média e desvio móveis por piloto e stint e degradação de cada stint, tudo em uma passada vetorizada"""
+    colunas = [coluna for coluna in COLUNAS_RITMO if coluna in df.columns]
+    if df.empty or 'Lap_Sec' not in colunas:
+        return {'janela': janela, 'voltas': pd.DataFrame(index=df.index), 'stints': pd.DataFrame()}
+
+    # Grupo = (piloto, stint), em ordem de volta; sessões sem stint contam como um stint só
+    nomes = df['Nome_Piloto']
+    codigos_pilotos = nomes.cat.codes.to_numpy() if isinstance(nomes.dtype, pd.CategoricalDtype) else pd.factorize(nomes)[0]
+    stints = df['Stint'].to_numpy(dtype=np.float64, na_value=1) if 'Stint' in df.columns else np.ones(len(df))
+    numeros = (df['Lap_Number'].to_numpy(dtype=np.float64, na_value=np.nan) if 'Lap_Number' in df.columns
+               else np.arange(len(df), dtype=np.float64))
+
+    posicoes = np.lexsort([numeros, stints, codigos_pilotos])
+    codigos_pilotos, stints, numeros = codigos_pilotos[posicoes], stints[posicoes], numeros[posicoes]
+
+    novo_grupo = np.r_[True, (codigos_pilotos[1:] != codigos_pilotos[:-1]) | (stints[1:] != stints[:-1])]
+    grupos = np.cumsum(novo_grupo) - 1
+    inicio_grupo = np.flatnonzero(novo_grupo)[grupos]
+
+    # Janela das últimas 'janela' voltas do mesmo grupo, contando só as voltas de ritmo
+    indices = np.arange(len(posicoes))
+    inicio_janela = np.maximum(indices + 1 - janela, inicio_grupo)
+
+    tempos_volta = df['Lap_Sec'].to_numpy(dtype=np.float64, na_value=np.nan)[posicoes]
+    validas = _voltas_validas(df, posicoes, tempos_volta, codigos_pilotos)
+    quantidade = _somas_janela(validas.astype(np.float64), inicio_janela)
+    com_janela = quantidade >= MINIMO_VOLTAS_JANELA
+
+    metricas_voltas = {}
+    somas_stints = {'voltas_ritmo': validas.astype(np.float64)}
+
+    for coluna in colunas:
+        tempos = df[coluna].to_numpy(dtype=np.float64, na_value=np.nan)[posicoes]
+        validos = validas & ~np.isnan(tempos)
+        y = np.where(validos, tempos, 0.0)
+
+        n = _somas_janela(validos.astype(np.float64), inicio_janela)
+        soma = _somas_janela(y, inicio_janela)
+        soma_quadrados = _somas_janela(y * y, inicio_janela)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media = soma / n
+            variancia = np.maximum(soma_quadrados - soma * media, 0) / (n - 1)
+
+        prefixo = coluna.replace('_Sec', '')
+        metricas_voltas[f'{prefixo}_Media_Movel'] = np.where(com_janela & (n > 0), media, np.nan)
+        metricas_voltas[f'{prefixo}_Desvio_Movel'] = np.where(com_janela & (n > 1), np.sqrt(variancia), np.nan)
+
+        # Somas para a regressão linear tempo x volta de cada grupo
+        somas_stints.update({
+            f'n_{prefixo}': validos.astype(np.float64),
+            f'x_{prefixo}': np.where(validos, numeros, 0.0),
+            f'y_{prefixo}': y,
+            f'xx_{prefixo}': np.where(validos, numeros * numeros, 0.0),
+            f'xy_{prefixo}': np.where(validos, numeros, 0.0) * y,
+            f'yy_{prefixo}': y * y,
+        })
+
+    # De volta à ordem das linhas da etapa, para o índice de pilotos valer também aqui
+    ordem_original = np.empty_like(posicoes)
+    ordem_original[posicoes] = indices
+    voltas = pd.DataFrame(
+        {coluna: valores[ordem_original] for coluna, valores in metricas_voltas.items()}, index=df.index
+    ).astype(np.float32)
+
+    somas = pd.DataFrame(somas_stints).groupby(grupos, sort=False).sum()
+    primeiras = np.flatnonzero(novo_grupo)
+    resumo = pd.DataFrame({
+        'Nome_Piloto': df['Nome_Piloto'].iloc[posicoes[primeiras]].astype(object).to_numpy(),
+        'Stint': stints[primeiras].astype(np.int64),
+        'voltas_ritmo': somas['voltas_ritmo'].astype(np.int64).to_numpy(),
+    })
+
+    for coluna in colunas:
+        prefixo = coluna.replace('_Sec', '')
+        n, sx, sy = somas[f'n_{prefixo}'], somas[f'x_{prefixo}'], somas[f'y_{prefixo}']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            denominador = n * somas[f'xx_{prefixo}'] - sx * sx
+            inclinacao = (n * somas[f'xy_{prefixo}'] - sx * sy) / denominador
+            desvio = np.sqrt(np.maximum(somas[f'yy_{prefixo}'] - sy * sy / n, 0) / (n - 1))
+
+        # Degradação em segundos por volta; precisa de pelo menos três voltas de ritmo no stint
+        resumo[f'degradacao_{prefixo}'] = np.where((n >= 3) & (denominador > 0), inclinacao, np.nan)
+        resumo[f'consistencia_{prefixo}'] = np.where(n >= 2, desvio, np.nan)
+
+    return {'janela': janela, 'voltas': voltas, 'stints': resumo}
+
+
+def metricas_ritmo(agregados, janela=JANELA_RITMO):
+    """Métricas de ritmo da etapa, calculadas uma vez por janela e guardadas nos agregados"""
+    por_janela = agregados.setdefault('ritmo', {})
+
+    if janela not in por_janela:
+        with medir('ritmo', df=agregados['dataframe']):
+            por_janela[janela] = calcular_metricas_ritmo(agregados['dataframe'], janela)
+
+    return por_janela[janela]
+
+
+def ritmo_piloto(agregados, nome_piloto, janela=JANELA_RITMO):
+    """Voltas do piloto com as médias e desvios móveis, lidas pelo índice de linhas da etapa"""
+    linhas = agregados['indice_pilotos'].get(nome_piloto)
+    if linhas is None:
+        return pd.DataFrame()
+
+    df = agregados['dataframe']
+    voltas = metricas_ritmo(agregados, janela)['voltas']
+    return pd.concat([df.iloc[linhas], voltas.iloc[linhas]], axis=1)
@@ -0,0 +1,109 @@
+from pathlib import Path
+
+import numpy as np
+
+# Colunas do CSV oficial exportado pelo Chronon
+COLUNAS_CHRONON = [
+    'Time of Day', 'Lap', 'Lap Tm', 'Speed', 'Hits', 'Strength', 'Noise',
+    'S1', 'S1 Tm', 'S2', 'S2 Tm', 'S3', 'S3 Tm', 'SPT', 'SPT Tm'
+]
+
+# Divisão típica da volta entre os três setores
+PROPORCAO_SETORES = (0.31, 0.36, 0.33)
+
+# Início da sessão no 'Time of Day', em segundos desde meia-noite
+INICIO_SESSAO_SEG = 10 * 3600
+
+
+def _formatar_tempo(segundos):
+    """Tempo no formato do Chronon: 'M:SS.sss' a partir de um minuto, senão 'SS.sss'"""
+    if segundos >= 60:
+        return f"{int(segundos // 60)}:{segundos % 60:06.3f}"
+    return f"{segundos:.3f}"
+
+
+def _formatar_hora(segundos):
+    """Hora do dia 'HH:MM:SS.sss'"""
+    horas, resto = divmod(segundos, 3600)
+    minutos, segundos = divmod(resto, 60)
+    return f"{int(horas):02d}:{int(minutos):02d}:{segundos:06.3f}"
+
+
+def _decimal_virgula(valor, casas):
+    """Número com vírgula decimal entre aspas, como o Chronon exporta velocidades"""
+    return '"' + f"{valor:.{casas}f}".replace('.', ',') + '"'
+
+
+def nomes_pilotos_sinteticos(quantidade, nomes_base=None):
+    """Nomes de pilotos: primeiro os do cadastro informado, depois nomes numerados"""
+    nomes = list(nomes_base or [])[:quantidade]
+    nomes += [f"Piloto Sintético {i}" for i in range(len(nomes) + 1, quantidade + 1)]
+    return nomes
+
+
+def gerar_csv_chronon(pilotos=30, voltas=40, temporada='2024', semente=0, nomes_base=None,
+                      tempo_base=90.0, proporcao_sem_tempo=0.03, proporcao_pit=0.02):
+    """CSV sintético no formato do Chronon: cabeçalho por piloto, tempos em texto, vírgula decimal e 'No Time'"""
+    rng = np.random.default_rng(semente)
+    nomes = nomes_pilotos_sinteticos(pilotos, nomes_base)
+    linhas = [','.join(COLUNAS_CHRONON)]
+    separadores_vazios = ',' * (len(COLUNAS_CHRONON) - 1)
+
+    for numero, nome in enumerate(nomes, 1):
+        linhas.append(f"{numero} - {nome} - Stock Car PRO {temporada}{separadores_vazios}")
+
+        # Ritmo próprio do piloto, ruído por volta e voltas sem tempo
+        ritmo = tempo_base * rng.uniform(0.985, 1.02)
+        tempos_volta = ritmo + rng.normal(0, 0.35, voltas) + np.linspace(0, 0.6, voltas)
+        sem_tempo = rng.random(voltas) < proporcao_sem_tempo
+
+        divisao = np.array(PROPORCAO_SETORES) * rng.normal(1, 0.01, (voltas, 3))
+        setores = tempos_volta[:, None] * divisao / divisao.sum(axis=1, keepdims=True)
+
+        # Parada no box: a volta de entrada perde tempo no S3 (pit lane) e a de saída no S1 (parada e saída)
+        entradas = np.flatnonzero(rng.random(max(voltas - 1, 0)) < proporcao_pit)
+        setores[entradas, 2] += rng.uniform(6, 10, len(entradas))
+        setores[entradas + 1, 0] += rng.uniform(18, 28, len(entradas))
+        tempos_volta = setores.sum(axis=1)
+
+        velocidades = rng.normal(160, 4, voltas)
+        speed_trap = rng.normal(225, 8, voltas)
+        hits = rng.integers(1, 12, voltas)
+        forca = rng.integers(40, 220, voltas)
+        ruido = rng.integers(1, 40, voltas)
+        tempos_spt = rng.uniform(4.8, 6.2, voltas)
+        hora = INICIO_SESSAO_SEG + rng.uniform(0, 120) + np.cumsum(tempos_volta)
+
+        for i in range(voltas):
+            if sem_tempo[i]:
+                tempo, s1, s2, s3 = 'No Time', '', '', ''
+            else:
+                tempo = _formatar_tempo(tempos_volta[i])
+                s1, s2, s3 = (_formatar_tempo(t) for t in setores[i])
+
+            linhas.append(','.join([
+                _formatar_hora(hora[i]), str(i + 1), tempo, _decimal_virgula(velocidades[i], 3),
+                str(hits[i]), str(forca[i]), str(ruido[i]),
+                '', s1, '', s2, '', s3,
+                _decimal_virgula(speed_trap[i], 1), _formatar_tempo(tempos_spt[i])
+            ]))
+
+    return '\n'.join(linhas) + '\n'
+
+
+def gerar_sessoes_chronon(diretorio, sessoes, pilotos=30, voltas=40, pista='Interlagos', temporada='2024',
+                          semente=0, nomes_base=None):
+    """Grava um CSV sintético por sessão, com nomes de arquivo reconhecidos pela importação em lote"""
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    caminhos = []
+
+    for i, sessao in enumerate(sessoes):
+        caminho = diretorio / f"{pista}_{sessao}.csv"
+        caminho.write_text(
+            gerar_csv_chronon(pilotos, voltas, temporada, semente + i, nomes_base),
+            encoding='utf-8'
+        )
+        caminhos.append(caminho)
+
+    return caminhos
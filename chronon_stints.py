@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+# Volta mais lenta que a mediana do piloto por este fator é candidata a entrada/saída de box
+LIMITE_VOLTA_LENTA = 1.05
+
+# Acima deste fator a volta é de box mesmo sem setor anômalo (parada inteira dentro da volta)
+LIMITE_VOLTA_BOX = 1.20
+
+# Setor mais lento que a mediana do piloto naquele setor por este fator
+LIMITE_SETOR_ANOMALO = 1.15
+
+# Classificação de cada volta nas sessões de corrida
+TIPOS_VOLTA = ['Normal', 'Entrada', 'Saída', 'Box']
+
+
+def sessao_de_corrida(info_sessao):
+    """Sessões em que os carros fazem stints e paradas (Prova1 Sprint, P2)"""
+    return 'Corrida' in info_sessao.get('tipo', '')
+
+
+def _codigos_pilotos(df):
+    nomes = df['Nome_Piloto']
+    if isinstance(nomes.dtype, pd.CategoricalDtype):
+        return nomes.cat.codes.to_numpy()
+    return pd.factorize(nomes)[0]
+
+
+def _mediana_piloto(valores, codigos):
+    """Mediana de cada piloto repetida em todas as voltas dele"""
+    return pd.Series(valores).groupby(codigos).transform('median').to_numpy(dtype=np.float64)
+
+
+def _anterior(valores, mesmo_piloto, vazio):
+    """Valor da volta anterior do mesmo piloto"""
+    anterior = np.empty_like(valores)
+    anterior[0] = vazio
+    anterior[1:] = valores[:-1]
+    anterior[~mesmo_piloto] = vazio
+    return anterior
+
+
+def _setor_anomalo(df, coluna, codigos):
+    if coluna not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+
+    setor = df[coluna].to_numpy(dtype=np.float64, na_value=np.nan)
+    return setor > _mediana_piloto(setor, codigos) * LIMITE_SETOR_ANOMALO
+
+
+def segmentar_stints(df):
+    """Stint e tipo de cada volta (entrada, saída ou box) a partir dos tempos, dos setores e do 'Time of Day'"""
+    if df.empty or 'Lap_Sec' not in df.columns:
+        return df
+
+    # Voltas de cada piloto em ordem de passagem; o Chronon já exporta assim, em blocos por piloto
+    chaves = [_codigos_pilotos(df)]
+    chaves += [df[coluna].to_numpy(dtype=np.float64, na_value=np.nan) for coluna in ('Hora_Ms', 'Lap_Number') if coluna in df.columns]
+    posicoes = np.lexsort(chaves[::-1])
+    voltas = df.iloc[posicoes]
+
+    codigos = _codigos_pilotos(voltas)
+    mesmo_piloto = np.r_[False, codigos[1:] == codigos[:-1]]
+
+    tempos = voltas['Lap_Sec'].to_numpy(dtype=np.float64, na_value=np.nan)
+    referencia = _mediana_piloto(tempos, codigos)
+
+    # Volta sem tempo conta pelo intervalo entre as passagens, quando há 'Time of Day'
+    if 'Hora_Ms' in voltas.columns:
+        horas = voltas['Hora_Ms'].to_numpy(dtype=np.float64, na_value=np.nan) / 1000
+        intervalos = horas - _anterior(horas, mesmo_piloto, np.nan)
+        tempos = np.where(np.isnan(tempos), intervalos, tempos)
+
+    lenta = tempos > referencia * LIMITE_VOLTA_LENTA
+    muito_lenta = tempos > referencia * LIMITE_VOLTA_BOX
+    setor1_anomalo = _setor_anomalo(voltas, 'S1_Sec', codigos)
+    setor3_anomalo = _setor_anomalo(voltas, 'S3_Sec', codigos)
+
+    # Entrada perde tempo no fim da volta (S3), saída no começo (S1); sem setor definido, a volta inteira é de box
+    entrada = lenta & setor3_anomalo & ~setor1_anomalo
+    saida = lenta & setor1_anomalo & ~setor3_anomalo
+    box = (lenta & setor1_anomalo & setor3_anomalo) | (muito_lenta & ~entrada & ~saida)
+
+    depois_parada = _anterior(entrada | box, mesmo_piloto, False)
+    saida |= depois_parada & ~entrada & ~box
+
+    # Novo stint na volta de saída ou na volta seguinte a uma volta de box
+    inicio_stint = saida | _anterior(box, mesmo_piloto, False)
+    stints = pd.Series(inicio_stint.astype(np.int16)).groupby(codigos).cumsum().to_numpy() + 1
+
+    tipos = np.select([box, entrada, saida], [3, 1, 2], 0)
+
+    resultado = df.copy()
+    resultado['Stint'] = _na_posicao(stints.astype(np.int16), posicoes)
+    resultado['Tipo_Volta'] = pd.Categorical.from_codes(_na_posicao(tipos, posicoes), TIPOS_VOLTA)
+    return resultado
+
+
+def _na_posicao(valores, posicoes):
+    """Valores calculados na ordem das passagens, devolvidos à ordem original das linhas"""
+    original = np.empty_like(valores)
+    original[posicoes] = valores
+    return original
+
+
+def voltas_ritmo(df):
+    """Voltas que contam para o ritmo de corrida: fora as de entrada, saída e box"""
+    if 'Tipo_Volta' not in df.columns:
+        return df
+    return df[df['Tipo_Volta'].to_numpy() == 'Normal']
+
+
+def resumo_stints(df):
+    """Uma linha por (piloto, stint): voltas, primeira e última volta, melhor e média das voltas de ritmo"""
+    if df.empty or 'Stint' not in df.columns:
+        return None
+
+    ritmo = df['Tipo_Volta'].to_numpy() == 'Normal'
+    tempos = df['Lap_Sec'].astype('float64').where(ritmo)
+
+    agregacoes = {
+        'voltas': ('Stint', 'size'),
+        'melhor_volta': ('tempo_ritmo', 'min'),
+        'tempo_medio': ('tempo_ritmo', 'mean'),
+        'voltas_ritmo': ('tempo_ritmo', 'count'),
+    }
+    if 'Lap_Number' in df.columns:
+        agregacoes.update({'primeira_volta': ('Lap_Number', 'min'), 'ultima_volta': ('Lap_Number', 'max')})
+
+    resumo = df.assign(tempo_ritmo=tempos).groupby(['Nome_Piloto', 'Stint'], observed=True, sort=False).agg(**agregacoes)
+    return resumo.reset_index()
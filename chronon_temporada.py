@@ -0,0 +1,140 @@
+import pandas as pd
+
+from chronon_agregados import obter_agregados_etapa
+
+# Identificação da etapa copiada para cada linha da tabela de fatos
+COLUNAS_ETAPA = ['temporada', 'etapa', 'sessao', 'pista']
+
+# Cadastro do piloto, guardado como texto para as etapas se juntarem sem conflito de categorias
+COLUNAS_CADASTRO = ['piloto', 'equipe', 'montadora', 'numero']
+
+
+def fatos_etapa(chave_etapa, dados_etapa):
+    """Uma linha por piloto da etapa, a partir do resumo agregado"""
+    fatos = obter_agregados_etapa(dados_etapa)['pilotos'].rename_axis('piloto').reset_index()
+
+    for coluna in COLUNAS_CADASTRO:
+        if coluna in fatos.columns:
+            fatos[coluna] = fatos[coluna].astype(object)
+
+    fatos['chave'] = chave_etapa
+    for coluna in COLUNAS_ETAPA:
+        fatos[coluna] = dados_etapa[coluna]
+
+    return fatos
+
+
+class FatosTemporada:
+    """Tabela de fatos (piloto, etapa) da temporada, mantida etapa a etapa na importação e na remoção"""
+
+    def __init__(self):
+        self.etapas = {}
+        self._tabela = None
+        self._linhas_piloto = None
+
+    def __contains__(self, chave_etapa):
+        return chave_etapa in self.etapas
+
+    def __len__(self):
+        return len(self.etapas)
+
+    def aplicar_etapa(self, chave_etapa, dados_etapa):
+        """Inclui as linhas da etapa (substitui as anteriores com a mesma chave)"""
+        self.etapas[chave_etapa] = fatos_etapa(chave_etapa, dados_etapa)
+        self._tabela = None
+
+    def remover_etapa(self, chave_etapa):
+        """Tira as linhas da etapa"""
+        if self.etapas.pop(chave_etapa, None) is not None:
+            self._tabela = None
+
+    def tabela(self):
+        """Todas as linhas, na ordem de aplicação das etapas; montada de novo só quando alguma etapa muda"""
+        if self._tabela is None:
+            partes = [fatos for fatos in self.etapas.values() if not fatos.empty]
+            self._tabela = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=COLUNAS_CADASTRO)
+            self._linhas_piloto = self._tabela.groupby('piloto', sort=False).indices if partes else {}
+
+        return self._tabela
+
+    def pilotos(self):
+        """Pilotos com alguma etapa na temporada, em ordem alfabética"""
+        self.tabela()
+        return sorted(self._linhas_piloto)
+
+    def piloto(self, nome_piloto):
+        """Linhas de um piloto, uma por etapa disputada"""
+        tabela = self.tabela()
+        linhas = self._linhas_piloto.get(nome_piloto)
+        return tabela.iloc[0:0] if linhas is None else tabela.iloc[linhas]
+
+    def resumo_por(self, coluna):
+        """Resumo da temporada agrupado por 'montadora' ou 'equipe'"""
+        tabela = self.tabela()
+        if tabela.empty:
+            return pd.DataFrame()
+
+        agregacoes = {
+            'pilotos': ('piloto', 'nunique'),
+            'etapas': ('chave', 'nunique'),
+            'total_voltas': ('total_voltas', 'sum'),
+        }
+
+        if 'melhor_volta' in tabela.columns:
+            # Tempo médio ponderado pelas voltas válidas de cada piloto em cada etapa
+            tabela = tabela.assign(soma_tempos=tabela['tempo_medio'].astype('float64') * tabela['voltas_validas'])
+            agregacoes.update({
+                'voltas_validas': ('voltas_validas', 'sum'),
+                'melhor_volta': ('melhor_volta', 'min'),
+                'soma_tempos': ('soma_tempos', 'sum'),
+                'consistencia': ('consistencia', 'mean'),
+            })
+
+        if 'velocidade_maxima' in tabela.columns:
+            agregacoes['velocidade_maxima'] = ('velocidade_maxima', 'max')
+
+        if 'speed_trap_max' in tabela.columns:
+            agregacoes['speed_trap_max'] = ('speed_trap_max', 'max')
+
+        resumo = tabela.groupby(coluna).agg(**agregacoes)
+
+        if 'soma_tempos' in resumo.columns:
+            resumo.insert(
+                resumo.columns.get_loc('soma_tempos'), 'tempo_medio',
+                resumo['soma_tempos'] / resumo['voltas_validas'].where(resumo['voltas_validas'] > 0)
+            )
+            resumo = resumo.drop(columns='soma_tempos')
+
+        return resumo.reset_index()
+
+    def melhores_por_etapa(self, coluna):
+        """Melhor volta de cada montadora/equipe em cada etapa, na ordem das etapas"""
+        tabela = self.tabela()
+        if tabela.empty or 'melhor_volta' not in tabela.columns:
+            return pd.DataFrame()
+
+        melhores = tabela.pivot_table(index=coluna, columns='chave', values='melhor_volta', aggfunc='min')
+        return melhores[[chave for chave in self.etapas if chave in melhores.columns]]
+
+    def voltas_ideais_por_pista(self):
+        """Volta ideal de cada etapa (melhor setor do grid) e a melhor da pista até ela, etapa a etapa por pista"""
+        tabela = self.tabela()
+        colunas_setores = [coluna for coluna in tabela.columns if coluna.startswith('melhor_setor_')]
+        if tabela.empty or not colunas_setores or 'volta_teorica' not in tabela.columns:
+            return pd.DataFrame()
+
+        por_etapa = tabela.groupby(['pista', 'chave'], sort=False).agg(
+            **{coluna: (coluna, 'min') for coluna in colunas_setores},
+            melhor_volta=('melhor_volta', 'min'),
+            melhor_teorica=('volta_teorica', 'min'),
+        ).astype('float64')
+
+        por_etapa['volta_ideal'] = por_etapa[colunas_setores].sum(axis=1, min_count=len(colunas_setores))
+        por_etapa['ganho_ideal'] = por_etapa['melhor_volta'] - por_etapa['volta_ideal']
+
+        # Melhores setores já vistos na pista, na ordem em que as etapas foram aplicadas
+        acumulados = por_etapa[colunas_setores].groupby(level='pista', sort=False).cummin()
+        por_etapa['volta_ideal_pista'] = acumulados.sum(axis=1, min_count=len(colunas_setores))
+        por_etapa['melhor_volta_pista'] = por_etapa.groupby(level='pista', sort=False)['melhor_volta'].cummin()
+
+        return por_etapa.reset_index()
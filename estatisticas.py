@@ -7,6 +7,12 @@ import re
 from datetime import datetime
 import numpy as np
 
+from chronon_dimensoes import DimensoesCadastro
+from chronon_parser import (
+    converter_tempos_vetorizado, mascara_cabecalhos_pilotos, segmentar_blocos_chronon
+)
+from chronon_formatacao import formatar_deltas
+
 # Configuração da página
 st.set_page_config(
     page_title="Stock Car Analytics Pro",
@@ -36,6 +42,9 @@ MAPEAMENTO_EQUIPES_MONTADORAS = {
     # Adicione mais pilotos conforme necessário
 }
 
+# Mesmo cadastro como dimensões, aceitando os nomes com ou sem acento
+CADASTRO_EQUIPES_MONTADORAS = DimensoesCadastro.de_mapeamento(MAPEAMENTO_EQUIPES_MONTADORAS)
+
 # Dicionário de pistas e suas distâncias (em km)
 PISTAS = {
     "Interlagos": 4.309,
@@ -57,40 +66,14 @@ def processar_csv(uploaded_file):
     df = pd.read_csv(uploaded_file)
 
     # Identificar linhas com padrão de carro (número - nome - categoria)
-    pattern_rows = df['Time of Day'].str.match(r'^\d+ - .+ - .+$', na=False)
-    pattern_indices = df.index[pattern_rows].tolist()
-
-    # Criar lista para armazenar dados processados
-    dados_processados = []
-
-    for i, start_idx in enumerate(pattern_indices):
-        # Extrair informações da linha padrão
-        info_linha = df.loc[start_idx, 'Time of Day']
-        numero_carro = info_linha.split(' - ')[0]
-        nome_piloto = info_linha.split(' - ')[1]
-
-        # Determinar fim dos dados deste carro
-        end_idx = pattern_indices[i + 1] if i + 1 < len(pattern_indices) else len(df)
+    cabecalhos = mascara_cabecalhos_pilotos(df, 'Time of Day', r'^\d+ - .+ - .+$')
 
-        # Extrair dados de voltas do carro
-        dados_carro = df.loc[start_idx + 1:end_idx - 1].copy()
-
-        if not dados_carro.empty:
-            dados_carro['Numero_Carro'] = numero_carro
-            dados_carro['Nome_Piloto'] = nome_piloto
-            dados_processados.append(dados_carro)
-
-    if dados_processados:
-        df_final = pd.concat(dados_processados, ignore_index=True)
+    # Voltas de todos os carros em uma única passada
+    df_final = segmentar_blocos_chronon(df, cabecalhos, 'Time of Day', incluir_categoria=False)
 
+    if not df_final.empty:
         # Adicionar informações de equipe e montadora
-        df_final['Equipe'] = df_final['Nome_Piloto'].map(
-            lambda piloto: MAPEAMENTO_EQUIPES_MONTADORAS.get(piloto, {}).get('Equipe', 'Desconhecida')
-        )
-        df_final['Montadora'] = df_final['Nome_Piloto'].map(
-            lambda piloto: MAPEAMENTO_EQUIPES_MONTADORAS.get(piloto, {}).get('Montadora', 'Desconhecida')
-        )
-
+        CADASTRO_EQUIPES_MONTADORAS.anexar_voltas(df_final, {'Equipe': 'Desconhecida', 'Montadora': 'Desconhecida'})
         return df_final
 
     return pd.DataFrame()
@@ -136,6 +119,15 @@ def calcular_delta(tempo_atual, tempo_referencia):
     sinal = "+" if delta > 0 else ""
     return f"{sinal}{delta:.3f}s"
 
+# Colunas numéricas de delta e o nome com que aparecem na tabela de comparação
+COLUNAS_DELTA = {'Delta_Volta': 'Delta Volta', 'Delta_S1': 'Delta S1', 'Delta_S2': 'Delta S2', 'Delta_S3': 'Delta S3'}
+
+def estilos_deltas(deltas):
+    """CSS de cada célula: verde no melhor delta da coluna, rosa quando mais lento que a referência"""
+    melhores = deltas.eq(deltas.min())
+    estilos = np.select([melhores.to_numpy(), deltas.gt(0).to_numpy()], ['background-color: #90EE90', 'background-color: #FFB6C1'], '')
+    return pd.DataFrame(estilos, index=deltas.index, columns=deltas.columns)
+
 def calcular_estatisticas_basicas(df):
     """Calcula estatísticas básicas do dataframe"""
     if df.empty:
@@ -148,7 +140,7 @@ def calcular_estatisticas_basicas(df):
 
     for coluna in colunas_tempo:
         if coluna in df.columns:
-            tempos_numericos = df[coluna].apply(converter_tempo_para_segundos).dropna()
+            tempos_numericos = converter_tempos_vetorizado(df[coluna]).dropna()
 
             if not tempos_numericos.empty:
                 stats[coluna] = {
@@ -353,10 +345,10 @@ elif secao == "🏁 Dashboard Aproveitamento":
         if not df_filtrado.empty:
             # Converter tempos para segundos para análise
             df_filtrado_copy = df_filtrado.copy()
-            df_filtrado_copy['Lap_Time_Sec'] = df_filtrado_copy['Lap Time'].apply(converter_tempo_para_segundos)
-            df_filtrado_copy['S1_Sec'] = df_filtrado_copy['Sector 1'].apply(converter_tempo_para_segundos)
-            df_filtrado_copy['S2_Sec'] = df_filtrado_copy['Sector 2'].apply(converter_tempo_para_segundos)
-            df_filtrado_copy['S3_Sec'] = df_filtrado_copy['Sector 3'].apply(converter_tempo_para_segundos)
+            df_filtrado_copy['Lap_Time_Sec'] = converter_tempos_vetorizado(df_filtrado_copy['Lap Time'])
+            df_filtrado_copy['S1_Sec'] = converter_tempos_vetorizado(df_filtrado_copy['Sector 1'])
+            df_filtrado_copy['S2_Sec'] = converter_tempos_vetorizado(df_filtrado_copy['Sector 2'])
+            df_filtrado_copy['S3_Sec'] = converter_tempos_vetorizado(df_filtrado_copy['Sector 3'])
 
             # Melhores tempos por piloto
             melhores_por_piloto = df_filtrado_copy.groupby('Nome_Piloto').agg({
@@ -456,8 +448,8 @@ elif secao == "📈 Comparações Temporais":
                 dados_piloto2 = df2[df2['Nome_Piloto'] == piloto_comparacao].copy()
 
                 # Converter tempos
-                dados_piloto1['Lap_Time_Sec'] = dados_piloto1['Lap Time'].apply(converter_tempo_para_segundos)
-                dados_piloto2['Lap_Time_Sec'] = dados_piloto2['Lap Time'].apply(converter_tempo_para_segundos)
+                dados_piloto1['Lap_Time_Sec'] = converter_tempos_vetorizado(dados_piloto1['Lap Time'])
+                dados_piloto2['Lap_Time_Sec'] = converter_tempos_vetorizado(dados_piloto2['Lap Time'])
 
                 melhor1 = dados_piloto1['Lap_Time_Sec'].min()
                 melhor2 = dados_piloto2['Lap_Time_Sec'].min()
@@ -502,7 +494,7 @@ elif secao == "🏆 Rankings por Equipe":
         df = dados_etapa['dataframe'].copy()
 
         # Converter tempos
-        df['Lap_Time_Sec'] = df['Lap Time'].apply(converter_tempo_para_segundos)
+        df['Lap_Time_Sec'] = converter_tempos_vetorizado(df['Lap Time'])
 
         tab1, tab2 = st.tabs(["🏁 Ranking por Equipe", "🚗 Ranking por Montadora"])
 
@@ -604,10 +596,10 @@ elif secao == "⚡ Análise de Performance":
         df = dados_etapa['dataframe'].copy()
 
         # Converter tempos para análise
-        df['Lap_Time_Sec'] = df['Lap Time'].apply(converter_tempo_para_segundos)
-        df['S1_Sec'] = df['Sector 1'].apply(converter_tempo_para_segundos)
-        df['S2_Sec'] = df['Sector 2'].apply(converter_tempo_para_segundos)
-        df['S3_Sec'] = df['Sector 3'].apply(converter_tempo_para_segundos)
+        df['Lap_Time_Sec'] = converter_tempos_vetorizado(df['Lap Time'])
+        df['S1_Sec'] = converter_tempos_vetorizado(df['Sector 1'])
+        df['S2_Sec'] = converter_tempos_vetorizado(df['Sector 2'])
+        df['S3_Sec'] = converter_tempos_vetorizado(df['Sector 3'])
 
         tab1, tab2, tab3 = st.tabs(["📊 Análise Setorial", "🎯 Comparação com Referência", "📈 Distribuição de Tempos"])
 
@@ -726,22 +718,16 @@ elif secao == "⚡ Análise de Performance":
                 # Tabela de comparação
                 tabela_comp = melhores_deltas.copy()
                 tabela_comp['Tempo Atual'] = [formatar_tempo(t) for t in tabela_comp['Lap_Time_Sec']]
-                tabela_comp['Delta Volta'] = [f"{d:+.3f}s" for d in tabela_comp['Delta_Volta']]
-                tabela_comp['Delta S1'] = [f"{d:+.3f}s" for d in tabela_comp['Delta_S1']]
-                tabela_comp['Delta S2'] = [f"{d:+.3f}s" for d in tabela_comp['Delta_S2']]
-                tabela_comp['Delta S3'] = [f"{d:+.3f}s" for d in tabela_comp['Delta_S3']]
-
-                # Destacar melhores tempos
-                def highlight_best(s):
-                    if s.name in ['Delta Volta', 'Delta S1', 'Delta S2', 'Delta S3']:
-                        values = [float(x.replace('s', '').replace('+', '')) for x in s if 's' in str(x)]
-                        if values:
-                            min_val = min(values)
-                            return ['background-color: #90EE90' if float(str(x).replace('s', '').replace('+', '')) == min_val else 'background-color: #FFB6C1' if float(str(x).replace('s', '').replace('+', '')) > 0 else '' for x in s if 's' in str(x)]
-                    return ['' for _ in s]
+                for coluna, nome in COLUNAS_DELTA.items():
+                    tabela_comp[nome] = formatar_deltas(tabela_comp[coluna])
+
+                # Destacar melhores tempos: cores calculadas dos deltas numéricos, textos só para exibição
+                estilos = estilos_deltas(tabela_comp[list(COLUNAS_DELTA)]).rename(columns=COLUNAS_DELTA)
 
                 st.dataframe(
-                    tabela_comp[['Nome_Piloto', 'Tempo Atual', 'Delta Volta', 'Delta S1', 'Delta S2', 'Delta S3']],
+                    tabela_comp[['Nome_Piloto', 'Tempo Atual', *COLUNAS_DELTA.values()]].style.apply(
+                        lambda _: estilos, axis=None, subset=list(COLUNAS_DELTA.values())
+                    ),
                     hide_index=True
                 )
 
@@ -821,7 +807,7 @@ elif secao == "📊 Histórico Comparativo":
             todos_dados.append(df_etapa)
 
         df_historico = pd.concat(todos_dados, ignore_index=True)
-        df_historico['Lap_Time_Sec'] = df_historico['Lap Time'].apply(converter_tempo_para_segundos)
+        df_historico['Lap_Time_Sec'] = converter_tempos_vetorizado(df_historico['Lap Time'])
 
         # Filtros para análise histórica
         col1, col2 = st.columns(2)
@@ -8,6 +8,9 @@ import re
 from datetime import datetime
 import numpy as np
 
+from chronon_dimensoes import DimensoesCadastro
+from chronon_parser import converter_tempos_vetorizado, segmentar_blocos_chronon
+
 # Configuração da página
 st.set_page_config(
     page_title="Stock Car Analytics Pro v2.0",
@@ -38,6 +41,9 @@ MAPEAMENTO_EQUIPES_MONTADORAS = {
     "Allam Khodair": {"Equipe": "Blau Motorsport", "Montadora": "Volkswagen", "Numero": "80"},
 }
 
+# Mesmo cadastro como dimensões, aceitando os nomes com ou sem acento
+CADASTRO_EQUIPES_MONTADORAS = DimensoesCadastro.de_mapeamento(MAPEAMENTO_EQUIPES_MONTADORAS)
+
 # Pistas oficiais baseadas no Chronon.com.br
 PISTAS_OFICIAIS = {
     "Goiânia": {"distancia": 3.835, "setores": 3, "drs_zones": 1},
@@ -64,41 +70,12 @@ def processar_csv_chronon(uploaded_file):
     """Processa CSV no formato oficial do Chronon.com.br"""
     df = pd.read_csv(uploaded_file)
 
-    # Identificar linhas com padrão de piloto (número - nome - categoria)
-    pattern_rows = df.iloc[:, 0].astype(str).str.match(r'^\d+ - .+ - Stock Car PRO \d{4}$', na=False)
-    pattern_indices = df.index[pattern_rows].tolist()
-
-    # Criar lista para armazenar dados processados
-    dados_processados = []
-
-    for i, start_idx in enumerate(pattern_indices):
-        # Extrair informações da linha padrão
-        info_linha = df.iloc[start_idx, 0]
-        partes = info_linha.split(' - ')
-        numero_carro = partes[0]
-        nome_piloto = partes[1]
-        categoria = partes[2]
-
-        # Determinar fim dos dados deste piloto
-        end_idx = pattern_indices[i + 1] if i + 1 < len(pattern_indices) else len(df)
-
-        # Extrair dados de voltas do piloto
-        dados_piloto = df.iloc[start_idx + 1:end_idx].copy()
-
-        if not dados_piloto.empty:
-            dados_piloto['Numero_Carro'] = numero_carro
-            dados_piloto['Nome_Piloto'] = nome_piloto
-            dados_piloto['Categoria'] = categoria
-
-            # Adicionar informações de equipe e montadora
-            piloto_info = MAPEAMENTO_EQUIPES_MONTADORAS.get(nome_piloto, {})
-            dados_piloto['Equipe'] = piloto_info.get('Equipe', 'Desconhecida')
-            dados_piloto['Montadora'] = piloto_info.get('Montadora', 'Desconhecida')
-
-            dados_processados.append(dados_piloto)
+    # Voltas de todos os pilotos em uma única passada
+    df_final = segmentar_blocos_chronon(df)
 
-    if dados_processados:
-        df_final = pd.concat(dados_processados, ignore_index=True)
+    if not df_final.empty:
+        # Adicionar informações de equipe e montadora
+        CADASTRO_EQUIPES_MONTADORAS.anexar_voltas(df_final, {'Equipe': 'Desconhecida', 'Montadora': 'Desconhecida'})
         return df_final
 
     return pd.DataFrame()
@@ -131,13 +108,13 @@ def calcular_metricas_avancadas(df):
 
     # Colunas de tempo
     if 'Lap Tm' in df.columns:
-        df_calc['Lap_Time_Sec'] = df_calc['Lap Tm'].apply(converter_tempo_chronon)
+        df_calc['Lap_Time_Sec'] = converter_tempos_vetorizado(df_calc['Lap Tm'])
     if 'S1 Tm' in df.columns:
-        df_calc['S1_Sec'] = df_calc['S1 Tm'].apply(converter_tempo_chronon)
+        df_calc['S1_Sec'] = converter_tempos_vetorizado(df_calc['S1 Tm'])
     if 'S2 Tm' in df.columns:
-        df_calc['S2_Sec'] = df_calc['S2 Tm'].apply(converter_tempo_chronon)
+        df_calc['S2_Sec'] = converter_tempos_vetorizado(df_calc['S2 Tm'])
     if 'S3 Tm' in df.columns:
-        df_calc['S3_Sec'] = df_calc['S3 Tm'].apply(converter_tempo_chronon)
+        df_calc['S3_Sec'] = converter_tempos_vetorizado(df_calc['S3 Tm'])
 
     # Velocidade
     if 'Speed' in df.columns:
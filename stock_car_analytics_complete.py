@@ -5,11 +5,44 @@ import plotly.express as px
 import requests
 import json
 import re
+import asyncio
+import time
 from datetime import datetime
 import numpy as np
 import io
 import base64
 
+from chronon_parser import compactar_voltas, converter_tempo_para_segundos_completo
+from chronon_armazenamento import (
+    DIRETORIO_ARMAZENAMENTO, armazenamento_disponivel, salvar_etapa, carregar_etapas_salvas,
+    carregar_etapa_completa, remover_etapa_salva, limpar_armazenamento, resumo_voltas, metadados_voltas
+)
+from chronon_cache import TAMANHO_CACHE_PADRAO_MB, chave_importacao, obter_cache_importacao
+from chronon_dimensoes import pilotos_sem_cadastro
+from chronon_ao_vivo import AcompanhamentoAoVivo
+from chronon_reproducao import VELOCIDADE_PADRAO, ReproducaoSessao
+from chronon_ritmo import JANELA_RITMO
+from chronon_reducao import PONTOS_POR_SERIE_PADRAO
+from chronon_graficos import (
+    CORES_MONTADORAS, figura_series_voltas, figura_dispersao_voltas, figura_caixas, figura_histograma, chave_figura,
+    obter_cache_figuras, aplicar_visual
+)
+from chronon_diagnostico import ARQUIVO_METRICAS, Instrumentacao, ativar_instrumentacao, medir
+from chronon_agregados import (
+    classificar_pilotos, obter_agregados_etapa, voltas_piloto, comparar_etapas, matriz_melhores_voltas,
+    progressao_pilotos
+)
+from chronon_formatacao import (
+    FORMATOS_TABELAS, casas_precisao, formatar_tempos, formatar_deltas, formatar_velocidades, formatar_tabela,
+    tabela_formatada
+)
+from stock_car_engine import (
+    MAPEAMENTO_COMPLETO_PILOTOS, CADASTRO_PILOTOS, PISTAS_OFICIAIS_COMPLETAS, SESSOES_OFICIAIS_COMPLETAS, TEMPORADAS_DISPONIVEIS,
+    calcular_pontos_campeonato,
+    aplicar_etapa_campeonato, classificacao_campeonato, processar_csv_chronon, gerar_chave_etapa, montar_etapa,
+    importar_arquivos_chronon, voltas_piloto_temporada, stints_piloto_temporada, ritmo_piloto_temporada, fatos_temporada
+)
+
 # Configuração da página
 st.set_page_config(
     page_title="Stock Car Analytics Pro v2.0 - Complete Edition",
@@ -42,329 +75,201 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Base de dados COMPLETA com todos os pilotos da Stock Car 2024-2025
-MAPEAMENTO_COMPLETO_PILOTOS = {
-    "Daniel Serra": {"Equipe": "Eurofarma-RC", "Montadora": "Chevrolet", "Numero": "29"},
-    "Bruno Baptista": {"Equipe": "RCM Motorsport", "Montadora": "Toyota", "Numero": "44"},
-    "Gabriel Casagrande": {"Equipe": "A.Mattheis Vogel", "Montadora": "Volkswagen", "Numero": "83"},
-    "Guilherme Salas": {"Equipe": "KTF Racing", "Montadora": "Chevrolet", "Numero": "85"},
-    "Cesar Ramos": {"Equipe": "Ipiranga Racing", "Montadora": "Toyota", "Numero": "30"},
-    "Enzo Elias": {"Equipe": "Crown Racing", "Montadora": "Toyota", "Numero": "28"},
-    "Thiago Camilo": {"Equipe": "Ipiranga Racing", "Montadora": "Toyota", "Numero": "21"},
-    "Lucas Foresti": {"Equipe": "A.Mattheis Vogel", "Montadora": "Volkswagen", "Numero": "12"},
-    "Felipe Massa": {"Equipe": "TMG Racing", "Montadora": "Chevrolet", "Numero": "19"},
-    "Rubens Barrichello": {"Equipe": "Full Time", "Montadora": "Toyota", "Numero": "111"},
-    "Cacá Bueno": {"Equipe": "KTF Sports", "Montadora": "Chevrolet", "Numero": "0"},
-    "Felipe Fraga": {"Equipe": "Blau Motorsport", "Montadora": "Volkswagen", "Numero": "8"},
-    "Ricardo Zonta": {"Equipe": "RMatheus", "Montadora": "Toyota", "Numero": "10"},
-    "Gaetano di Mauro": {"Equipe": "Cavaleiro Sports", "Montadora": "Chevrolet", "Numero": "77"},
-    "Nelson Piquet Jr": {"Equipe": "Cavaleiro Sports", "Montadora": "Chevrolet", "Numero": "33"},
-    "Átila Abreu": {"Equipe": "Pole Motorsport", "Montadora": "Toyota", "Numero": "51"},
-    "Ricardo Maurício": {"Equipe": "Eurofarma-RC", "Montadora": "Chevrolet", "Numero": "18"},
-    "Allam Khodair": {"Equipe": "Blau Motorsport", "Montadora": "Volkswagen", "Numero": "80"},
-    "Rafael Suzuki": {"Equipe": "TMG Racing", "Montadora": "Chevrolet", "Numero": "90"},
-    "Julio Campos": {"Equipe": "Pole Motorsport", "Montadora": "Toyota", "Numero": "11"},
-    "Dudu Barrichello": {"Equipe": "Full Time", "Montadora": "Toyota", "Numero": "91"},
-    "Zezinho Muggiati": {"Equipe": "KTF Sports", "Montadora": "Chevrolet", "Numero": "1"},
-    "Tuca Antoniazi": {"Equipe": "Hot Car Racing", "Montadora": "Chevrolet", "Numero": "27"},
-    "Diego Nunes": {"Equipe": "Blau Motorsport", "Montadora": "Volkswagen", "Numero": "5"},
-    "Tony Kanaan": {"Equipe": "Full Time", "Montadora": "Toyota", "Numero": "14"},
-    "Marcos Gomes": {"Equipe": "Cavaleiro Sports", "Montadora": "Chevrolet", "Numero": "9"},
-    "Arthur Leist": {"Equipe": "Full Time", "Montadora": "Toyota", "Numero": "16"},
-    "Gianluca Petecof": {"Equipe": "Full Time", "Montadora": "Toyota", "Numero": "88"},
-}
-
-# Pistas oficiais COMPLETAS com dados técnicos detalhados
-PISTAS_OFICIAIS_COMPLETAS = {
-    "Goiânia": {
-        "distancia": 3.835, "setores": 3, "drs_zones": 1, "tipo": "Misto",
-        "curvas": 12, "retas_longas": 2, "elevacao": "Baixa"
-    },
-    "Velocitta": {
-        "distancia": 3.150, "setores": 3, "drs_zones": 2, "tipo": "Técnico", 
-        "curvas": 14, "retas_longas": 1, "elevacao": "Média"
-    },
-    "Interlagos": {
-        "distancia": 4.309, "setores": 3, "drs_zones": 2, "tipo": "Clássico",
-        "curvas": 16, "retas_longas": 2, "elevacao": "Alta"
-    },
-    "Cascavel": {
-        "distancia": 3.458, "setores": 3, "drs_zones": 1, "tipo": "Oval",
-        "curvas": 4, "retas_longas": 2, "elevacao": "Baixa"
-    },
-    "Velopark": {
-        "distancia": 3.068, "setores": 3, "drs_zones": 2, "tipo": "Técnico",
-        "curvas": 15, "retas_longas": 1, "elevacao": "Baixa"
-    },
-    "Belo Horizonte": {
-        "distancia": 3.067, "setores": 3, "drs_zones": 1, "tipo": "Urbano",
-        "curvas": 11, "retas_longas": 2, "elevacao": "Média"
-    },
-    "Buenos Aires": {
-        "distancia": 4.200, "setores": 3, "drs_zones": 2, "tipo": "Clássico",
-        "curvas": 18, "retas_longas": 2, "elevacao": "Baixa"
-    },
-    "Uruguai": {
-        "distancia": 3.200, "setores": 3, "drs_zones": 1, "tipo": "Misto",
-        "curvas": 13, "retas_longas": 1, "elevacao": "Baixa"
-    },
-    "Curitiba": {
-        "distancia": 2.369, "setores": 3, "drs_zones": 1, "tipo": "Urbano",
-        "curvas": 10, "retas_longas": 1, "elevacao": "Baixa"
-    },
-    "Santa Cruz do Sul": {
-        "distancia": 3.067, "setores": 3, "drs_zones": 1, "tipo": "Misto",
-        "curvas": 12, "retas_longas": 2, "elevacao": "Baixa"
-    },
-    "Tarumã": {
-        "distancia": 3.068, "setores": 3, "drs_zones": 2, "tipo": "Técnico",
-        "curvas": 16, "retas_longas": 1, "elevacao": "Média"
-    },
-    "Ribeirão Preto": {
-        "distancia": 4.216, "setores": 3, "drs_zones": 2, "tipo": "Misto",
-        "curvas": 14, "retas_longas": 2, "elevacao": "Baixa"
-    }
-}
-
-# Sessões oficiais COMPLETAS
-SESSOES_OFICIAIS_COMPLETAS = {
-    "Treino Rookies": {"duracao": 30, "tipo": "Treino", "pontos": False},
-    "Shake Down": {"duracao": 15, "tipo": "Treino", "pontos": False},
-    "T1": {"duracao": 90, "tipo": "Treino Livre", "pontos": False},
-    "T2": {"duracao": 90, "tipo": "Treino Livre", "pontos": False},
-    "Q1-G1": {"duracao": 15, "tipo": "Classificação", "pontos": False},
-    "Q1-G2": {"duracao": 15, "tipo": "Classificação", "pontos": False},
-    "Q2": {"duracao": 12, "tipo": "Classificação", "pontos": False},
-    "Q3": {"duracao": 10, "tipo": "Classificação", "pontos": False},
-    "QF": {"duracao": 8, "tipo": "Super Pole", "pontos": False},
-    "Prova1 Sprint": {"duracao": 30, "tipo": "Corrida", "pontos": True},
-    "P2": {"duracao": 50, "tipo": "Corrida Principal", "pontos": True},
-    "Warm Up": {"duracao": 20, "tipo": "Aquecimento", "pontos": False}
-}
-
-# Temporadas disponíveis
-TEMPORADAS_DISPONIVEIS = ["2020", "2021", "2022", "2023", "2024", "2025"]
-
-# Sistema de pontuação oficial Stock Car
-SISTEMA_PONTUACAO = {
-    1: 25, 2: 20, 3: 16, 4: 13, 5: 11, 6: 10, 7: 9, 8: 8, 9: 7, 10: 6,
-    11: 5, 12: 4, 13: 3, 14: 2, 15: 1
-}
-
-def processar_csv_chronon_completo(uploaded_file):
+def processar_csv_chronon_completo(uploaded_file, streaming=False):
     """Processa CSV no formato oficial do Chronon.com.br com todas as validações"""
     try:
-        df = pd.read_csv(uploaded_file)
-
-        # Verificar se é um arquivo válido do Chronon
-        if df.empty or len(df.columns) < 5:
-            st.error("❌ Arquivo CSV inválido. Verifique se é um arquivo do Chronon.")
-            return pd.DataFrame()
-
-        # Identificar linhas com padrão de piloto
-        primeira_coluna = df.iloc[:, 0].astype(str)
-        pattern_rows = primeira_coluna.str.match(r'^\d+ - .+ - Stock Car PRO \d{4}$', na=False)
-        pattern_indices = df.index[pattern_rows].tolist()
-
-        if not pattern_indices:
-            st.error("❌ Formato de arquivo não reconhecido. Verifique se é um CSV do Chronon oficial.")
-            return pd.DataFrame()
+        return processar_csv_chronon(uploaded_file, streaming=streaming)
 
-        dados_processados = []
-
-        for i, start_idx in enumerate(pattern_indices):
-            info_linha = df.iloc[start_idx, 0]
-            partes = info_linha.split(' - ')
-
-            if len(partes) >= 3:
-                numero_carro = partes[0]
-                nome_piloto = partes[1]
-                categoria = partes[2]
-
-                end_idx = pattern_indices[i + 1] if i + 1 < len(pattern_indices) else len(df)
-                dados_piloto = df.iloc[start_idx + 1:end_idx].copy()
-
-                if not dados_piloto.empty:
-                    dados_piloto['Numero_Carro'] = numero_carro
-                    dados_piloto['Nome_Piloto'] = nome_piloto
-                    dados_piloto['Categoria'] = categoria
-
-                    # Adicionar informações completas
-                    piloto_info = MAPEAMENTO_COMPLETO_PILOTOS.get(nome_piloto, {})
-                    dados_piloto['Equipe'] = piloto_info.get('Equipe', 'Independente')
-                    dados_piloto['Montadora'] = piloto_info.get('Montadora', 'Outras')
-                    dados_piloto['Numero_Oficial'] = piloto_info.get('Numero', numero_carro)
-
-                    dados_processados.append(dados_piloto)
-
-        if dados_processados:
-            df_final = pd.concat(dados_processados, ignore_index=True)
-            return df_final
+    except ValueError as e:
+        st.error(f"❌ {str(e)}")
+        return pd.DataFrame()
 
     except Exception as e:
         st.error(f"❌ Erro ao processar arquivo: {str(e)}")
         return pd.DataFrame()
 
-    return pd.DataFrame()
-
-def converter_tempo_para_segundos_completo(tempo_str):
-    """Conversão completa e robusta de tempos"""
-    try:
-        if pd.isna(tempo_str) or tempo_str == '' or 'No Time' in str(tempo_str):
-            return None
-
-        tempo_str = str(tempo_str).strip().replace(',', '.')
-
-        if ':' in tempo_str:
-            partes = tempo_str.split(':')
-            minutos = int(partes[0])
-            segundos = float(partes[1])
-            return minutos * 60 + segundos
-
-        return float(tempo_str)
-    except:
-        return None
-
-def calcular_metricas_avancadas_completas(df):
-    """Calcula todas as métricas possíveis dos dados do Chronon"""
-    if df.empty:
-        return df
-
-    df_calc = df.copy()
-
-    # Colunas de tempo
-    colunas_tempo = ['Lap Tm', 'S1 Tm', 'S2 Tm', 'S3 Tm']
-    for col in colunas_tempo:
-        if col in df.columns:
-            nova_coluna = col.replace(' Tm', '_Sec').replace(' ', '_')
-            df_calc[nova_coluna] = df_calc[col].apply(converter_tempo_para_segundos_completo)
-
-    # Velocidades
-    if 'Speed' in df.columns:
-        df_calc['Speed_Kmh'] = pd.to_numeric(df_calc['Speed'].astype(str).str.replace(',', '.'), errors='coerce')
-
-    if 'SPT' in df.columns:
-        df_calc['Speed_Trap_Kmh'] = pd.to_numeric(df_calc['SPT'].astype(str).str.replace(',', '.'), errors='coerce')
-
-    # Qualidade do sinal
-    if 'Strength' in df.columns:
-        df_calc['Signal_Strength'] = pd.to_numeric(df_calc['Strength'], errors='coerce')
-
-    if 'Hits' in df.columns:
-        df_calc['Transponder_Hits'] = pd.to_numeric(df_calc['Hits'], errors='coerce')
-
-    # Número da volta
-    if 'Lap' in df.columns:
-        df_calc['Lap_Number'] = pd.to_numeric(df_calc['Lap'], errors='coerce')
-
-    return df_calc
-
-def formatar_tempo_completo(segundos):
-    """Formatação completa de tempo"""
-    if pd.isna(segundos) or segundos is None:
-        return 'N/A'
-
-    if segundos < 60:
-        return f"{segundos:.3f}s"
-
-    minutos = int(segundos // 60)
-    segundos_restantes = segundos % 60
-    return f"{minutos}:{segundos_restantes:06.3f}"
-
-def calcular_pontos_campeonato(posicao):
-    """Calcula pontos baseado no sistema oficial da Stock Car"""
-    return SISTEMA_PONTUACAO.get(posicao, 0)
-
-def gerar_relatorio_completo_piloto(df, nome_piloto):
-    """Gera relatório completo de um piloto específico"""
-    dados_piloto = df[df['Nome_Piloto'] == nome_piloto].copy()
+def casas_tempo():
+    """Casas decimais dos tempos conforme a precisão escolhida nas configurações"""
+    return casas_precisao(st.session_state.configuracoes_usuario.get('precisao_tempo'))
+
+def formatar_tempo(segundos):
+    """Tempo avulso na precisão escolhida nas configurações"""
+    return formatar_tempos([segundos], casas_tempo())[0]
+
+def pontos_por_serie():
+    """Limite de pontos por série nos gráficos volta a volta, conforme as configurações"""
+    return st.session_state.configuracoes_usuario.get('pontos_por_serie', PONTOS_POR_SERIE_PADRAO)
+
+def configuracao_visual():
+    """Tema e altura padrão dos gráficos escolhidos nas configurações"""
+    configuracoes = st.session_state.configuracoes_usuario
+    return configuracoes.get('tema_cores'), configuracoes.get('altura_graficos')
+
+def enviar_grafico(fig, etapa=None):
+    """Envia o gráfico Plotly medindo a serialização e o envio ao navegador"""
+    with medir('grafico', etapa):
+        st.plotly_chart(fig, use_container_width=True)
+
+def exibir_grafico(fig, etapa=None):
+    """Mostra o gráfico Plotly com o tema e a altura das configurações"""
+    enviar_grafico(aplicar_visual(fig, *configuracao_visual()), etapa)
+
+def exibir_grafico_cache(tipo, construir, etapa=None, dados_etapa=None, **filtros):
+    """Mostra o gráfico do cache de figuras, montando-o só quando etapa, dados, filtros ou visual mudam"""
+    visual = configuracao_visual()
+    versao = obter_agregados_etapa(dados_etapa)['versao'] if dados_etapa is not None else None
+    chave = chave_figura(tipo, etapa, versao, filtros, visual)
+
+    # Tema e altura entram na figura guardada, por isso fazem parte da chave
+    with medir('figura', etapa):
+        fig = obter_cache_figuras().figura(chave, lambda: aplicar_visual(construir(), *visual))
+    enviar_grafico(fig, etapa)
+
+def exibir_tabela(df, etapa=None, **kwargs):
+    """Mostra a tabela medindo a conversão e o envio ao navegador"""
+    with medir('tabela', etapa, df):
+        st.dataframe(df, **kwargs)
+
+def exibir_painel_ao_vivo(agregados):
+    """Classificação, setores e speed trap da sessão em andamento, lidos dos agregados incrementais"""
+    classificacao = agregados.classificacao()
+    volta_ideal = agregados.volta_ideal()
 
-    if dados_piloto.empty:
-        return None
-
-    relatorio = {
-        'piloto': nome_piloto,
-        'equipe': dados_piloto['Equipe'].iloc[0],
-        'montadora': dados_piloto['Montadora'].iloc[0],
-        'numero': dados_piloto['Numero_Oficial'].iloc[0],
-        'total_voltas': len(dados_piloto),
-        'voltas_validas': len(dados_piloto.dropna(subset=['Lap_Sec'])),
-    }
-
-    # Estatísticas de tempo
-    if 'Lap_Sec' in dados_piloto.columns:
-        tempos_validos = dados_piloto['Lap_Sec'].dropna()
-        if not tempos_validos.empty:
-            relatorio.update({
-                'melhor_volta': tempos_validos.min(),
-                'pior_volta': tempos_validos.max(),
-                'tempo_medio': tempos_validos.mean(),
-                'consistencia': tempos_validos.std(),
-            })
-
-    # Estatísticas de velocidade
-    if 'Speed_Kmh' in dados_piloto.columns:
-        velocidades = dados_piloto['Speed_Kmh'].dropna()
-        if not velocidades.empty:
-            relatorio.update({
-                'velocidade_maxima': velocidades.max(),
-                'velocidade_media': velocidades.mean(),
-            })
-
-    if 'Speed_Trap_Kmh' in dados_piloto.columns:
-        speed_trap = dados_piloto['Speed_Trap_Kmh'].dropna()
-        if not speed_trap.empty:
-            relatorio['speed_trap_max'] = speed_trap.max()
-
-    # Análise setorial
-    setores = ['S1_Sec', 'S2_Sec', 'S3_Sec']
-    setores_existentes = [s for s in setores if s in dados_piloto.columns]
-
-    if setores_existentes:
-        for i, setor in enumerate(setores_existentes, 1):
-            tempos_setor = dados_piloto[setor].dropna()
-            if not tempos_setor.empty:
-                relatorio[f'melhor_setor_{i}'] = tempos_setor.min()
-                relatorio[f'media_setor_{i}'] = tempos_setor.mean()
-
-    return relatorio
-
-def exportar_dados_para_csv(df, nome_arquivo):
-    """Exporta dados processados para CSV"""
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="{nome_arquivo}.csv">📥 Baixar dados processados</a>'
-    return href
-
-def criar_grafico_comparacao_montadoras(df):
-    """Cria gráfico comparativo entre montadoras"""
-    if 'Lap_Sec' not in df.columns:
-        return None
-
-    # Melhores tempos por montadora
-    melhores_por_mont = df.dropna(subset=['Lap_Sec']).groupby('Montadora').agg({
-        'Lap_Sec': ['min', 'mean', 'count'],
-        'Speed_Kmh': 'max',
-        'Nome_Piloto': 'nunique'
-    }).round(3)
-
-    melhores_por_mont.columns = ['_'.join(col).strip() for col in melhores_por_mont.columns]
-    melhores_por_mont = melhores_por_mont.reset_index()
-
-    return melhores_por_mont
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Voltas Recebidas", agregados.total_voltas)
+    with col2:
+        st.metric("Pilotos", len(agregados.pilotos))
+    with col3:
+        st.metric("Melhor Volta", formatar_tempo(classificacao['Lap_Sec'].iloc[0]) if not classificacao.empty else "N/A",
+                  classificacao['Nome_Piloto'].iloc[0] if not classificacao.empty else None, delta_color='off')
+    with col4:
+        st.metric("Volta Ideal", formatar_tempo(volta_ideal) if volta_ideal is not None else "N/A")
+
+    if classificacao.empty:
+        return
+
+    casas = casas_tempo()
+    formatadas = formatar_tabela(classificacao, FORMATOS_TABELAS['classificacao'], casas)
+    tabela = classificacao.assign(
+        Tempo=formatadas['Lap_Sec'],
+        Delta=formatar_deltas(classificacao['Lap_Sec'] - classificacao['Lap_Sec'].iloc[0], casas),
+        Voltas=agregados.pilotos['Voltas'].reindex(classificacao['Nome_Piloto']).to_numpy(),
+    )
+    colunas = [col for col in ['Posicao', 'Numero_Oficial', 'Nome_Piloto', 'Equipe', 'Montadora', 'Tempo', 'Delta', 'Voltas']
+               if col in tabela.columns]
+    exibir_tabela(tabela[colunas], hide_index=True, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("🧮 Melhores Setores")
+        setores = agregados.melhores_setores()
+        if not setores.empty:
+            exibir_tabela(setores.assign(tempo=formatar_tempos(setores['tempo'], casas)), hide_index=True, use_container_width=True)
+    with col2:
+        st.subheader("🚀 Speed Trap por Montadora")
+        speed_trap = agregados.speed_trap_montadora()
+        if speed_trap is not None:
+            exibir_tabela(speed_trap, hide_index=True, use_container_width=True)
+
+def obter_fatos_temporada():
+    """Tabela de fatos (piloto, etapa) da sessão, montada uma vez a partir das etapas carregadas"""
+    if 'fatos_temporada' not in st.session_state:
+        st.session_state.fatos_temporada = fatos_temporada(st.session_state.dados_etapas_completo)
+
+    return st.session_state.fatos_temporada
+
+def obter_campeonato():
+    """Classificação do campeonato da sessão, montada uma vez a partir das etapas carregadas"""
+    if 'campeonato' not in st.session_state:
+        st.session_state.campeonato = classificacao_campeonato(st.session_state.dados_etapas_completo)
+
+    return st.session_state.campeonato
+
+def registrar_etapa(chave_etapa, dados_etapa):
+    """Guarda a etapa na sessão e no armazenamento local"""
+    # Esquema compacto: categorias para identificação e float32/Int16 para as medidas
+    with medir('compactacao', chave_etapa) as medicao:
+        dados_etapa['dataframe'] = medicao['df'] = compactar_voltas(dados_etapa['dataframe'])
+    # Contagens nos metadados: sidebar e rodapé não precisam abrir as voltas de cada etapa
+    dados_etapa.update(resumo_voltas(dados_etapa['dataframe']))
+    salva_em_disco = False
+
+    if armazenamento_disponivel():
+        try:
+            salvar_etapa(chave_etapa, dados_etapa)
+            salva_em_disco = True
+        except Exception as e:
+            st.warning(f"⚠️ Etapa importada, mas não foi possível salvá-la em disco: {str(e)}")
+
+    # Colunas brutas do Chronon ficam só no arquivo Parquet, a menos que o usuário peça para mantê-las
+    if salva_em_disco and not st.session_state.configuracoes_usuario.get('manter_colunas_brutas', False):
+        dados_etapa['dataframe'] = compactar_voltas(dados_etapa['dataframe'], manter_colunas_brutas=False)
+
+    # Agregados calculados uma vez na importação e reaproveitados por todas as seções
+    obter_agregados_etapa(dados_etapa)
+    st.session_state.dados_etapas_completo[chave_etapa] = dados_etapa
+
+    # Campeonato e tabela de fatos atualizados só com esta etapa
+    if 'campeonato' in st.session_state:
+        aplicar_etapa_campeonato(st.session_state.campeonato, chave_etapa, dados_etapa)
+    if 'fatos_temporada' in st.session_state:
+        st.session_state.fatos_temporada.aplicar_etapa(chave_etapa, dados_etapa)
+
+def remover_etapa(chave_etapa):
+    """Remove a etapa da sessão e do armazenamento local"""
+    st.session_state.dados_etapas_completo.pop(chave_etapa, None)
+
+    if 'campeonato' in st.session_state:
+        st.session_state.campeonato.remover_etapa(chave_etapa)
+    if 'fatos_temporada' in st.session_state:
+        st.session_state.fatos_temporada.remover_etapa(chave_etapa)
+
+    if armazenamento_disponivel():
+        remover_etapa_salva(chave_etapa)
+
+def importar_lote_chronon(arquivos_enviados, etapa, temporada_padrao, pista_padrao):
+    """Importa vários CSVs (ou ZIPs) de um fim de semana, processando os arquivos em paralelo"""
+    cache_importacao = obter_cache_importacao(
+        st.session_state.configuracoes_usuario.get('tamanho_cache', TAMANHO_CACHE_PADRAO_MB)
+    )
+
+    resultados, etapas = importar_arquivos_chronon(
+        [(arquivo.name, arquivo.getvalue()) for arquivo in arquivos_enviados],
+        etapa, temporada_padrao, pista_padrao, cache_importacao
+    )
+
+    for chave_etapa, dados_etapa in etapas:
+        registrar_etapa(chave_etapa, dados_etapa)
+
+        st.session_state.historico_analises.append({
+            'acao': 'Importação em lote',
+            'etapa': etapa,
+            'sessao': dados_etapa['sessao'],
+            'timestamp': datetime.now()
+        })
+
+    return resultados
 
 # Interface principal
 st.markdown('<div class="main-header"><h1>🏎️ Stock Car Analytics Pro v2.0 - Complete Edition</h1><p>Sistema Oficial baseado em dados do Chronon.com.br - Audace Tech</p></div>', unsafe_allow_html=True)
 
 # Inicializar session state COMPLETO
 if 'dados_etapas_completo' not in st.session_state:
-    st.session_state.dados_etapas_completo = {}
+    # Etapas salvas em disco voltam sem re-upload; cada DataFrame só é lido quando usado
+    st.session_state.dados_etapas_completo = carregar_etapas_salvas() if armazenamento_disponivel() else {}
 if 'dados_referencia_completo' not in st.session_state:
     st.session_state.dados_referencia_completo = {}
 if 'configuracoes_usuario' not in st.session_state:
     st.session_state.configuracoes_usuario = {}
 if 'historico_analises' not in st.session_state:
     st.session_state.historico_analises = []
+if 'instrumentacao' not in st.session_state:
+    st.session_state.instrumentacao = Instrumentacao()
+
+# Tempos de cada estágio deste rerun, por seção e por etapa
+instrumentacao = ativar_instrumentacao(st.session_state.instrumentacao)
+modo_diagnostico = st.session_state.configuracoes_usuario.get('modo_diagnostico', False)
 
 # Sidebar COMPLETA para navegação
 st.sidebar.title("🏁 Stock Car Analytics")
@@ -372,11 +277,14 @@ st.sidebar.markdown("---")
 
 secao = st.sidebar.selectbox(
     "Escolha a seção:",
-    ["🏠 Dashboard Principal", "📥 Importação Chronon", "🏆 Resultados Oficiais", 
+    ["🏠 Dashboard Principal", "📥 Importação Chronon", "📡 Cronometragem Ao Vivo", "🔁 Reprodução de Sessão",
+     "🏆 Resultados Oficiais", 
      "⚡ Análise Speed Trap", "📊 Análise Setorial Pro", "🔄 Comparação Temporal",
      "📈 Rankings Completos", "🎯 Sistema de Referências", "📋 Relatórios Executivos",
      "🏁 Campeonato e Pontos", "⚙️ Configurações Avançadas", "📤 Exportar Dados"]
+    + (["🩺 Diagnóstico"] if modo_diagnostico else [])
 )
+instrumentacao.iniciar_execucao(secao)
 
 # Estatísticas rápidas na sidebar
 if st.session_state.dados_etapas_completo:
@@ -385,11 +293,10 @@ if st.session_state.dados_etapas_completo:
     st.sidebar.write(f"**Etapas carregadas:** {len(st.session_state.dados_etapas_completo)}")
     st.sidebar.write(f"**Referências salvas:** {len(st.session_state.dados_referencia_completo)}")
 
-    # Total de pilotos únicos
+    # Total de pilotos únicos, pelos metadados das etapas
     todos_pilotos = set()
     for dados in st.session_state.dados_etapas_completo.values():
-        if 'Nome_Piloto' in dados['dataframe'].columns:
-            todos_pilotos.update(dados['dataframe']['Nome_Piloto'].unique())
+        todos_pilotos.update(metadados_voltas(dados)['pilotos'])
 
     st.sidebar.write(f"**Pilotos no sistema:** {len(todos_pilotos)}")
 
@@ -437,14 +344,13 @@ if secao == "🏠 Dashboard Principal":
 
                 with col2:
                     if 'dataframe' in dados:
-                        df = dados['dataframe']
-                        st.write(f"**Pilotos:** {df['Nome_Piloto'].nunique()}")
-                        st.write(f"**Voltas:** {len(df)}")
+                        agregados = obter_agregados_etapa(dados)
+                        st.write(f"**Pilotos:** {len(metadados_voltas(dados)['pilotos'])}")
+                        st.write(f"**Voltas:** {dados['total_voltas']}")
 
                 with col3:
-                    if 'dataframe' in dados and 'Lap_Sec' in df.columns:
-                        melhor_volta = df['Lap_Sec'].min()
-                        st.write(f"**Melhor volta:** {formatar_tempo_completo(melhor_volta)}")
+                    if 'dataframe' in dados and agregados['melhor_volta'] is not None:
+                        st.write(f"**Melhor volta:** {formatar_tempo(agregados['melhor_volta'])}")
 
     else:
         st.info("💡 Importe dados na seção 'Importação Chronon' para começar a análise")
@@ -492,6 +398,11 @@ elif secao == "📥 Importação Chronon":
             pista_chronon = st.selectbox("Pista:", list(PISTAS_OFICIAIS_COMPLETAS.keys()))
             uploaded_file_chronon = st.file_uploader("Arquivo CSV Oficial:", type=['csv'])
             observacoes = st.text_area("Observações (opcional):", placeholder="Ex: Chuva no T2, problema técnico no Q3...")
+            importacao_em_blocos = st.checkbox(
+                "📦 Importação em blocos (arquivos grandes)",
+                value=False,
+                help="Lê o CSV em partes para limitar o uso de memória em exportações de fim de semana completo"
+            )
 
         # Botão de importação
         submitted = st.form_submit_button("🚀 IMPORTAR DADOS DO CHRONON", type="primary")
@@ -499,25 +410,27 @@ elif secao == "📥 Importação Chronon":
         if submitted:
             if uploaded_file_chronon and etapa_chronon:
                 with st.spinner("🔄 Processando dados do Chronon..."):
-                    df_chronon = processar_csv_chronon_completo(uploaded_file_chronon)
+                    # Reenvio do mesmo arquivo reaproveita as voltas já processadas
+                    cache_importacao = obter_cache_importacao(
+                        st.session_state.configuracoes_usuario.get('tamanho_cache', TAMANHO_CACHE_PADRAO_MB)
+                    )
+                    chave_cache = chave_importacao(uploaded_file_chronon.getvalue(), CADASTRO_PILOTOS)
+                    df_chronon = cache_importacao.obter(chave_cache)
+
+                    if df_chronon is not None:
+                        st.info("⚡ Arquivo já processado anteriormente - dados carregados do cache")
+                    else:
+                        df_chronon = processar_csv_chronon_completo(uploaded_file_chronon, streaming=importacao_em_blocos)
+
+                        if not df_chronon.empty:
+                            cache_importacao.guardar(chave_cache, df_chronon)
 
                     if not df_chronon.empty:
-                        # Calcular métricas avançadas
-                        df_chronon = calcular_metricas_avancadas_completas(df_chronon)
-
-                        # Salvar dados na session
-                        chave_etapa = f"{temporada_chronon}_{etapa_chronon}_{sessao_chronon}"
-                        st.session_state.dados_etapas_completo[chave_etapa] = {
-                            'dataframe': df_chronon,
-                            'temporada': temporada_chronon,
-                            'etapa': etapa_chronon,
-                            'sessao': sessao_chronon,
-                            'pista': pista_chronon,
-                            'dados_pista': PISTAS_OFICIAIS_COMPLETAS[pista_chronon],
-                            'observacoes': observacoes,
-                            'data_importacao': datetime.now(),
-                            'info_sessao': SESSOES_OFICIAIS_COMPLETAS[sessao_chronon]
-                        }
+                        # Salvar dados na session e em disco
+                        chave_etapa = gerar_chave_etapa(temporada_chronon, etapa_chronon, sessao_chronon)
+                        registrar_etapa(chave_etapa, montar_etapa(
+                            df_chronon, temporada_chronon, etapa_chronon, sessao_chronon, pista_chronon, observacoes
+                        ))
 
                         # Adicionar ao histórico
                         st.session_state.historico_analises.append({
@@ -529,6 +442,11 @@ elif secao == "📥 Importação Chronon":
 
                         st.markdown('<div class="success-box">✅ DADOS IMPORTADOS COM SUCESSO!</div>', unsafe_allow_html=True)
 
+                        # Pilotos fora do cadastro da temporada ficam sinalizados em vez de somar em 'Independente'
+                        sem_cadastro = pilotos_sem_cadastro(df_chronon)
+                        if sem_cadastro:
+                            st.warning(f"⚠️ Pilotos sem cadastro na temporada: {', '.join(sem_cadastro)}")
+
                         # Estatísticas da importação
                         st.subheader("📊 Resumo da Importação")
 
@@ -548,7 +466,7 @@ elif secao == "📥 Importação Chronon":
                         with col4:
                             if 'Lap_Sec' in df_chronon.columns:
                                 melhor_volta = df_chronon['Lap_Sec'].min()
-                                st.metric("Melhor Volta", formatar_tempo_completo(melhor_volta) if pd.notna(melhor_volta) else "N/A")
+                                st.metric("Melhor Volta", formatar_tempo(melhor_volta) if pd.notna(melhor_volta) else "N/A")
 
                         # Detalhes da sessão
                         st.subheader("📋 Detalhes da Sessão")
@@ -587,14 +505,14 @@ elif secao == "📥 Importação Chronon":
                                 }
                             )
 
-                            st.plotly_chart(fig_dist, use_container_width=True)
+                            exibir_grafico(fig_dist)
 
                         # Preview dos dados
                         with st.expander("👀 Preview dos Dados Importados"):
                             colunas_preview = ['Nome_Piloto', 'Equipe', 'Montadora', 'Lap Tm', 'Speed', 'S1 Tm', 'S2 Tm', 'S3 Tm', 'SPT']
                             colunas_existentes = [col for col in colunas_preview if col in df_chronon.columns]
 
-                            st.dataframe(df_chronon[colunas_existentes].head(20), use_container_width=True)
+                            exibir_tabela(df_chronon[colunas_existentes].head(20), use_container_width=True)
 
                     else:
                         st.error("❌ Falha na importação. Verifique o formato do arquivo.")
@@ -602,6 +520,166 @@ elif secao == "📥 Importação Chronon":
             else:
                 st.error("❌ Preencha todos os campos obrigatórios e selecione um arquivo.")
 
+    # Importação de um fim de semana inteiro em uma única ação
+    st.subheader("📦 Importação em Lote")
+
+    with st.form("form_importacao_lote", clear_on_submit=False):
+        st.write("Envie vários CSVs ou um ZIP com as sessões do fim de semana. A sessão e a pista são identificadas pelo nome de cada arquivo e a temporada pelo cabeçalho dos pilotos.")
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            etapa_lote = st.text_input("Etapa (ex: #3 Interlagos, #7 Goiânia):", "", key="etapa_lote")
+            temporada_lote = st.selectbox("Temporada (quando não identificada):", TEMPORADAS_DISPONIVEIS, index=4, key="temporada_lote")
+
+        with col2:
+            pista_lote = st.selectbox("Pista (quando não identificada):", list(PISTAS_OFICIAIS_COMPLETAS.keys()), key="pista_lote")
+            arquivos_lote = st.file_uploader("Arquivos CSV ou ZIP:", type=['csv', 'zip'], accept_multiple_files=True)
+
+        submitted_lote = st.form_submit_button("🚀 IMPORTAR FIM DE SEMANA", type="primary")
+
+        if submitted_lote:
+            if arquivos_lote and etapa_lote:
+                with st.spinner("🔄 Processando arquivos em paralelo..."):
+                    resultados_lote = importar_lote_chronon(arquivos_lote, etapa_lote, temporada_lote, pista_lote)
+
+                importados = sum(1 for resultado in resultados_lote if resultado['Status'].startswith('✅'))
+
+                if importados:
+                    st.markdown(f'<div class="success-box">✅ {importados} SESSÕES IMPORTADAS COM SUCESSO!</div>', unsafe_allow_html=True)
+                else:
+                    st.error("❌ Nenhuma sessão foi importada. Verifique os nomes e o formato dos arquivos.")
+
+                exibir_tabela(pd.DataFrame(resultados_lote), hide_index=True, use_container_width=True)
+
+            else:
+                st.error("❌ Informe a etapa e selecione ao menos um arquivo.")
+
+elif secao == "📡 Cronometragem Ao Vivo":
+    st.header("📡 Cronometragem Ao Vivo")
+
+    st.info("💡 Acompanha o CSV que o Chronon está gravando no disco: a cada atualização só as linhas novas são lidas")
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        caminho_ao_vivo = st.text_input("Caminho do arquivo CSV em gravação:", st.session_state.get('caminho_ao_vivo', ''))
+    with col2:
+        intervalo_ao_vivo = st.number_input("Atualizar a cada (s):", 0.2, 10.0, 1.0, step=0.2)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("▶️ Iniciar acompanhamento", type="primary"):
+            if caminho_ao_vivo:
+                st.session_state.caminho_ao_vivo = caminho_ao_vivo
+                st.session_state.ao_vivo = AcompanhamentoAoVivo(caminho_ao_vivo, CADASTRO_PILOTOS)
+                st.session_state.ao_vivo_ativo = True
+            else:
+                st.error("❌ Informe o caminho do arquivo.")
+    with col2:
+        if st.button("⏹️ Parar"):
+            st.session_state.ao_vivo_ativo = False
+
+    acompanhamento = st.session_state.get('ao_vivo')
+
+    if acompanhamento is not None:
+        try:
+            acompanhamento.atualizar()
+        except ValueError as e:
+            st.error(f"❌ {str(e)}")
+            st.session_state.ao_vivo_ativo = False
+
+        exibir_painel_ao_vivo(acompanhamento.agregados)
+
+        # Fim da sessão: as voltas recebidas viram uma etapa como as importadas
+        with st.expander("💾 Registrar sessão como etapa"):
+            with st.form("form_registro_ao_vivo"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    temporada_ao_vivo = st.selectbox("Temporada:", TEMPORADAS_DISPONIVEIS, index=4)
+                    etapa_ao_vivo = st.text_input("Etapa (ex: #3 Interlagos, #7 Goiânia):", "")
+                with col2:
+                    sessao_ao_vivo = st.selectbox("Sessão:", list(SESSOES_OFICIAIS_COMPLETAS.keys()))
+                    pista_ao_vivo = st.selectbox("Pista:", list(PISTAS_OFICIAIS_COMPLETAS.keys()))
+
+                if st.form_submit_button("💾 Registrar etapa"):
+                    if etapa_ao_vivo and acompanhamento.agregados.total_voltas:
+                        registrar_etapa(
+                            gerar_chave_etapa(temporada_ao_vivo, etapa_ao_vivo, sessao_ao_vivo),
+                            montar_etapa(acompanhamento.agregados.dataframe(), temporada_ao_vivo, etapa_ao_vivo,
+                                         sessao_ao_vivo, pista_ao_vivo, 'Sessão acompanhada ao vivo')
+                        )
+                        st.session_state.ao_vivo_ativo = False
+                        st.success("✅ Sessão registrada como etapa!")
+                    else:
+                        st.error("❌ Informe a etapa; a sessão precisa ter ao menos uma volta.")
+
+        if st.session_state.get('ao_vivo_ativo'):
+            time.sleep(intervalo_ao_vivo)
+            st.rerun()
+
+elif secao == "🔁 Reprodução de Sessão":
+    st.header("🔁 Reprodução de Sessão")
+
+    if not st.session_state.dados_etapas_completo:
+        st.warning("⚠️ Importe dados do Chronon primeiro")
+    else:
+        st.info("💡 Reproduz uma sessão importada na ordem do 'Time of Day', pelo mesmo painel da cronometragem ao vivo")
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            etapa_reproducao = st.selectbox("Sessão para reproduzir:", list(st.session_state.dados_etapas_completo.keys()))
+        with col2:
+            velocidade_reproducao = st.number_input("Velocidade (x tempo real):", 0.5, 1000.0, VELOCIDADE_PADRAO, step=0.5)
+        with col3:
+            intervalo_reproducao = st.number_input("Atualizar o painel a cada (s):", 0.2, 10.0, 1.0, step=0.2)
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if st.button("▶️ Iniciar reprodução", type="primary"):
+                try:
+                    st.session_state.reproducao = ReproducaoSessao(
+                        st.session_state.dados_etapas_completo[etapa_reproducao]['dataframe'], velocidade_reproducao
+                    )
+                    st.session_state.reproducao_ativa = True
+                except ValueError as e:
+                    st.error(f"❌ {str(e)}")
+
+        reproducao = st.session_state.get('reproducao')
+
+        with col2:
+            if st.button("⏹️ Parar reprodução") and reproducao is not None:
+                reproducao.pausar()
+                st.session_state.reproducao_ativa = False
+        with col3:
+            if st.button("⏯️ Continuar reprodução") and reproducao is not None and not reproducao.concluida:
+                reproducao.retomar()
+                st.session_state.reproducao_ativa = True
+
+        if reproducao is not None:
+            # Cada rerun reproduz um intervalo do relógio e redesenha o painel
+            if st.session_state.get('reproducao_ativa') and not reproducao.concluida:
+                asyncio.run(reproducao.reproduzir(duracao=intervalo_reproducao))
+
+            st.progress(reproducao.posicao / len(reproducao.voltas),
+                        text=f"{reproducao.posicao} de {len(reproducao.voltas)} voltas")
+
+            exibir_painel_ao_vivo(reproducao.agregados)
+
+            # Atraso entre o instante de cada passagem na sessão e a entrega ao painel
+            atrasos = reproducao.resumo_atrasos()
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Atraso Médio", f"{atrasos['atraso_medio'] * 1000:.0f} ms" if atrasos['entregas'] else "N/A")
+            with col2:
+                st.metric("Atraso p95", f"{atrasos['atraso_p95'] * 1000:.0f} ms" if atrasos['entregas'] else "N/A")
+            with col3:
+                st.metric("Atraso Máximo", f"{atrasos['atraso_maximo'] * 1000:.0f} ms" if atrasos['entregas'] else "N/A")
+
+            if reproducao.concluida:
+                st.success("✅ Reprodução concluída")
+            elif st.session_state.get('reproducao_ativa'):
+                st.rerun()
+
 elif secao == "🏆 Resultados Oficiais":
     st.header("🏆 Resultados Oficiais")
 
@@ -659,79 +737,84 @@ elif secao == "🏆 Resultados Oficiais":
                                                   (int(df['Lap_Number'].min()), int(df['Lap_Number'].max())))
 
         # Aplicar filtros
-        df_filtrado = df[
-            (df['Equipe'].isin(equipes_filtro)) &
-            (df['Montadora'].isin(montadoras_filtro)) &
-            (df['Nome_Piloto'].isin(pilotos_filtro))
-        ]
-
-        if 'Lap_Number' in df.columns:
-            df_filtrado = df_filtrado[
-                (df_filtrado['Lap_Number'] >= voltas_min) &
-                (df_filtrado['Lap_Number'] <= voltas_max)
+        filtro_voltas_completo = 'Lap_Number' not in df.columns or (
+            voltas_min <= df['Lap_Number'].min() and voltas_max >= df['Lap_Number'].max()
+        )
+
+        if filtro_voltas_completo:
+            # Equipe e montadora são fixas por piloto: os filtros se aplicam direto à classificação em cache
+            classificacao = obter_agregados_etapa(dados_etapa)['classificacao']
+            melhores_tempos = classificacao[
+                (classificacao['Equipe'].isin(equipes_filtro)) &
+                (classificacao['Montadora'].isin(montadoras_filtro)) &
+                (classificacao['Nome_Piloto'].isin(pilotos_filtro))
+            ].copy()
+            melhores_tempos['Posicao'] = range(1, len(melhores_tempos) + 1)
+        else:
+            df_filtrado = df[
+                (df['Equipe'].isin(equipes_filtro)) &
+                (df['Montadora'].isin(montadoras_filtro)) &
+                (df['Nome_Piloto'].isin(pilotos_filtro)) &
+                (df['Lap_Number'] >= voltas_min) &
+                (df['Lap_Number'] <= voltas_max)
             ]
+            melhores_tempos = classificar_pilotos(df_filtrado)
 
-        if not df_filtrado.empty and 'Lap_Sec' in df_filtrado.columns:
+        if not melhores_tempos.empty and 'Lap_Sec' in df.columns:
             # Classificação oficial
-            melhores_tempos = df_filtrado.dropna(subset=['Lap_Sec']).groupby('Nome_Piloto').agg({
-                'Lap_Sec': 'min',
-                'Speed_Kmh': 'max',
-                'Speed_Trap_Kmh': 'max',
-                'Equipe': 'first',
-                'Montadora': 'first',
-                'Numero_Oficial': 'first'
-            }).reset_index()
-
-            melhores_tempos = melhores_tempos.sort_values('Lap_Sec')
-            melhores_tempos['Posicao'] = range(1, len(melhores_tempos) + 1)
+
+            # Textos de exibição: os da classificação em cache, ou formatados agora para o recorte de voltas
+            casas = casas_tempo()
+            if filtro_voltas_completo:
+                formatadas = tabela_formatada(obter_agregados_etapa(dados_etapa), 'classificacao', casas)
+            else:
+                formatadas = formatar_tabela(melhores_tempos, FORMATOS_TABELAS['classificacao'], casas)
 
             # Calcular pontos (se for corrida)
             if sessao_info['pontos']:
                 melhores_tempos['Pontos'] = melhores_tempos['Posicao'].apply(calcular_pontos_campeonato)
 
             # Gráfico de classificação
-            fig_classificacao = go.Figure()
-
-            cores_montadora = {
-                'Chevrolet': '#FFD700',
-                'Toyota': '#DC143C', 
-                'Volkswagen': '#4682B4',
-                'Outras': '#808080'
-            }
-
-            fig_classificacao.add_trace(go.Bar(
-                x=melhores_tempos['Nome_Piloto'],
-                y=melhores_tempos['Lap_Sec'],
-                text=[formatar_tempo_completo(t) for t in melhores_tempos['Lap_Sec']],
-                textposition='outside',
-                marker_color=[cores_montadora.get(m, '#808080') for m in melhores_tempos['Montadora']],
-                hovertemplate="<b>%{x}</b><br>Tempo: %{text}<br>Posição: %{marker.color}<extra></extra>"
-            ))
-
-            fig_classificacao.update_layout(
-                title=f'🏆 Classificação Oficial - {dados_etapa["etapa"]} - {dados_etapa["sessao"]}',
-                xaxis_title='Pilotos',
-                yaxis_title='Tempo (segundos)',
-                height=600,
-                showlegend=False
-            )
+            def montar_classificacao():
+                fig_classificacao = go.Figure()
 
-            st.plotly_chart(fig_classificacao, use_container_width=True)
+                fig_classificacao.add_trace(go.Bar(
+                    x=melhores_tempos['Nome_Piloto'],
+                    y=melhores_tempos['Lap_Sec'],
+                    text=formatadas['Lap_Sec'].reindex(melhores_tempos.index),
+                    textposition='outside',
+                    marker_color=[CORES_MONTADORAS.get(m, '#808080') for m in melhores_tempos['Montadora']],
+                    hovertemplate="<b>%{x}</b><br>Tempo: %{text}<br>Posição: %{marker.color}<extra></extra>"
+                ))
+
+                fig_classificacao.update_layout(
+                    title=f'🏆 Classificação Oficial - {dados_etapa["etapa"]} - {dados_etapa["sessao"]}',
+                    xaxis_title='Pilotos',
+                    yaxis_title='Tempo (segundos)',
+                    height=600,
+                    showlegend=False
+                )
+                return fig_classificacao
+
+            exibir_grafico_cache(
+                'classificacao', montar_classificacao, etapa_selecionada, dados_etapa,
+                equipes=equipes_filtro, montadoras=montadoras_filtro, pilotos=pilotos_filtro,
+                voltas=(voltas_min, voltas_max), casas=casas
+            )
 
             # Tabela de classificação completa
             st.subheader("📊 Classificação Detalhada")
 
             tabela_classificacao = melhores_tempos.copy()
-            tabela_classificacao['Tempo'] = [formatar_tempo_completo(t) for t in tabela_classificacao['Lap_Sec']]
-            tabela_classificacao['Vel. Máxima'] = [f"{v:.1f} km/h" if pd.notna(v) else "N/A" for v in tabela_classificacao['Speed_Kmh']]
-            tabela_classificacao['Speed Trap'] = [f"{v:.1f} km/h" if pd.notna(v) else "N/A" for v in tabela_classificacao['Speed_Trap_Kmh']]
+            tabela_classificacao['Tempo'] = formatadas['Lap_Sec']
+            tabela_classificacao['Vel. Máxima'] = formatadas['Speed_Kmh']
+            tabela_classificacao['Speed Trap'] = formatadas['Speed_Trap_Kmh']
 
             # Delta para o líder
             tempo_lider = melhores_tempos.iloc[0]['Lap_Sec']
-            tabela_classificacao['Delta'] = [
-                "Líder" if i == 0 else f"+{(tempo - tempo_lider):.3f}s"
-                for i, tempo in enumerate(tabela_classificacao['Lap_Sec'])
-            ]
+            deltas = formatar_deltas(tabela_classificacao['Lap_Sec'] - tempo_lider, casas)
+            deltas[0] = "Líder"
+            tabela_classificacao['Delta'] = deltas
 
             # Colunas da tabela
             colunas_tabela = ['Posicao', 'Numero_Oficial', 'Nome_Piloto', 'Equipe', 'Montadora', 'Tempo', 'Delta', 'Vel. Máxima', 'Speed Trap']
@@ -739,7 +822,7 @@ elif secao == "🏆 Resultados Oficiais":
             if sessao_info['pontos']:
                 colunas_tabela.insert(-3, 'Pontos')
 
-            st.dataframe(tabela_classificacao[colunas_tabela], hide_index=True, use_container_width=True)
+            exibir_tabela(tabela_classificacao[colunas_tabela], hide_index=True, use_container_width=True, etapa=etapa_selecionada)
 
             # Estatísticas da sessão
             st.subheader("📈 Estatísticas da Sessão")
@@ -752,7 +835,7 @@ elif secao == "🏆 Resultados Oficiais":
 
             with col2:
                 tempo_medio = melhores_tempos['Lap_Sec'].mean()
-                st.metric("Tempo Médio", formatar_tempo_completo(tempo_medio))
+                st.metric("Tempo Médio", formatar_tempo(tempo_medio))
 
             with col3:
                 if 'Speed_Trap_Kmh' in melhores_tempos.columns:
@@ -779,29 +862,18 @@ elif secao == "⚡ Análise Speed Trap":
             st.subheader(f"🚀 Speed Trap - {dados_etapa['etapa']} - {dados_etapa['sessao']}")
 
             # Análise speed trap por montadora
-            speed_por_montadora = df.dropna(subset=['Speed_Trap_Kmh']).groupby('Montadora').agg({
-                'Speed_Trap_Kmh': ['max', 'mean', 'std', 'count'],
-                'Nome_Piloto': 'nunique'
-            }).round(2)
-
-            speed_por_montadora.columns = ['Max', 'Média', 'Desvio', 'Voltas', 'Pilotos']
-            speed_por_montadora = speed_por_montadora.reset_index()
-
-            # Gráfico de distribuição
-            fig_speed_dist = px.box(
-                df.dropna(subset=['Speed_Trap_Kmh']),
-                x='Montadora',
-                y='Speed_Trap_Kmh',
-                color='Montadora',
-                color_discrete_map={
-                    'Chevrolet': '#FFD700',
-                    'Toyota': '#DC143C',
-                    'Volkswagen': '#4682B4'
-                },
-                title='📊 Distribuição de Velocidade no Speed Trap por Montadora'
-            )
+            speed_por_montadora = obter_agregados_etapa(dados_etapa)['speed_trap_montadora']
+
+            # Gráfico de distribuição: quartis calculados no servidor, sem enviar cada volta ao navegador
+            exibir_grafico_cache('speed_trap_caixas', lambda: figura_caixas(
+                df, 'Speed_Trap_Kmh', 'Montadora',
+                titulo='📊 Distribuição de Velocidade no Speed Trap por Montadora',
+                cores=CORES_MONTADORAS
+            ), etapa_speed, dados_etapa)
 
-            st.plotly_chart(fig_speed_dist, use_container_width=True)
+            exibir_grafico_cache('speed_trap_histograma', lambda: figura_histograma(
+                df['Speed_Trap_Kmh'], titulo='Voltas por Faixa de Velocidade no Speed Trap', rotulo='Velocidade (km/h)'
+            ), etapa_speed, dados_etapa)
 
             # Top 10 velocidades
             st.subheader("🏆 Top 10 Velocidades Speed Trap")
@@ -817,28 +889,30 @@ elif secao == "⚡ Análise Speed Trap":
 
             with col2:
                 # Gráfico dos top 10
-                fig_top_speeds = go.Figure()
-
-                fig_top_speeds.add_trace(go.Bar(
-                    x=top_speeds['Nome_Piloto'],
-                    y=top_speeds['Speed_Trap_Kmh'],
-                    text=[f"{v:.1f}" for v in top_speeds['Speed_Trap_Kmh']],
-                    textposition='outside',
-                    marker_color=[cores_montadora.get(m, '#808080') for m in top_speeds['Montadora']]
-                ))
-
-                fig_top_speeds.update_layout(
-                    title="Top 10 Speed Trap",
-                    xaxis_title="Pilotos",
-                    yaxis_title="Velocidade (km/h)",
-                    height=400
-                )
+                def montar_top_speeds():
+                    fig_top_speeds = go.Figure()
+
+                    fig_top_speeds.add_trace(go.Bar(
+                        x=top_speeds['Nome_Piloto'],
+                        y=top_speeds['Speed_Trap_Kmh'],
+                        texttemplate='%{y:.1f}',
+                        textposition='outside',
+                        marker_color=[CORES_MONTADORAS.get(m, '#808080') for m in top_speeds['Montadora']]
+                    ))
+
+                    fig_top_speeds.update_layout(
+                        title="Top 10 Speed Trap",
+                        xaxis_title="Pilotos",
+                        yaxis_title="Velocidade (km/h)",
+                        height=400
+                    )
+                    return fig_top_speeds
 
-                st.plotly_chart(fig_top_speeds, use_container_width=True)
+                exibir_grafico_cache('speed_trap_top10', montar_top_speeds, etapa_speed, dados_etapa)
 
             # Tabela comparativa por montadora
             st.subheader("📊 Análise Comparativa por Montadora")
-            st.dataframe(speed_por_montadora, use_container_width=True)
+            exibir_tabela(speed_por_montadora, use_container_width=True, etapa=etapa_speed)
 
             # Análise de correlação velocidade vs tempo de volta
             if 'Lap_Sec' in df.columns:
@@ -847,21 +921,12 @@ elif secao == "⚡ Análise Speed Trap":
                 df_correlacao = df.dropna(subset=['Speed_Trap_Kmh', 'Lap_Sec'])
 
                 if not df_correlacao.empty:
-                    fig_correlacao = px.scatter(
-                        df_correlacao,
-                        x='Speed_Trap_Kmh',
-                        y='Lap_Sec',
-                        color='Montadora',
-                        hover_data=['Nome_Piloto'],
-                        title='Speed Trap vs Tempo de Volta',
-                        color_discrete_map={
-                            'Chevrolet': '#FFD700',
-                            'Toyota': '#DC143C',
-                            'Volkswagen': '#4682B4'
-                        }
-                    )
-
-                    st.plotly_chart(fig_correlacao, use_container_width=True)
+                    exibir_grafico_cache('speed_trap_correlacao', lambda: figura_dispersao_voltas(
+                        df_correlacao, 'Speed_Trap_Kmh', 'Lap_Sec', cor='Montadora',
+                        titulo='Speed Trap vs Tempo de Volta',
+                        rotulos={'Speed_Trap_Kmh': 'Speed Trap (km/h)', 'Lap_Sec': 'Tempo (s)'},
+                        detalhe='Nome_Piloto', cores=CORES_MONTADORAS
+                    ), etapa_speed, dados_etapa)
 
                     # Coeficiente de correlação
                     correlacao = df_correlacao['Speed_Trap_Kmh'].corr(df_correlacao['Lap_Sec'])
@@ -901,21 +966,8 @@ elif secao == "📊 Análise Setorial Pro":
         if setores_disponiveis:
             st.subheader(f"🔍 Análise Setorial - {dados_etapa['pista']} ({len(setores_disponiveis)} setores)")
 
-            # Melhores setores por piloto
-            analise_setorial = df.dropna(subset=setores_disponiveis).groupby('Nome_Piloto').agg({
-                **{setor: ['min', 'mean', 'std'] for setor in setores_disponiveis},
-                'Lap_Sec': 'min',
-                'Equipe': 'first',
-                'Montadora': 'first'
-            }).round(3)
-
-            analise_setorial.columns = ['_'.join(col).strip() for col in analise_setorial.columns]
-            analise_setorial = analise_setorial.reset_index()
-
-            # Identificar melhor setor por piloto
-            if len(setores_disponiveis) >= 3:
-                colunas_min = [f'{setor}_min' for setor in setores_disponiveis]
-                analise_setorial['Melhor_Setor'] = analise_setorial[colunas_min].idxmin(axis=1).str.replace('_Sec_min', '').str.replace('_', ' ')
+            # Melhores setores por piloto, com o melhor setor de cada um
+            analise_setorial = obter_agregados_etapa(dados_etapa)['setorial']
 
             # Heatmap setorial
             st.subheader("🔥 Mapa de Calor - Performance por Setor")
@@ -927,17 +979,20 @@ elif secao == "📊 Análise Setorial Pro":
             # Renomear colunas para melhor visualização
             heatmap_data.columns = [col.replace('_Sec_min', '').replace('_', ' ') for col in heatmap_data.columns]
 
-            fig_heatmap = px.imshow(
-                heatmap_data.T,
-                text_auto='.3f',
-                aspect='auto',
-                title='Melhores Tempos por Setor (mais escuro = mais rápido)',
-                labels={'x': 'Pilotos', 'y': 'Setores', 'color': 'Tempo (s)'},
-                color_continuous_scale='RdYlBu_r'
-            )
+            def montar_heatmap():
+                fig_heatmap = px.imshow(
+                    heatmap_data.T,
+                    text_auto=f'.{casas_tempo()}f',
+                    aspect='auto',
+                    title='Melhores Tempos por Setor (mais escuro = mais rápido)',
+                    labels={'x': 'Pilotos', 'y': 'Setores', 'color': 'Tempo (s)'},
+                    color_continuous_scale='RdYlBu_r'
+                )
 
-            fig_heatmap.update_layout(height=400)
-            st.plotly_chart(fig_heatmap, use_container_width=True)
+                fig_heatmap.update_layout(height=400)
+                return fig_heatmap
+
+            exibir_grafico_cache('setores_heatmap', montar_heatmap, etapa_setor, dados_etapa, casas=casas_tempo())
 
             # Reis dos setores
             st.subheader("👑 Reis dos Setores")
@@ -957,6 +1012,46 @@ elif secao == "📊 Análise Setorial Pro":
                             f"{melhor_piloto[coluna_min]:.3f}s"
                         )
 
+            # Volta ideal do grid e volta teórica de cada piloto, calculadas na importação
+            agregados_setor = obter_agregados_etapa(dados_etapa)
+            volta_ideal = agregados_setor['volta_ideal']
+
+            if volta_ideal is not None:
+                st.subheader("🧮 Volta Ideal e Volta Teórica")
+
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Volta Ideal do Grid", formatar_tempo(volta_ideal['tempo']),
+                              help=" + ".join(f"{linha.setor}: {linha.piloto}" for linha in volta_ideal['setores'].itertuples()))
+                with col2:
+                    st.metric("Melhor Volta Real", formatar_tempo(volta_ideal['melhor_volta']))
+                with col3:
+                    st.metric("Tempo Deixado na Pista", formatar_deltas([volta_ideal['ganho']], casas_tempo())[0])
+
+                pilotos_setor = agregados_setor['pilotos'].dropna(subset=['volta_teorica']).sort_values('volta_teorica')
+                formatadas_pilotos = tabela_formatada(agregados_setor, 'pilotos', casas_tempo())
+                exibir_tabela(pd.DataFrame({
+                    'Piloto': pilotos_setor.index.astype(str),
+                    'Volta Teórica': formatadas_pilotos.loc[pilotos_setor.index, 'volta_teorica'].to_numpy(),
+                    'Melhor Volta': formatadas_pilotos.loc[pilotos_setor.index, 'melhor_volta'].to_numpy(),
+                    'Ganho Possível': formatadas_pilotos.loc[pilotos_setor.index, 'ganho_teorico'].to_numpy(),
+                }), hide_index=True, use_container_width=True, etapa=etapa_setor)
+
+                # Mesma pista ao longo da temporada
+                ideais_pista = obter_fatos_temporada().voltas_ideais_por_pista()
+                if not ideais_pista.empty:
+                    ideais_pista = ideais_pista[ideais_pista['pista'] == dados_etapa['pista']]
+
+                if len(ideais_pista) > 1:
+                    fig_ideal = go.Figure()
+                    for coluna, nome in [('volta_ideal', 'Volta ideal da etapa'), ('melhor_volta', 'Melhor volta da etapa'),
+                                         ('volta_ideal_pista', 'Volta ideal da pista')]:
+                        fig_ideal.add_trace(go.Scatter(x=ideais_pista['chave'], y=ideais_pista[coluna],
+                                                       mode='lines+markers', name=nome))
+                    fig_ideal.update_layout(title=f"Volta Ideal em {dados_etapa['pista']} na Temporada",
+                                            xaxis_title='Etapa', yaxis_title='Tempo (s)', height=400)
+                    exibir_grafico(fig_ideal, etapa_setor)
+
             # Gráfico comparativo setorial
             st.subheader("📊 Comparação Setorial por Piloto")
 
@@ -970,34 +1065,38 @@ elif secao == "📊 Análise Setorial Pro":
             if pilotos_comparar:
                 dados_comparacao = analise_setorial[analise_setorial['Nome_Piloto'].isin(pilotos_comparar)]
 
-                fig_setores_comp = go.Figure()
-
-                for setor in setores_disponiveis:
-                    coluna_min = f'{setor}_min'
-                    if coluna_min in dados_comparacao.columns:
-                        fig_setores_comp.add_trace(go.Bar(
-                            name=setor.replace('_Sec', '').replace('_', ' '),
-                            x=dados_comparacao['Nome_Piloto'],
-                            y=dados_comparacao[coluna_min],
-                            text=[f"{v:.3f}s" for v in dados_comparacao[coluna_min]],
-                            textposition='outside'
-                        ))
-
-                fig_setores_comp.update_layout(
-                    title='Comparação de Melhores Setores',
-                    xaxis_title='Pilotos',
-                    yaxis_title='Tempo (segundos)',
-                    barmode='group',
-                    height=500
-                )
+                def montar_setores_comp():
+                    fig_setores_comp = go.Figure()
+
+                    for setor in setores_disponiveis:
+                        coluna_min = f'{setor}_min'
+                        if coluna_min in dados_comparacao.columns:
+                            fig_setores_comp.add_trace(go.Bar(
+                                name=setor.replace('_Sec', '').replace('_', ' '),
+                                x=dados_comparacao['Nome_Piloto'],
+                                y=dados_comparacao[coluna_min],
+                                texttemplate='%{y:.3f}s',
+                                textposition='outside'
+                            ))
+
+                    fig_setores_comp.update_layout(
+                        title='Comparação de Melhores Setores',
+                        xaxis_title='Pilotos',
+                        yaxis_title='Tempo (segundos)',
+                        barmode='group',
+                        height=500
+                    )
+                    return fig_setores_comp
 
-                st.plotly_chart(fig_setores_comp, use_container_width=True)
+                exibir_grafico_cache('setores_comparacao', montar_setores_comp, etapa_setor, dados_etapa,
+                                     pilotos=pilotos_comparar)
 
             # Tabela setorial completa
             st.subheader("📋 Tabela Setorial Completa")
 
             # Preparar tabela para exibição
             tabela_setorial = analise_setorial.copy()
+            formatadas = tabela_formatada(obter_agregados_etapa(dados_etapa), 'setorial', casas_tempo())
 
             # Colunas a mostrar
             colunas_mostrar = ['Nome_Piloto', 'Equipe_first', 'Montadora_first']
@@ -1005,9 +1104,7 @@ elif secao == "📊 Análise Setorial Pro":
             for setor in setores_disponiveis:
                 col_min = f'{setor}_min'
                 if col_min in tabela_setorial.columns:
-                    tabela_setorial[f'Melhor {setor.replace("_Sec", "").replace("_", " ")}'] = [
-                        formatar_tempo_completo(t) for t in tabela_setorial[col_min]
-                    ]
+                    tabela_setorial[f'Melhor {setor.replace("_Sec", "").replace("_", " ")}'] = formatadas[col_min]
                     colunas_mostrar.append(f'Melhor {setor.replace("_Sec", "").replace("_", " ")}')
 
             if 'Melhor_Setor' in tabela_setorial.columns:
@@ -1016,10 +1113,10 @@ elif secao == "📊 Análise Setorial Pro":
             # Ordenar por melhor volta
             if 'Lap_Sec_min' in tabela_setorial.columns:
                 tabela_setorial = tabela_setorial.sort_values('Lap_Sec_min')
-                tabela_setorial['Tempo Volta'] = [formatar_tempo_completo(t) for t in tabela_setorial['Lap_Sec_min']]
+                tabela_setorial['Tempo Volta'] = formatadas['Lap_Sec_min']
                 colunas_mostrar.append('Tempo Volta')
 
-            st.dataframe(tabela_setorial[colunas_mostrar], hide_index=True, use_container_width=True)
+            exibir_tabela(tabela_setorial[colunas_mostrar], hide_index=True, use_container_width=True, etapa=etapa_setor)
 
             # Análise de consistência setorial
             st.subheader("📈 Análise de Consistência")
@@ -1056,112 +1153,124 @@ elif secao == "🔄 Comparação Temporal":
             dados1 = st.session_state.dados_etapas_completo[etapa1]
             dados2 = st.session_state.dados_etapas_completo[etapa2]
 
-            df1 = dados1['dataframe']
-            df2 = dados2['dataframe']
-
-            # Pilotos em comum
-            pilotos_comuns = set(df1['Nome_Piloto'].unique()) & set(df2['Nome_Piloto'].unique())
+            # Melhores voltas das duas etapas unidas por piloto, só com os pilotos em comum
+            df_comparacao = comparar_etapas(obter_agregados_etapa(dados1), obter_agregados_etapa(dados2))
 
-            if pilotos_comuns:
+            if not df_comparacao.empty:
                 st.subheader(f"🔄 {dados1['etapa']} vs {dados2['etapa']}")
 
-                # Comparação geral
-                if 'Lap_Sec' in df1.columns and 'Lap_Sec' in df2.columns:
-                    # Melhores tempos de cada etapa
-                    melhores1 = df1.dropna(subset=['Lap_Sec']).groupby('Nome_Piloto')['Lap_Sec'].min()
-                    melhores2 = df2.dropna(subset=['Lap_Sec']).groupby('Nome_Piloto')['Lap_Sec'].min()
-
-                    # Comparação para pilotos comuns
-                    comparacao_data = []
-
-                    for piloto in pilotos_comuns:
-                        if piloto in melhores1.index and piloto in melhores2.index:
-                            tempo1 = melhores1[piloto]
-                            tempo2 = melhores2[piloto]
-                            evolucao = tempo2 - tempo1
-
-                            comparacao_data.append({
-                                'Piloto': piloto,
-                                'Etapa1': tempo1,
-                                'Etapa2': tempo2,
-                                'Evolução': evolucao,
-                                'Evolução_Perc': (evolucao / tempo1) * 100,
-                                'Equipe': df1[df1['Nome_Piloto'] == piloto]['Equipe'].iloc[0],
-                                'Montadora': df1[df1['Nome_Piloto'] == piloto]['Montadora'].iloc[0]
-                            })
+                # Gráfico de evolução
+                fig_evolucao = go.Figure()
+
+                cores = ['green' if x < 0 else 'red' for x in df_comparacao['Evolução']]
 
-                    if comparacao_data:
-                        df_comparacao = pd.DataFrame(comparacao_data)
-                        df_comparacao = df_comparacao.sort_values('Evolução')
+                fig_evolucao.add_trace(go.Bar(
+                    x=df_comparacao['Piloto'],
+                    y=df_comparacao['Evolução'],
+                    marker_color=cores,
+                    text=formatar_deltas(df_comparacao['Evolução'], casas_tempo()),
+                    textposition='outside'
+                ))
 
-                        # Gráfico de evolução
-                        fig_evolucao = go.Figure()
+                fig_evolucao.update_layout(
+                    title=f'Evolução de Performance: {dados1["etapa"]} → {dados2["etapa"]}',
+                    xaxis_title='Pilotos',
+                    yaxis_title='Evolução (segundos)',
+                    height=500
+                )
 
-                        cores = ['green' if x < 0 else 'red' for x in df_comparacao['Evolução']]
+                exibir_grafico(fig_evolucao)
 
-                        fig_evolucao.add_trace(go.Bar(
-                            x=df_comparacao['Piloto'],
-                            y=df_comparacao['Evolução'],
-                            marker_color=cores,
-                            text=[f"{x:+.3f}s" for x in df_comparacao['Evolução']],
-                            textposition='outside'
-                        ))
+                # Tabela de comparação
+                st.subheader("📊 Tabela de Comparação Detalhada")
 
-                        fig_evolucao.update_layout(
-                            title=f'Evolução de Performance: {dados1["etapa"]} → {dados2["etapa"]}',
-                            xaxis_title='Pilotos',
-                            yaxis_title='Evolução (segundos)',
-                            height=500
-                        )
+                tabela_comp = df_comparacao.copy()
+                casas = casas_tempo()
+                tabela_comp['Tempo Etapa 1'] = formatar_tempos(tabela_comp['Etapa1'], casas)
+                tabela_comp['Tempo Etapa 2'] = formatar_tempos(tabela_comp['Etapa2'], casas)
+                tabela_comp['Evolução Tempo'] = formatar_deltas(tabela_comp['Evolução'], casas)
+                tabela_comp['Evolução %'] = formatar_deltas(tabela_comp['Evolução_Perc'], 2, sufixo='%')
 
-                        st.plotly_chart(fig_evolucao, use_container_width=True)
+                colunas_comp = ['Piloto', 'Equipe', 'Montadora', 'Tempo Etapa 1', 'Tempo Etapa 2', 'Evolução Tempo', 'Evolução %']
 
-                        # Tabela de comparação
-                        st.subheader("📊 Tabela de Comparação Detalhada")
+                exibir_tabela(tabela_comp[colunas_comp], hide_index=True, use_container_width=True)
 
-                        tabela_comp = df_comparacao.copy()
-                        tabela_comp['Tempo Etapa 1'] = [formatar_tempo_completo(t) for t in tabela_comp['Etapa1']]
-                        tabela_comp['Tempo Etapa 2'] = [formatar_tempo_completo(t) for t in tabela_comp['Etapa2']]
-                        tabela_comp['Evolução Tempo'] = [f"{x:+.3f}s" for x in tabela_comp['Evolução']]
-                        tabela_comp['Evolução %'] = [f"{x:+.2f}%" for x in tabela_comp['Evolução_Perc']]
+                # Estatísticas da comparação
+                st.subheader("📈 Estatísticas da Comparação")
+
+                col1, col2, col3, col4 = st.columns(4)
 
-                        colunas_comp = ['Piloto', 'Equipe', 'Montadora', 'Tempo Etapa 1', 'Tempo Etapa 2', 'Evolução Tempo', 'Evolução %']
+                with col1:
+                    melhores = len(df_comparacao[df_comparacao['Evolução'] < 0])
+                    st.metric("Pilotos que melhoraram", f"{melhores}/{len(df_comparacao)}")
 
-                        st.dataframe(tabela_comp[colunas_comp], hide_index=True, use_container_width=True)
+                with col2:
+                    melhor_evolucao = df_comparacao['Evolução'].min()
+                    st.metric("Melhor evolução", f"{melhor_evolucao:.3f}s")
 
-                        # Estatísticas da comparação
-                        st.subheader("📈 Estatísticas da Comparação")
+                with col3:
+                    pior_evolucao = df_comparacao['Evolução'].max()
+                    st.metric("Pior evolução", f"{pior_evolucao:+.3f}s")
 
-                        col1, col2, col3, col4 = st.columns(4)
+                with col4:
+                    evolucao_media = df_comparacao['Evolução'].mean()
+                    st.metric("Evolução média", f"{evolucao_media:+.3f}s")
 
-                        with col1:
-                            melhores = len(df_comparacao[df_comparacao['Evolução'] < 0])
-                            st.metric("Pilotos que melhoraram", f"{melhores}/{len(df_comparacao)}")
+                # Análise por montadora
+                st.subheader("🏭 Evolução por Montadora")
 
-                        with col2:
-                            melhor_evolucao = df_comparacao['Evolução'].min()
-                            st.metric("Melhor evolução", f"{melhor_evolucao:.3f}s")
+                evolucao_mont = df_comparacao.groupby('Montadora', observed=True).agg({
+                    'Evolução': ['mean', 'count'],
+                    'Piloto': 'count'
+                }).round(3)
 
-                        with col3:
-                            pior_evolucao = df_comparacao['Evolução'].max()
-                            st.metric("Pior evolução", f"{pior_evolucao:+.3f}s")
+                evolucao_mont.columns = ['Evolução Média', 'Total Pilotos', 'Comparações']
+                evolucao_mont = evolucao_mont.reset_index()
 
-                        with col4:
-                            evolucao_media = df_comparacao['Evolução'].mean()
-                            st.metric("Evolução média", f"{evolucao_media:+.3f}s")
+                exibir_tabela(evolucao_mont, hide_index=True)
 
-                        # Análise por montadora
-                        st.subheader("🏭 Evolução por Montadora")
+        # Várias etapas de uma vez: matriz piloto x etapa das melhores voltas
+        st.subheader("🗓️ Progressão na Temporada")
 
-                        evolucao_mont = df_comparacao.groupby('Montadora').agg({
-                            'Evolução': ['mean', 'count'],
-                            'Piloto': 'count'
-                        }).round(3)
+        etapas_matriz = st.multiselect(
+            "Etapas da progressão (na ordem escolhida):", etapas_disponiveis, default=etapas_disponiveis,
+            key="etapas_matriz_temporal"
+        )
+
+        if len(etapas_matriz) >= 2:
+            matriz = matriz_melhores_voltas({
+                chave: obter_agregados_etapa(st.session_state.dados_etapas_completo[chave]) for chave in etapas_matriz
+            })
 
-                        evolucao_mont.columns = ['Evolução Média', 'Total Pilotos', 'Comparações']
-                        evolucao_mont = evolucao_mont.reset_index()
+            progressao = progressao_pilotos(matriz)
 
-                        st.dataframe(evolucao_mont, hide_index=True)
+            casas = casas_tempo()
+            tabela_matriz = pd.DataFrame(
+                {chave: formatar_tempos(matriz[chave], casas, vazio='-') for chave in etapas_matriz},
+                index=matriz.index
+            ).loc[progressao.index]
+            tabela_matriz['Etapas'] = progressao['Etapas']
+            tabela_matriz['Evolução'] = formatar_deltas(progressao['Evolução'].where(progressao['Etapas'] > 1), casas, vazio='-')
+
+            exibir_tabela(tabela_matriz.reset_index(), hide_index=True, use_container_width=True)
+
+            pilotos_grafico = st.multiselect(
+                "Pilotos no gráfico:", list(progressao.index), default=list(progressao.index[:5]),
+                key="pilotos_matriz_temporal"
+            )
+
+            if pilotos_grafico:
+                fig_progressao = px.line(
+                    matriz.loc[pilotos_grafico].T.rename_axis('Etapa').reset_index().melt(
+                        id_vars='Etapa', var_name='Piloto', value_name='Melhor Volta'
+                    ).dropna(),
+                    x='Etapa',
+                    y='Melhor Volta',
+                    color='Piloto',
+                    markers=True,
+                    title='Melhor volta por etapa'
+                )
+                exibir_grafico(fig_progressao)
 
 elif secao == "📈 Rankings Completos":
     st.header("📈 Rankings Completos")
@@ -1186,122 +1295,60 @@ elif secao == "📈 Rankings Completos":
 
             if 'Lap_Sec' in df.columns:
                 # Ranking da etapa
-                ranking_etapa = df.dropna(subset=['Lap_Sec']).groupby('Nome_Piloto').agg({
-                    'Lap_Sec': 'min',
-                    'Speed_Kmh': 'max',
-                    'Speed_Trap_Kmh': 'max',
-                    'Equipe': 'first',
-                    'Montadora': 'first',
-                    'Numero_Oficial': 'first'
-                }).reset_index()
-
-                ranking_etapa = ranking_etapa.sort_values('Lap_Sec')
-                ranking_etapa['Posição'] = range(1, len(ranking_etapa) + 1)
+                ranking_etapa = obter_agregados_etapa(dados_etapa)['classificacao'].rename(columns={'Posicao': 'Posição'})
 
                 # Adicionar pontos se for corrida
                 if dados_etapa['info_sessao']['pontos']:
                     ranking_etapa['Pontos'] = ranking_etapa['Posição'].apply(calcular_pontos_campeonato)
 
                 # Gráfico do ranking
-                fig_ranking = go.Figure()
-
-                cores_posicao = ['#FFD700' if i == 1 else '#C0C0C0' if i == 2 else '#CD7F32' if i == 3 else '#4682B4' 
-                               for i in ranking_etapa['Posição']]
-
-                fig_ranking.add_trace(go.Bar(
-                    x=ranking_etapa['Nome_Piloto'],
-                    y=ranking_etapa['Lap_Sec'],
-                    marker_color=cores_posicao,
-                    text=[f"{i}º" for i in ranking_etapa['Posição']],
-                    textposition='outside'
-                ))
-
-                fig_ranking.update_layout(
-                    title=f'🏆 Ranking - {dados_etapa["etapa"]} - {dados_etapa["sessao"]}',
-                    xaxis_title='Pilotos',
-                    yaxis_title='Tempo (segundos)',
-                    height=600
-                )
+                def montar_ranking():
+                    fig_ranking = go.Figure()
+
+                    cores_posicao = ['#FFD700' if i == 1 else '#C0C0C0' if i == 2 else '#CD7F32' if i == 3 else '#4682B4'
+                                     for i in ranking_etapa['Posição']]
+
+                    fig_ranking.add_trace(go.Bar(
+                        x=ranking_etapa['Nome_Piloto'],
+                        y=ranking_etapa['Lap_Sec'],
+                        marker_color=cores_posicao,
+                        text=[f"{i}º" for i in ranking_etapa['Posição']],
+                        textposition='outside'
+                    ))
+
+                    fig_ranking.update_layout(
+                        title=f'🏆 Ranking - {dados_etapa["etapa"]} - {dados_etapa["sessao"]}',
+                        xaxis_title='Pilotos',
+                        yaxis_title='Tempo (segundos)',
+                        height=600
+                    )
+                    return fig_ranking
 
-                st.plotly_chart(fig_ranking, use_container_width=True)
+                exibir_grafico_cache('ranking_etapa', montar_ranking, etapa_ranking, dados_etapa)
 
                 # Tabela do ranking
                 tabela_ranking = ranking_etapa.copy()
-                tabela_ranking['Tempo'] = [formatar_tempo_completo(t) for t in tabela_ranking['Lap_Sec']]
-                tabela_ranking['Vel. Máx'] = [f"{v:.1f}" if pd.notna(v) else "N/A" for v in tabela_ranking['Speed_Kmh']]
-                tabela_ranking['Speed Trap'] = [f"{v:.1f}" if pd.notna(v) else "N/A" for v in tabela_ranking['Speed_Trap_Kmh']]
+                formatadas = tabela_formatada(obter_agregados_etapa(dados_etapa), 'classificacao', casas_tempo())
+                tabela_ranking['Tempo'] = formatadas['Lap_Sec']
+                tabela_ranking['Vel. Máx'] = formatadas['Speed_Kmh']
+                tabela_ranking['Speed Trap'] = formatadas['Speed_Trap_Kmh']
 
                 colunas_ranking = ['Posição', 'Numero_Oficial', 'Nome_Piloto', 'Equipe', 'Montadora', 'Tempo', 'Vel. Máx', 'Speed Trap']
 
                 if dados_etapa['info_sessao']['pontos']:
                     colunas_ranking.insert(-3, 'Pontos')
 
-                st.dataframe(tabela_ranking[colunas_ranking], hide_index=True, use_container_width=True)
+                exibir_tabela(tabela_ranking[colunas_ranking], hide_index=True, use_container_width=True, etapa=etapa_ranking)
 
         elif tipo_ranking == "🏆 Campeonato Geral":
             st.subheader("🏆 Ranking de Campeonato")
 
-            # Consolidar pontos de todas as etapas que são corridas
-            pontos_campeonato = {}
-            etapas_pontuacao = []
-
-            for chave, dados in st.session_state.dados_etapas_completo.items():
-                if dados['info_sessao']['pontos'] and 'Lap_Sec' in dados['dataframe'].columns:
-                    df = dados['dataframe']
-
-                    # Ranking da etapa
-                    ranking = df.dropna(subset=['Lap_Sec']).groupby('Nome_Piloto').agg({
-                        'Lap_Sec': 'min',
-                        'Equipe': 'first',
-                        'Montadora': 'first'
-                    }).reset_index()
-
-                    ranking = ranking.sort_values('Lap_Sec')
-                    ranking['Posição'] = range(1, len(ranking) + 1)
-                    ranking['Pontos'] = ranking['Posição'].apply(calcular_pontos_campeonato)
-
-                    # Acumular pontos
-                    for _, row in ranking.iterrows():
-                        piloto = row['Nome_Piloto']
-                        if piloto not in pontos_campeonato:
-                            pontos_campeonato[piloto] = {
-                                'pontos_total': 0,
-                                'equipe': row['Equipe'],
-                                'montadora': row['Montadora'],
-                                'vitorias': 0,
-                                'podios': 0,
-                                'etapas': 0
-                            }
-
-                        pontos_campeonato[piloto]['pontos_total'] += row['Pontos']
-                        pontos_campeonato[piloto]['etapas'] += 1
-
-                        if row['Posição'] == 1:
-                            pontos_campeonato[piloto]['vitorias'] += 1
-                        if row['Posição'] <= 3:
-                            pontos_campeonato[piloto]['podios'] += 1
-
-                    etapas_pontuacao.append(dados['etapa'])
-
-            if pontos_campeonato:
-                # Criar dataframe do campeonato
-                dados_campeonato = []
-                for piloto, stats in pontos_campeonato.items():
-                    dados_campeonato.append({
-                        'Piloto': piloto,
-                        'Pontos': stats['pontos_total'],
-                        'Equipe': stats['equipe'],
-                        'Montadora': stats['montadora'],
-                        'Vitórias': stats['vitorias'],
-                        'Pódios': stats['podios'],
-                        'Etapas': stats['etapas'],
-                        'Média': stats['pontos_total'] / stats['etapas'] if stats['etapas'] > 0 else 0
-                    })
-
-                df_campeonato = pd.DataFrame(dados_campeonato)
-                df_campeonato = df_campeonato.sort_values('Pontos', ascending=False)
-                df_campeonato['Posição'] = range(1, len(df_campeonato) + 1)
+            # Classificação mantida incrementalmente a cada importação ou remoção de etapa
+            campeonato = obter_campeonato()
+            df_campeonato = campeonato.tabela()
+            etapas_pontuacao = campeonato.etapas_computadas
 
+            if not df_campeonato.empty:
                 # Gráfico do campeonato
                 fig_campeonato = go.Figure()
 
@@ -1323,10 +1370,10 @@ elif secao == "📈 Rankings Completos":
                     height=600
                 )
 
-                st.plotly_chart(fig_campeonato, use_container_width=True)
+                exibir_grafico(fig_campeonato)
 
                 # Tabela do campeonato
-                st.dataframe(df_campeonato, hide_index=True, use_container_width=True)
+                exibir_tabela(df_campeonato, hide_index=True, use_container_width=True)
 
                 # Estatísticas do campeonato
                 st.subheader("📊 Estatísticas do Campeonato")
@@ -1376,13 +1423,14 @@ elif secao == "🎯 Sistema de Referências":
 
                 dados_etapa = st.session_state.dados_etapas_completo[etapa_ref]
                 df = dados_etapa['dataframe']
+                agregados_ref = obter_agregados_etapa(dados_etapa)
 
                 if 'Nome_Piloto' in df.columns:
-                    piloto_ref = st.selectbox("Piloto de referência:", df['Nome_Piloto'].unique())
+                    piloto_ref = st.selectbox("Piloto de referência:", list(agregados_ref['indice_pilotos']))
                     nome_ref = st.text_input("Nome da referência:", f"{piloto_ref}_{dados_etapa['etapa']}")
 
                     if st.button("💾 Salvar Referência dos Dados"):
-                        dados_piloto = df[df['Nome_Piloto'] == piloto_ref]
+                        dados_piloto = voltas_piloto(agregados_ref, piloto_ref)
 
                         if not dados_piloto.empty:
                             referencia = {
@@ -1474,11 +1522,11 @@ elif secao == "🎯 Sistema de Referências":
 
                     with col2:
                         if 'volta_referencia' in dados_ref:
-                            st.write(f"**Volta:** {formatar_tempo_completo(dados_ref['volta_referencia'])}")
+                            st.write(f"**Volta:** {formatar_tempo(dados_ref['volta_referencia'])}")
 
                         for i in range(1, 4):
                             if f'setor{i}_referencia' in dados_ref:
-                                st.write(f"**S{i}:** {formatar_tempo_completo(dados_ref[f'setor{i}_referencia'])}")
+                                st.write(f"**S{i}:** {formatar_tempo(dados_ref[f'setor{i}_referencia'])}")
 
                         if 'speed_trap_referencia' in dados_ref:
                             st.write(f"**Speed trap:** {dados_ref['speed_trap_referencia']:.1f} km/h")
@@ -1486,7 +1534,7 @@ elif secao == "🎯 Sistema de Referências":
                     if st.button(f"🗑️ Remover {nome_ref}", key=f"remove_{nome_ref}"):
                         del st.session_state.dados_referencia_completo[nome_ref]
                         st.success(f"Referência '{nome_ref}' removida!")
-                        st.experimental_rerun()
+                        st.rerun()
 
         else:
             st.info("💡 Nenhuma referência criada ainda")
@@ -1506,13 +1554,8 @@ elif secao == "📋 Relatórios Executivos":
         )
 
         if tipo_relatorio == "👤 Relatório Individual de Piloto":
-            # Consolidar todos os pilotos
-            todos_pilotos = set()
-            for dados in st.session_state.dados_etapas_completo.values():
-                if 'Nome_Piloto' in dados['dataframe'].columns:
-                    todos_pilotos.update(dados['dataframe']['Nome_Piloto'].unique())
-
-            piloto_relatorio = st.selectbox("Selecione o piloto:", sorted(todos_pilotos))
+            # Pilotos de todas as etapas, direto da tabela de fatos da temporada
+            piloto_relatorio = st.selectbox("Selecione o piloto:", obter_fatos_temporada().pilotos())
 
             if st.button("📋 Gerar Relatório do Piloto"):
                 st.subheader(f"📊 Relatório Completo - {piloto_relatorio}")
@@ -1530,27 +1573,15 @@ elif secao == "📋 Relatórios Executivos":
                     with col3:
                         st.write(f"**Número:** #{info_piloto['Numero']}")
 
-                # Análise por etapa
-                dados_piloto_completo = []
+                # Análise por etapa: uma linha da tabela de fatos por etapa disputada
+                fatos_piloto = obter_fatos_temporada().piloto(piloto_relatorio)
 
-                for chave_etapa, dados_etapa in st.session_state.dados_etapas_completo.items():
-                    df = dados_etapa['dataframe']
-
-                    if piloto_relatorio in df['Nome_Piloto'].values:
-                        relatorio_etapa = gerar_relatorio_completo_piloto(df, piloto_relatorio)
-
-                        if relatorio_etapa:
-                            relatorio_etapa['etapa'] = dados_etapa['etapa']
-                            relatorio_etapa['sessao'] = dados_etapa['sessao']
-                            relatorio_etapa['pista'] = dados_etapa['pista']
-                            dados_piloto_completo.append(relatorio_etapa)
-
-                if dados_piloto_completo:
+                if not fatos_piloto.empty:
                     # Resumo geral
                     st.subheader("📊 Resumo Geral")
 
-                    total_etapas = len(dados_piloto_completo)
-                    total_voltas = sum(d['total_voltas'] for d in dados_piloto_completo)
+                    total_etapas = len(fatos_piloto)
+                    total_voltas = int(fatos_piloto['total_voltas'].sum())
 
                     col1, col2, col3, col4 = st.columns(4)
 
@@ -1561,22 +1592,20 @@ elif secao == "📋 Relatórios Executivos":
                         st.metric("Total de Voltas", total_voltas)
 
                     with col3:
-                        melhores_voltas = [d['melhor_volta'] for d in dados_piloto_completo if 'melhor_volta' in d]
-                        if melhores_voltas:
-                            melhor_absoluto = min(melhores_voltas)
-                            st.metric("Melhor Volta Absoluta", formatar_tempo_completo(melhor_absoluto))
+                        if 'melhor_volta' in fatos_piloto.columns and fatos_piloto['melhor_volta'].notna().any():
+                            melhor_absoluto = fatos_piloto['melhor_volta'].min()
+                            st.metric("Melhor Volta Absoluta", formatar_tempo(melhor_absoluto))
 
                     with col4:
-                        velocidades_max = [d['velocidade_maxima'] for d in dados_piloto_completo if 'velocidade_maxima' in d]
-                        if velocidades_max:
-                            vel_max_absoluta = max(velocidades_max)
+                        if 'velocidade_maxima' in fatos_piloto.columns and fatos_piloto['velocidade_maxima'].notna().any():
+                            vel_max_absoluta = fatos_piloto['velocidade_maxima'].max()
                             st.metric("Velocidade Máxima", f"{vel_max_absoluta:.1f} km/h")
 
                     # Evolução por etapa
-                    if len(dados_piloto_completo) > 1:
+                    if len(fatos_piloto) > 1:
                         st.subheader("📈 Evolução por Etapa")
 
-                        df_evolucao = pd.DataFrame(dados_piloto_completo)
+                        df_evolucao = fatos_piloto
 
                         if 'melhor_volta' in df_evolucao.columns:
                             fig_evolucao = px.line(
@@ -1587,22 +1616,81 @@ elif secao == "📋 Relatórios Executivos":
                                 markers=True
                             )
 
-                            st.plotly_chart(fig_evolucao, use_container_width=True)
+                            exibir_grafico(fig_evolucao)
+
+                    # Todas as voltas do piloto na temporada, lidas pelo índice de cada etapa
+                    voltas_temporada = voltas_piloto_temporada(
+                        st.session_state.dados_etapas_completo, piloto_relatorio, ['Lap_Number', 'Lap_Sec', 'Tipo_Volta']
+                    )
+
+                    if 'Lap_Sec' in voltas_temporada.columns and voltas_temporada['Lap_Sec'].notna().any():
+                        st.subheader("⏱️ Voltas na Temporada")
+
+                        fig_voltas = figura_series_voltas(
+                            voltas_temporada, 'Lap_Number', 'Lap_Sec', cor='Etapa',
+                            titulo=f'Tempos de volta - {piloto_relatorio}',
+                            rotulos={'Lap_Number': 'Volta', 'Lap_Sec': 'Tempo (s)'},
+                            limite_pontos=pontos_por_serie(), simbolo='Tipo_Volta'
+                        )
+
+                        exibir_grafico(fig_voltas)
+
+                    # Stints das corridas, segmentados na importação
+                    stints_temporada = stints_piloto_temporada(st.session_state.dados_etapas_completo, piloto_relatorio)
+
+                    if not stints_temporada.empty:
+                        st.subheader("🛞 Stints nas Corridas")
+
+                        tabela_stints = stints_temporada.assign(**{
+                            'Melhor Volta': formatar_tempos(stints_temporada['melhor_volta'], casas_tempo()),
+                            'Ritmo Médio': formatar_tempos(stints_temporada['tempo_medio'], casas_tempo()),
+                        }).rename(columns={'voltas': 'Voltas', 'voltas_ritmo': 'Voltas de Ritmo',
+                                           'primeira_volta': 'Da Volta', 'ultima_volta': 'Até a Volta'})
+
+                        colunas_stints = [coluna for coluna in ['Etapa', 'Stint', 'Da Volta', 'Até a Volta', 'Voltas',
+                                                                'Voltas de Ritmo', 'Melhor Volta', 'Ritmo Médio']
+                                          if coluna in tabela_stints.columns]
+                        exibir_tabela(tabela_stints[colunas_stints], hide_index=True, use_container_width=True)
+
+                    # Ritmo em janela móvel e degradação por stint, calculados uma vez por etapa
+                    ritmo_voltas, ritmo_stints = ritmo_piloto_temporada(st.session_state.dados_etapas_completo, piloto_relatorio)
+
+                    if 'Lap_Media_Movel' in ritmo_voltas.columns and ritmo_voltas['Lap_Media_Movel'].notna().any():
+                        st.subheader("📉 Ritmo e Degradação")
+
+                        fig_ritmo = figura_series_voltas(
+                            ritmo_voltas, 'Lap_Number', 'Lap_Media_Movel', cor='Etapa',
+                            titulo=f'Média móvel de {JANELA_RITMO} voltas - {piloto_relatorio}',
+                            rotulos={'Lap_Number': 'Volta', 'Lap_Media_Movel': 'Tempo médio (s)'},
+                            limite_pontos=pontos_por_serie(), modo='lines', erro='Lap_Desvio_Movel', separar='Stint'
+                        )
+
+                        exibir_grafico(fig_ritmo)
+
+                        if 'degradacao_Lap' in ritmo_stints.columns:
+                            tabela_ritmo = pd.DataFrame({
+                                'Etapa': ritmo_stints['Etapa'],
+                                'Stint': ritmo_stints['Stint'],
+                                'Voltas de Ritmo': ritmo_stints['voltas_ritmo'],
+                                'Degradação (s/volta)': formatar_deltas(ritmo_stints['degradacao_Lap'], casas_tempo()),
+                                'Consistência': formatar_tempos(ritmo_stints['consistencia_Lap'], casas_tempo()),
+                            })
+                            exibir_tabela(tabela_ritmo, hide_index=True, use_container_width=True)
 
                     # Tabela detalhada por etapa
                     st.subheader("📋 Detalhamento por Etapa")
 
-                    tabela_piloto = pd.DataFrame(dados_piloto_completo)
+                    tabela_piloto = fatos_piloto.copy()
 
                     # Formatar colunas
                     if 'melhor_volta' in tabela_piloto.columns:
-                        tabela_piloto['Melhor Volta'] = [formatar_tempo_completo(t) for t in tabela_piloto['melhor_volta']]
+                        tabela_piloto['Melhor Volta'] = formatar_tempos(tabela_piloto['melhor_volta'], casas_tempo())
 
                     if 'velocidade_maxima' in tabela_piloto.columns:
-                        tabela_piloto['Vel. Máxima'] = [f"{v:.1f} km/h" for v in tabela_piloto['velocidade_maxima']]
+                        tabela_piloto['Vel. Máxima'] = formatar_velocidades(tabela_piloto['velocidade_maxima'])
 
                     if 'consistencia' in tabela_piloto.columns:
-                        tabela_piloto['Consistência'] = [f"{c:.3f}s" for c in tabela_piloto['consistencia']]
+                        tabela_piloto['Consistência'] = formatar_tempos(tabela_piloto['consistencia'], casas_tempo())
 
                     colunas_mostrar = ['etapa', 'sessao', 'pista', 'total_voltas']
 
@@ -1613,11 +1701,92 @@ elif secao == "📋 Relatórios Executivos":
                     if 'Consistência' in tabela_piloto.columns:
                         colunas_mostrar.append('Consistência')
 
-                    st.dataframe(tabela_piloto[colunas_mostrar], hide_index=True, use_container_width=True)
+                    exibir_tabela(tabela_piloto[colunas_mostrar], hide_index=True, use_container_width=True)
 
                 else:
                     st.info(f"💡 Nenhum dado encontrado para {piloto_relatorio}")
 
+        elif tipo_relatorio in ("🏭 Relatório por Montadora", "👥 Relatório por Equipe"):
+            coluna_grupo, nome_grupo = (
+                ('montadora', 'Montadora') if tipo_relatorio == "🏭 Relatório por Montadora" else ('equipe', 'Equipe')
+            )
+
+            # Resumo da temporada respondido pela tabela de fatos, sem reler as voltas
+            fatos = obter_fatos_temporada()
+            resumo = fatos.resumo_por(coluna_grupo)
+            if 'melhor_volta' in resumo.columns:
+                resumo = resumo.sort_values('melhor_volta', kind='stable').reset_index(drop=True)
+
+            if resumo.empty:
+                st.info("💡 Nenhum dado disponível para o relatório")
+            else:
+                st.subheader(f"📊 Temporada por {nome_grupo}")
+                casas = casas_tempo()
+
+                col1, col2, col3 = st.columns(3)
+
+                with col1:
+                    st.metric(f"{nome_grupo}s", len(resumo))
+
+                with col2:
+                    st.metric("Etapas", len(fatos))
+
+                if 'melhor_volta' in resumo.columns and resumo['melhor_volta'].notna().any():
+                    with col3:
+                        melhor_grupo = resumo.loc[resumo['melhor_volta'].idxmin()]
+                        st.metric("Melhor volta", formatar_tempo(melhor_grupo['melhor_volta']), melhor_grupo[coluna_grupo], delta_color="off")
+
+                tabela_grupo = pd.DataFrame({
+                    nome_grupo: resumo[coluna_grupo],
+                    'Pilotos': resumo['pilotos'],
+                    'Etapas': resumo['etapas'],
+                    'Voltas': resumo['total_voltas'],
+                })
+                if 'melhor_volta' in resumo.columns:
+                    tabela_grupo['Melhor Volta'] = formatar_tempos(resumo['melhor_volta'], casas)
+                    tabela_grupo['Tempo Médio'] = formatar_tempos(resumo['tempo_medio'], casas)
+                    tabela_grupo['Consistência'] = formatar_tempos(resumo['consistencia'], casas)
+                if 'velocidade_maxima' in resumo.columns:
+                    tabela_grupo['Vel. Máxima'] = formatar_velocidades(resumo['velocidade_maxima'])
+                if 'speed_trap_max' in resumo.columns:
+                    tabela_grupo['Speed Trap'] = formatar_velocidades(resumo['speed_trap_max'])
+
+                exibir_tabela(tabela_grupo, hide_index=True, use_container_width=True)
+
+                # Melhor volta de cada grupo etapa a etapa
+                melhores_etapa = fatos.melhores_por_etapa(coluna_grupo)
+
+                if melhores_etapa.shape[1] > 1:
+                    fig_grupos = px.line(
+                        melhores_etapa.T.rename_axis('Etapa').reset_index().melt(
+                            id_vars='Etapa', var_name=nome_grupo, value_name='Melhor Volta'
+                        ).dropna(),
+                        x='Etapa',
+                        y='Melhor Volta',
+                        color=nome_grupo,
+                        markers=True,
+                        title=f'Melhor volta por etapa - {nome_grupo}s'
+                    )
+                    exibir_grafico(fig_grupos)
+
+                # Pilotos de um grupo
+                grupo_selecionado = st.selectbox(f"Detalhar {nome_grupo.lower()}:", list(resumo[coluna_grupo]))
+                fatos_grupo = fatos.tabela()
+                fatos_grupo = fatos_grupo[fatos_grupo[coluna_grupo] == grupo_selecionado]
+
+                pilotos_grupo = fatos_grupo.groupby('piloto').agg(
+                    Etapas=('chave', 'nunique'),
+                    Voltas=('total_voltas', 'sum'),
+                    **({'melhor_volta': ('melhor_volta', 'min')} if 'melhor_volta' in fatos_grupo.columns else {})
+                ).reset_index().rename(columns={'piloto': 'Piloto'})
+
+                if 'melhor_volta' in pilotos_grupo.columns:
+                    pilotos_grupo = pilotos_grupo.sort_values('melhor_volta', kind='stable')
+                    pilotos_grupo['Melhor Volta'] = formatar_tempos(pilotos_grupo['melhor_volta'], casas)
+                    pilotos_grupo = pilotos_grupo.drop(columns='melhor_volta')
+
+                exibir_tabela(pilotos_grupo, hide_index=True, use_container_width=True)
+
 elif secao == "📤 Exportar Dados":
     st.header("📤 Exportação de Dados")
 
@@ -1639,6 +1808,12 @@ elif secao == "📤 Exportar Dados":
         incluir_originais = st.checkbox("Incluir dados originais do Chronon", value=True)
 
         if st.button("📥 Preparar Download"):
+            # Colunas brutas do Chronon que ficaram só em disco voltam para a exportação
+            if incluir_originais and armazenamento_disponivel() and 'Lap Tm' not in df.columns:
+                df_completo = carregar_etapa_completa(etapa_exportar)
+                if df_completo is not None:
+                    df = df_completo
+
             # Preparar dados para exportação
             df_export = df.copy()
 
@@ -1676,7 +1851,7 @@ elif secao == "📤 Exportar Dados":
 
             # Preview dos dados
             st.subheader("👀 Preview dos dados a exportar")
-            st.dataframe(df_export.head(10), use_container_width=True)
+            exibir_tabela(df_export.head(10), use_container_width=True, etapa=etapa_exportar)
             st.write(f"**Total de registros:** {len(df_export)} | **Colunas:** {len(df_export.columns)}")
 
 elif secao == "⚙️ Configurações Avançadas":
@@ -1698,12 +1873,19 @@ elif secao == "⚙️ Configurações Avançadas":
 
         mostrar_animacoes = st.checkbox("Mostrar animações nos gráficos", value=True)
 
+        # Gráficos volta a volta são reduzidos no servidor a este número de pontos por série
+        pontos_serie = st.slider(
+            "Pontos por série nos gráficos de voltas:", 200, 5000, pontos_por_serie(), step=100,
+            help="Séries maiores são reduzidas (LTTB) antes de ir ao navegador, que desenha em WebGL"
+        )
+
         # Salvar configurações
         if st.button("💾 Salvar Configurações de Interface"):
             st.session_state.configuracoes_usuario.update({
                 'tema_cores': tema_cores,
                 'altura_graficos': altura_graficos,
-                'mostrar_animacoes': mostrar_animacoes
+                'mostrar_animacoes': mostrar_animacoes,
+                'pontos_por_serie': pontos_serie
             })
             st.success("✅ Configurações salvas!")
 
@@ -1716,15 +1898,28 @@ elif secao == "⚙️ Configurações Avançadas":
         # Configurações de precisão
         precisao_tempo = st.selectbox("Precisão de tempo:", ["Milissegundos (0.001s)", "Centésimos (0.01s)", "Décimos (0.1s)"], index=0)
 
+        # Colunas brutas do Chronon na memória da sessão
+        manter_colunas_brutas = st.checkbox(
+            "Manter colunas brutas do Chronon em memória",
+            value=st.session_state.configuracoes_usuario.get('manter_colunas_brutas', False),
+            help="Desmarcado, os textos originais (Lap Tm, S1 Tm, SPT...) ficam só no armazenamento local e são lidos na exportação"
+        )
+
         # Configurações de cache
-        tamanho_cache = st.slider("Tamanho do cache (MB):", 50, 500, 100)
+        tamanho_cache = st.slider(
+            "Tamanho do cache (MB):", 50, 500,
+            st.session_state.configuracoes_usuario.get('tamanho_cache', TAMANHO_CACHE_PADRAO_MB),
+            help="Limite do cache de importação, em memória e em disco"
+        )
 
         if st.button("💾 Salvar Configurações de Dados"):
             st.session_state.configuracoes_usuario.update({
                 'validacao_rigorosa': validacao_rigorosa,
                 'precisao_tempo': precisao_tempo,
-                'tamanho_cache': tamanho_cache
+                'tamanho_cache': tamanho_cache,
+                'manter_colunas_brutas': manter_colunas_brutas
             })
+            obter_cache_importacao(tamanho_cache)
             st.success("✅ Configurações de dados salvas!")
 
     with tab3:
@@ -1739,10 +1934,48 @@ elif secao == "⚙️ Configurações Avançadas":
         if st.button("🧹 Limpar todos os dados", type="secondary"):
             if st.button("⚠️ CONFIRMAR LIMPEZA (não pode ser desfeita)"):
                 st.session_state.dados_etapas_completo.clear()
+                st.session_state.pop('campeonato', None)
+                st.session_state.pop('fatos_temporada', None)
+                if armazenamento_disponivel():
+                    limpar_armazenamento()
+                obter_cache_importacao().limpar()
+                obter_cache_figuras().limpar()
                 st.session_state.dados_referencia_completo.clear()
                 st.session_state.historico_analises.clear()
                 st.success("✅ Todos os dados foram limpos!")
-                st.experimental_rerun()
+                st.rerun()
+
+        # Etapas salvas localmente
+        st.subheader("💾 Armazenamento Local")
+
+        if not armazenamento_disponivel():
+            st.info("💡 Instale o pacote pyarrow para salvar as etapas importadas em disco")
+        elif st.session_state.dados_etapas_completo:
+            st.write(f"**Diretório:** {DIRETORIO_ARMAZENAMENTO}")
+
+            for chave_salva in list(st.session_state.dados_etapas_completo.keys()):
+                col1, col2 = st.columns([4, 1])
+
+                with col1:
+                    st.write(f"🏁 {chave_salva}")
+
+                with col2:
+                    if st.button("🗑️ Remover", key=f"remover_etapa_{chave_salva}"):
+                        remover_etapa(chave_salva)
+                        st.success(f"Etapa '{chave_salva}' removida!")
+                        st.rerun()
+        else:
+            st.info("💡 Nenhuma etapa salva ainda")
+
+        # Aba de diagnóstico, escondida por padrão
+        diagnostico_marcado = st.checkbox(
+            "🩺 Modo diagnóstico",
+            value=modo_diagnostico,
+            help="Mostra a seção de diagnóstico com os tempos de cada rerun e grava as métricas em arquivo"
+        )
+        if diagnostico_marcado != modo_diagnostico:
+            st.session_state.configuracoes_usuario['modo_diagnostico'] = diagnostico_marcado
+            st.rerun()
 
         # Reset configurações
         if st.button("🔄 Reset Configurações"):
@@ -1753,18 +1986,65 @@ elif secao == "⚙️ Configurações Avançadas":
         st.subheader("📊 Estatísticas do Sistema")
 
         if st.session_state.dados_etapas_completo:
-            total_registros = sum(len(dados['dataframe']) for dados in st.session_state.dados_etapas_completo.values())
+            total_registros = sum(metadados_voltas(dados)['total_voltas'] for dados in st.session_state.dados_etapas_completo.values())
             st.write(f"**Total de registros:** {total_registros:,}")
 
             todos_pilotos = set()
             for dados in st.session_state.dados_etapas_completo.values():
-                if 'Nome_Piloto' in dados['dataframe'].columns:
-                    todos_pilotos.update(dados['dataframe']['Nome_Piloto'].unique())
+                todos_pilotos.update(metadados_voltas(dados)['pilotos'])
 
             st.write(f"**Pilotos únicos:** {len(todos_pilotos)}")
             st.write(f"**Etapas carregadas:** {len(st.session_state.dados_etapas_completo)}")
             st.write(f"**Referências:** {len(st.session_state.dados_referencia_completo)}")
 
+elif secao == "🩺 Diagnóstico":
+    st.header("🩺 Diagnóstico de Performance")
+
+    if not instrumentacao.execucoes:
+        st.info("💡 Navegue pelas seções para registrar as primeiras medições")
+    else:
+        execucoes = instrumentacao.tabela_execucoes()
+        estagios = instrumentacao.tabela_estagios()
+
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.metric("Reruns medidos", len(execucoes))
+
+        with col2:
+            st.metric("Último rerun", f"{execucoes['Tempo total (ms)'].iloc[-1]:.0f} ms")
+
+        with col3:
+            memoria = execucoes['Memória do processo (MB)'].iloc[-1]
+            st.metric("Memória do processo", "N/A" if pd.isna(memoria) else f"{memoria:.0f} MB")
+
+        st.subheader("⏱️ Reruns")
+        st.dataframe(execucoes.iloc[::-1], hide_index=True, use_container_width=True)
+
+        if not estagios.empty:
+            st.subheader("🔥 Estágios mais lentos")
+            secoes_medidas = ["Todas"] + sorted(estagios['Seção'].unique())
+            secao_filtro = st.selectbox("Seção:", secoes_medidas, key="diagnostico_secao")
+            if secao_filtro != "Todas":
+                estagios = estagios[estagios['Seção'] == secao_filtro]
+
+            resumo = estagios.groupby(['Seção', 'Estágio', 'Etapa'], sort=False).agg(
+                Medicoes=('Tempo (ms)', 'size'),
+                Tempo_Medio_ms=('Tempo (ms)', 'mean'),
+                Tempo_Max_ms=('Tempo (ms)', 'max'),
+                Linhas=('Linhas', 'max'),
+                Memoria_KB=('Memória (KB)', 'max')
+            ).reset_index().sort_values('Tempo_Max_ms', ascending=False)
+            st.dataframe(resumo, hide_index=True, use_container_width=True)
+
+            st.subheader("📋 Todas as medições")
+            st.dataframe(estagios.iloc[::-1], hide_index=True, use_container_width=True)
+
+    st.write(f"**Arquivo de métricas:** {ARQUIVO_METRICAS}")
+    if st.button("🧹 Limpar medições"):
+        instrumentacao.execucoes.clear()
+        st.rerun()
+
 # Footer completo
 st.markdown("---")
 st.markdown(
@@ -1780,10 +2060,18 @@ st.markdown(
 
 # Status do sistema no footer
 if st.session_state.dados_etapas_completo:
-    total_voltas = sum(len(dados['dataframe']) for dados in st.session_state.dados_etapas_completo.values())
+    # Contagens pelos metadados, sem ler as voltas das etapas salvas
+    total_voltas = sum(metadados_voltas(dados)['total_voltas'] for dados in st.session_state.dados_etapas_completo.values())
     todos_pilotos = set()
     for dados in st.session_state.dados_etapas_completo.values():
-        if 'Nome_Piloto' in dados['dataframe'].columns:
-            todos_pilotos.update(dados['dataframe']['Nome_Piloto'].unique())
+        todos_pilotos.update(metadados_voltas(dados)['pilotos'])
 
     st.markdown(f"*📊 Sistema carregado com {len(st.session_state.dados_etapas_completo)} etapas • {total_voltas} voltas • {len(todos_pilotos)} pilotos únicos*")
+
+# Fecha as medições do rerun; no modo diagnóstico elas também vão para o arquivo de métricas
+instrumentacao.finalizar_execucao()
+if modo_diagnostico:
+    try:
+        instrumentacao.gravar_metricas(ARQUIVO_METRICAS)
+    except OSError:
+        pass
@@ -0,0 +1,93 @@
+import argparse
+import sys
+from pathlib import Path
+
+from chronon_agregados import obter_agregados_etapa
+from chronon_armazenamento import armazenamento_disponivel, salvar_etapa
+from chronon_diagnostico import Instrumentacao, ativar_instrumentacao, medir
+from stock_car_engine import (
+    PISTAS_OFICIAIS_COMPLETAS, TEMPORADAS_DISPONIVEIS, importar_arquivos_chronon, ler_diretorio_chronon,
+    classificacao_campeonato, relatorios_pilotos
+)
+
+
+def nome_arquivo_saida(texto):
+    """Nome de arquivo seguro a partir da chave da etapa"""
+    return ''.join(c if c.isalnum() or c in '-_' else '_' for c in texto).strip('_')
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        description="Processa um diretório de CSVs do Chronon (ou ZIPs) em classificações, tabelas setoriais, "
+                    "campeonato e relatórios por piloto, sem abrir o Streamlit."
+    )
+    parser.add_argument('diretorio', type=Path, help="Diretório com os CSVs/ZIPs exportados do Chronon")
+    parser.add_argument('--etapa', required=True, help="Nome da etapa (ex: '#3 Interlagos')")
+    parser.add_argument('--temporada', default=TEMPORADAS_DISPONIVEIS[-1], choices=TEMPORADAS_DISPONIVEIS,
+                        help="Temporada usada quando não identificada no cabeçalho dos pilotos")
+    parser.add_argument('--pista', default=next(iter(PISTAS_OFICIAIS_COMPLETAS)), choices=list(PISTAS_OFICIAIS_COMPLETAS),
+                        help="Pista usada quando não identificada no nome do arquivo")
+    parser.add_argument('--saida', type=Path, default=Path('resultados_chronon'), help="Diretório dos CSVs gerados")
+    parser.add_argument('--processos', type=int, default=None, help="Número de processos (padrão: todos os núcleos)")
+    parser.add_argument('--armazenar', action='store_true',
+                        help="Grava as etapas no armazenamento local para abri-las depois no app")
+    parser.add_argument('--metricas', type=Path,
+                        help="Grava os tempos de cada estágio neste arquivo, no formato texto do Prometheus")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+
+    if not args.diretorio.is_dir():
+        print(f"❌ Diretório não encontrado: {args.diretorio}", file=sys.stderr)
+        return 2
+
+    # Mesmas medições da aba de diagnóstico do app, numa execução sem interface
+    instrumentacao = None
+    if args.metricas:
+        instrumentacao = ativar_instrumentacao(Instrumentacao())
+        instrumentacao.iniciar_execucao('cli')
+
+    resultados, etapas = importar_arquivos_chronon(
+        ler_diretorio_chronon(args.diretorio), args.etapa, args.temporada, args.pista, max_processos=args.processos
+    )
+
+    for resultado in resultados:
+        print(f"{resultado['Status']}  {resultado['Arquivo']}")
+
+    if not etapas:
+        print("❌ Nenhuma sessão foi importada.", file=sys.stderr)
+        return 1
+
+    etapas = dict(etapas)
+    args.saida.mkdir(parents=True, exist_ok=True)
+
+    # Classificação e tabela setorial de cada sessão
+    for chave, dados_etapa in etapas.items():
+        agregados = obter_agregados_etapa(dados_etapa)
+        prefixo = nome_arquivo_saida(chave)
+
+        with medir('exportacao_csv', chave):
+            agregados['classificacao'].to_csv(args.saida / f"classificacao_{prefixo}.csv", index=False)
+            if agregados['setorial'] is not None:
+                agregados['setorial'].to_csv(args.saida / f"setorial_{prefixo}.csv", index=False)
+
+        if args.armazenar and armazenamento_disponivel():
+            salvar_etapa(chave, dados_etapa)
+
+    with medir('campeonato'):
+        classificacao_campeonato(etapas).tabela().to_csv(args.saida / 'campeonato.csv', index=False)
+    with medir('relatorios'):
+        relatorios_pilotos(etapas).to_csv(args.saida / 'relatorios_pilotos.csv', index=False)
+
+    if instrumentacao is not None:
+        instrumentacao.finalizar_execucao()
+        instrumentacao.gravar_metricas(args.metricas)
+
+    print(f"✅ {len(etapas)} sessões processadas. Resultados em {args.saida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,400 @@
+import base64
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from chronon_parser import (
+    ler_csv_chronon, validar_csv_chronon, mascara_cabecalhos_pilotos, extrair_voltas_chronon,
+    calcular_metricas_avancadas_completas, processar_csv_chronon_streaming, compactar_voltas
+)
+from chronon_cache import chave_importacao
+from chronon_agregados import obter_agregados_etapa, voltas_piloto
+from chronon_campeonato import ClassificacaoCampeonato
+from chronon_temporada import FatosTemporada
+from chronon_diagnostico import medir
+from chronon_dimensoes import DimensoesCadastro, pilotos_sem_cadastro
+from chronon_stints import sessao_de_corrida, segmentar_stints
+from chronon_ritmo import metricas_ritmo, ritmo_piloto
+from chronon_lote import expandir_arquivos, inferir_sessao, inferir_pista, inferir_temporada, processar_lote_chronon
+
+# Base de dados COMPLETA com todos os pilotos da Stock Car 2024-2025
+MAPEAMENTO_COMPLETO_PILOTOS = {
+    "Daniel Serra": {"Equipe": "Eurofarma-RC", "Montadora": "Chevrolet", "Numero": "29"},
+    "Bruno Baptista": {"Equipe": "RCM Motorsport", "Montadora": "Toyota", "Numero": "44"},
+    "Gabriel Casagrande": {"Equipe": "A.Mattheis Vogel", "Montadora": "Volkswagen", "Numero": "83"},
+    "Guilherme Salas": {"Equipe": "KTF Racing", "Montadora": "Chevrolet", "Numero": "85"},
+    "Cesar Ramos": {"Equipe": "Ipiranga Racing", "Montadora": "Toyota", "Numero": "30"},
+    "Enzo Elias": {"Equipe": "Crown Racing", "Montadora": "Toyota", "Numero": "28"},
+    "Thiago Camilo": {"Equipe": "Ipiranga Racing", "Montadora": "Toyota", "Numero": "21"},
+    "Lucas Foresti": {"Equipe": "A.Mattheis Vogel", "Montadora": "Volkswagen", "Numero": "12"},
+    "Felipe Massa": {"Equipe": "TMG Racing", "Montadora": "Chevrolet", "Numero": "19"},
+    "Rubens Barrichello": {"Equipe": "Full Time", "Montadora": "Toyota", "Numero": "111"},
+    "Cacá Bueno": {"Equipe": "KTF Sports", "Montadora": "Chevrolet", "Numero": "0"},
+    "Felipe Fraga": {"Equipe": "Blau Motorsport", "Montadora": "Volkswagen", "Numero": "8"},
+    "Ricardo Zonta": {"Equipe": "RMatheus", "Montadora": "Toyota", "Numero": "10"},
+    "Gaetano di Mauro": {"Equipe": "Cavaleiro Sports", "Montadora": "Chevrolet", "Numero": "77"},
+    "Nelson Piquet Jr": {"Equipe": "Cavaleiro Sports", "Montadora": "Chevrolet", "Numero": "33"},
+    "Átila Abreu": {"Equipe": "Pole Motorsport", "Montadora": "Toyota", "Numero": "51"},
+    "Ricardo Maurício": {"Equipe": "Eurofarma-RC", "Montadora": "Chevrolet", "Numero": "18"},
+    "Allam Khodair": {"Equipe": "Blau Motorsport", "Montadora": "Volkswagen", "Numero": "80"},
+    "Rafael Suzuki": {"Equipe": "TMG Racing", "Montadora": "Chevrolet", "Numero": "90"},
+    "Julio Campos": {"Equipe": "Pole Motorsport", "Montadora": "Toyota", "Numero": "11"},
+    "Dudu Barrichello": {"Equipe": "Full Time", "Montadora": "Toyota", "Numero": "91"},
+    "Zezinho Muggiati": {"Equipe": "KTF Sports", "Montadora": "Chevrolet", "Numero": "1"},
+    "Tuca Antoniazi": {"Equipe": "Hot Car Racing", "Montadora": "Chevrolet", "Numero": "27"},
+    "Diego Nunes": {"Equipe": "Blau Motorsport", "Montadora": "Volkswagen", "Numero": "5"},
+    "Tony Kanaan": {"Equipe": "Full Time", "Montadora": "Toyota", "Numero": "14"},
+    "Marcos Gomes": {"Equipe": "Cavaleiro Sports", "Montadora": "Chevrolet", "Numero": "9"},
+    "Arthur Leist": {"Equipe": "Full Time", "Montadora": "Toyota", "Numero": "16"},
+    "Gianluca Petecof": {"Equipe": "Full Time", "Montadora": "Toyota", "Numero": "88"},
+}
+
+# Outras grafias dos nomes no Chronon; acentos e maiúsculas já são ignorados na comparação
+APELIDOS_PILOTOS = {
+    "Nelson Piquet Junior": "Nelson Piquet Jr",
+    "Nelsinho Piquet": "Nelson Piquet Jr",
+    "Rubinho Barrichello": "Rubens Barrichello",
+    "Eduardo Barrichello": "Dudu Barrichello",
+    "Gaetano Di Mauro": "Gaetano di Mauro",
+}
+
+# Cadastros de temporadas anteriores diferentes do atual: (piloto, equipe, montadora, número, desde, até)
+HISTORICO_PILOTOS = [
+    ("Felipe Massa", "Lubrax Podium", "Chevrolet", "19", 2021, 2021),
+]
+
+# Cadastro como dimensões com chave inteira; versões por temporada entram como novos registros
+CADASTRO_PILOTOS = DimensoesCadastro.de_mapeamento(MAPEAMENTO_COMPLETO_PILOTOS, APELIDOS_PILOTOS, historico=HISTORICO_PILOTOS)
+
+# Pistas oficiais COMPLETAS com dados técnicos detalhados
+PISTAS_OFICIAIS_COMPLETAS = {
+    "Goiânia": {
+        "distancia": 3.835, "setores": 3, "drs_zones": 1, "tipo": "Misto",
+        "curvas": 12, "retas_longas": 2, "elevacao": "Baixa"
+    },
+    "Velocitta": {
+        "distancia": 3.150, "setores": 3, "drs_zones": 2, "tipo": "Técnico", 
+        "curvas": 14, "retas_longas": 1, "elevacao": "Média"
+    },
+    "Interlagos": {
+        "distancia": 4.309, "setores": 3, "drs_zones": 2, "tipo": "Clássico",
+        "curvas": 16, "retas_longas": 2, "elevacao": "Alta"
+    },
+    "Cascavel": {
+        "distancia": 3.458, "setores": 3, "drs_zones": 1, "tipo": "Oval",
+        "curvas": 4, "retas_longas": 2, "elevacao": "Baixa"
+    },
+    "Velopark": {
+        "distancia": 3.068, "setores": 3, "drs_zones": 2, "tipo": "Técnico",
+        "curvas": 15, "retas_longas": 1, "elevacao": "Baixa"
+    },
+    "Belo Horizonte": {
+        "distancia": 3.067, "setores": 3, "drs_zones": 1, "tipo": "Urbano",
+        "curvas": 11, "retas_longas": 2, "elevacao": "Média"
+    },
+    "Buenos Aires": {
+        "distancia": 4.200, "setores": 3, "drs_zones": 2, "tipo": "Clássico",
+        "curvas": 18, "retas_longas": 2, "elevacao": "Baixa"
+    },
+    "Uruguai": {
+        "distancia": 3.200, "setores": 3, "drs_zones": 1, "tipo": "Misto",
+        "curvas": 13, "retas_longas": 1, "elevacao": "Baixa"
+    },
+    "Curitiba": {
+        "distancia": 2.369, "setores": 3, "drs_zones": 1, "tipo": "Urbano",
+        "curvas": 10, "retas_longas": 1, "elevacao": "Baixa"
+    },
+    "Santa Cruz do Sul": {
+        "distancia": 3.067, "setores": 3, "drs_zones": 1, "tipo": "Misto",
+        "curvas": 12, "retas_longas": 2, "elevacao": "Baixa"
+    },
+    "Tarumã": {
+        "distancia": 3.068, "setores": 3, "drs_zones": 2, "tipo": "Técnico",
+        "curvas": 16, "retas_longas": 1, "elevacao": "Média"
+    },
+    "Ribeirão Preto": {
+        "distancia": 4.216, "setores": 3, "drs_zones": 2, "tipo": "Misto",
+        "curvas": 14, "retas_longas": 2, "elevacao": "Baixa"
+    }
+}
+
+# Sessões oficiais COMPLETAS
+SESSOES_OFICIAIS_COMPLETAS = {
+    "Treino Rookies": {"duracao": 30, "tipo": "Treino", "pontos": False},
+    "Shake Down": {"duracao": 15, "tipo": "Treino", "pontos": False},
+    "T1": {"duracao": 90, "tipo": "Treino Livre", "pontos": False},
+    "T2": {"duracao": 90, "tipo": "Treino Livre", "pontos": False},
+    "Q1-G1": {"duracao": 15, "tipo": "Classificação", "pontos": False},
+    "Q1-G2": {"duracao": 15, "tipo": "Classificação", "pontos": False},
+    "Q2": {"duracao": 12, "tipo": "Classificação", "pontos": False},
+    "Q3": {"duracao": 10, "tipo": "Classificação", "pontos": False},
+    "QF": {"duracao": 8, "tipo": "Super Pole", "pontos": False},
+    "Prova1 Sprint": {"duracao": 30, "tipo": "Corrida", "pontos": True},
+    "P2": {"duracao": 50, "tipo": "Corrida Principal", "pontos": True},
+    "Warm Up": {"duracao": 20, "tipo": "Aquecimento", "pontos": False}
+}
+
+# Temporadas disponíveis
+TEMPORADAS_DISPONIVEIS = ["2020", "2021", "2022", "2023", "2024", "2025"]
+
+# Sistema de pontuação oficial Stock Car
+SISTEMA_PONTUACAO = {
+    1: 25, 2: 20, 3: 16, 4: 13, 5: 11, 6: 10, 7: 9, 8: 8, 9: 7, 10: 6,
+    11: 5, 12: 4, 13: 3, 14: 2, 15: 1
+}
+
+
+def formatar_tempo_completo(segundos):
+    """Formatação completa de tempo"""
+    if pd.isna(segundos) or segundos is None:
+        return 'N/A'
+
+    if segundos < 60:
+        return f"{segundos:.3f}s"
+
+    minutos = int(segundos // 60)
+    segundos_restantes = segundos % 60
+    return f"{minutos}:{segundos_restantes:06.3f}"
+
+
+def calcular_pontos_campeonato(posicao):
+    """Calcula pontos baseado no sistema oficial da Stock Car"""
+    return SISTEMA_PONTUACAO.get(posicao, 0)
+
+
+def exportar_dados_para_csv(df, nome_arquivo):
+    """Exporta dados processados para CSV"""
+    csv = df.to_csv(index=False)
+    b64 = base64.b64encode(csv.encode()).decode()
+    href = f'<a href="data:file/csv;base64,{b64}" download="{nome_arquivo}.csv">📥 Baixar dados processados</a>'
+    return href
+
+
+def criar_grafico_comparacao_montadoras(df):
+    """Cria gráfico comparativo entre montadoras"""
+    if 'Lap_Sec' not in df.columns:
+        return None
+
+    # Melhores tempos por montadora
+    melhores_por_mont = df.dropna(subset=['Lap_Sec']).groupby('Montadora', observed=True).agg({
+        'Lap_Sec': ['min', 'mean', 'count'],
+        'Speed_Kmh': 'max',
+        'Nome_Piloto': 'nunique'
+    }).round(3)
+
+    melhores_por_mont.columns = ['_'.join(col).strip() for col in melhores_por_mont.columns]
+    melhores_por_mont = melhores_por_mont.reset_index()
+
+    return melhores_por_mont
+
+
+def aplicar_etapa_campeonato(campeonato, chave_etapa, dados_etapa):
+    """Soma a etapa à classificação do campeonato, se ela vale pontos"""
+    if dados_etapa['info_sessao']['pontos']:
+        campeonato.aplicar_etapa(chave_etapa, obter_agregados_etapa(dados_etapa)['classificacao'], dados_etapa['etapa'])
+    else:
+        campeonato.remover_etapa(chave_etapa)
+
+
+def processar_csv_chronon(arquivo, streaming=False):
+    """Voltas de um CSV oficial do Chronon com todas as métricas; ValueError se o arquivo não for reconhecido"""
+    # Arquivos grandes são lidos em blocos, já com as métricas calculadas e compactos; as colunas brutas seguem
+    # a mesma regra da leitura de uma vez (vão para o Parquet e ficam em memória conforme a configuração)
+    if streaming:
+        with medir('importacao_em_blocos') as medicao:
+            medicao['df'] = processar_csv_chronon_streaming(arquivo, CADASTRO_PILOTOS)
+        return medicao['df']
+
+    with medir('leitura_csv') as medicao:
+        df = medicao['df'] = ler_csv_chronon(arquivo)
+    validar_csv_chronon(df)
+
+    cabecalhos = mascara_cabecalhos_pilotos(df)
+    if not cabecalhos.any():
+        raise ValueError("Formato de arquivo não reconhecido. Verifique se é um CSV do Chronon oficial.")
+
+    # Voltas de todos os pilotos em uma única passada, com o cadastro completo
+    with medir('segmentacao') as medicao:
+        voltas = medicao['df'] = extrair_voltas_chronon(df, CADASTRO_PILOTOS, cabecalhos)
+
+    with medir('metricas') as medicao:
+        medicao['df'] = calcular_metricas_avancadas_completas(voltas)
+    return medicao['df']
+
+
+def gerar_chave_etapa(temporada, etapa, sessao):
+    """Chave da etapa na sessão e no armazenamento"""
+    return f"{temporada}_{etapa}_{sessao}"
+
+
+def montar_etapa(df, temporada, etapa, sessao, pista, observacoes=''):
+    """Registro da etapa com as voltas compactas e os dados oficiais de pista e sessão"""
+    # Corridas saem da importação já com stint e tipo de cada volta
+    if sessao_de_corrida(SESSOES_OFICIAIS_COMPLETAS[sessao]) and 'Stint' not in df.columns:
+        with medir('stints', gerar_chave_etapa(temporada, etapa, sessao)) as medicao:
+            df = medicao['df'] = segmentar_stints(df)
+
+    return {
+        'dataframe': compactar_voltas(df),
+        'temporada': temporada,
+        'etapa': etapa,
+        'sessao': sessao,
+        'pista': pista,
+        'dados_pista': PISTAS_OFICIAIS_COMPLETAS[pista],
+        'observacoes': observacoes,
+        'data_importacao': datetime.now(),
+        'info_sessao': SESSOES_OFICIAIS_COMPLETAS[sessao]
+    }
+
+
+def importar_arquivos_chronon(arquivos, etapa, temporada_padrao, pista_padrao, cache_importacao=None, max_processos=None):
+    """Processa um lote de (nome, bytes) em paralelo; devolve o status de cada arquivo e as etapas montadas"""
+    arquivos = expandir_arquivos(arquivos)
+
+    resultados = []
+    identificados = []
+    pendentes = []
+
+    # A sessão vem do nome do arquivo; o que já está no cache não vai para o pool
+    for nome, conteudo in arquivos:
+        sessao = inferir_sessao(nome, SESSOES_OFICIAIS_COMPLETAS)
+        if sessao is None:
+            resultados.append({'Arquivo': nome, 'Status': '❌ Sessão não identificada no nome do arquivo'})
+            continue
+
+        chave_cache = chave_importacao(conteudo, CADASTRO_PILOTOS)
+        df_arquivo = cache_importacao.obter(chave_cache) if cache_importacao is not None else None
+        identificados.append((nome, sessao, chave_cache, df_arquivo))
+
+        if df_arquivo is None:
+            pendentes.append((nome, conteudo))
+
+    with medir('importacao_lote'):
+        processados = iter(processar_lote_chronon(pendentes, CADASTRO_PILOTOS, max_processos))
+    etapas = []
+    arquivo_da_chave = {}
+
+    for nome, sessao, chave_cache, df_arquivo in identificados:
+        erro = None
+        if df_arquivo is None:
+            _, df_arquivo, erro = next(processados)
+            if cache_importacao is not None and df_arquivo is not None and not df_arquivo.empty:
+                cache_importacao.guardar(chave_cache, df_arquivo)
+
+        if erro or df_arquivo is None or df_arquivo.empty:
+            resultados.append({'Arquivo': nome, 'Sessão': sessao, 'Status': f"❌ {erro or 'Nenhuma volta encontrada'}"})
+            continue
+
+        pista = inferir_pista(nome, PISTAS_OFICIAIS_COMPLETAS) or pista_padrao
+        temporada = inferir_temporada(df_arquivo, nome, TEMPORADAS_DISPONIVEIS) or temporada_padrao
+        chave_etapa = gerar_chave_etapa(temporada, etapa, sessao)
+
+        # Dois arquivos da mesma temporada, etapa e sessão: vale o primeiro, o outro não sobrescreve
+        if chave_etapa in arquivo_da_chave:
+            resultados.append({
+                'Arquivo': nome, 'Sessão': sessao, 'Pista': pista, 'Temporada': temporada,
+                'Status': f"❌ Mesma temporada, etapa e sessão de {arquivo_da_chave[chave_etapa]}"
+            })
+            continue
+        arquivo_da_chave[chave_etapa] = nome
+
+        etapas.append((chave_etapa, montar_etapa(df_arquivo, temporada, etapa, sessao, pista)))
+        resultados.append({
+            'Arquivo': nome,
+            'Sessão': sessao,
+            'Pista': pista,
+            'Temporada': temporada,
+            'Pilotos': df_arquivo['Nome_Piloto'].nunique(),
+            'Sem cadastro': ', '.join(pilotos_sem_cadastro(df_arquivo)),
+            'Voltas': len(df_arquivo),
+            'Status': '✅ Importado'
+        })
+
+    return resultados, etapas
+
+
+def ler_diretorio_chronon(diretorio):
+    """Lista (nome relativo, bytes) dos CSVs e ZIPs de um diretório, incluindo subpastas"""
+    diretorio = Path(diretorio)
+    return [
+        (caminho.relative_to(diretorio).as_posix(), caminho.read_bytes())
+        for caminho in sorted(diretorio.rglob('*'))
+        if caminho.is_file() and caminho.suffix.lower() in ('.csv', '.zip')
+    ]
+
+
+def classificacao_campeonato(etapas):
+    """Classificação do campeonato a partir de um dicionário de etapas"""
+    campeonato = ClassificacaoCampeonato(SISTEMA_PONTUACAO)
+    for chave, dados_etapa in etapas.items():
+        aplicar_etapa_campeonato(campeonato, chave, dados_etapa)
+    return campeonato
+
+
+def voltas_piloto_temporada(etapas, nome_piloto, colunas=None):
+    """Voltas de um piloto em todas as etapas, custando só as voltas dele em cada uma"""
+    partes = {}
+
+    for chave, dados_etapa in etapas.items():
+        voltas = voltas_piloto(obter_agregados_etapa(dados_etapa), nome_piloto)
+        if not voltas.empty:
+            partes[chave] = voltas if colunas is None else voltas[[c for c in colunas if c in voltas.columns]]
+
+    if not partes:
+        return pd.DataFrame()
+
+    return pd.concat(partes, names=['Etapa', None]).reset_index(level=0).reset_index(drop=True)
+
+
+def stints_piloto_temporada(etapas, nome_piloto):
+    """Stints do piloto nas corridas da temporada, a partir do resumo de cada etapa"""
+    partes = {}
+
+    for chave, dados_etapa in etapas.items():
+        stints = obter_agregados_etapa(dados_etapa)['stints']
+        if stints is not None:
+            partes[chave] = stints[stints['Nome_Piloto'] == nome_piloto].drop(columns='Nome_Piloto')
+
+    partes = {chave: stints for chave, stints in partes.items() if not stints.empty}
+    if not partes:
+        return pd.DataFrame()
+
+    return pd.concat(partes, names=['Etapa', None]).reset_index(level=0).reset_index(drop=True)
+
+
+def ritmo_piloto_temporada(etapas, nome_piloto, colunas=('Lap_Number', 'Stint', 'Lap_Sec', 'Lap_Media_Movel', 'Lap_Desvio_Movel')):
+    """Médias móveis das voltas e degradação de cada stint do piloto em todas as etapas"""
+    voltas, stints = {}, {}
+
+    for chave, dados_etapa in etapas.items():
+        agregados = obter_agregados_etapa(dados_etapa)
+        if nome_piloto not in agregados['indice_pilotos']:
+            continue
+
+        ritmo = ritmo_piloto(agregados, nome_piloto)
+        voltas[chave] = ritmo[[coluna for coluna in colunas if coluna in ritmo.columns]]
+
+        stints_etapa = metricas_ritmo(agregados)['stints']
+        stints[chave] = stints_etapa[stints_etapa['Nome_Piloto'] == nome_piloto].drop(columns='Nome_Piloto')
+
+    def juntar(partes):
+        partes = {chave: parte for chave, parte in partes.items() if not parte.empty}
+        if not partes:
+            return pd.DataFrame()
+        return pd.concat(partes, names=['Etapa', None]).reset_index(level=0).reset_index(drop=True)
+
+    return juntar(voltas), juntar(stints)
+
+
+def fatos_temporada(etapas):
+    """Tabela de fatos (piloto, etapa) a partir de um dicionário de etapas"""
+    fatos = FatosTemporada()
+    for chave, dados_etapa in etapas.items():
+        fatos.aplicar_etapa(chave, dados_etapa)
+    return fatos
+
+
+def relatorios_pilotos(etapas):
+    """Relatório de cada piloto em cada etapa, uma linha por piloto e etapa"""
+    return fatos_temporada(etapas).tabela()
@@ -0,0 +1,29 @@
+import io
+
+import numpy as np
+
+from chronon_agregados import calcular_agregados_etapa, obter_agregados_etapa
+from chronon_sintetico import gerar_csv_chronon
+from stock_car_engine import montar_etapa, processar_csv_chronon
+
+
+def _sessao_sem_s3():
+    """Sessão sintética com o laço do S3 morto: nenhuma volta tem tempo nesse setor"""
+    df = processar_csv_chronon(io.BytesIO(gerar_csv_chronon(pilotos=5, voltas=6).encode('utf-8')))
+    df['S3_Sec'] = np.nan
+    return df
+
+
+def test_volta_ideal_com_setor_sem_tempos():
+    volta_ideal = calcular_agregados_etapa(_sessao_sem_s3())['volta_ideal']
+
+    setores = volta_ideal['setores'].set_index('setor')
+    assert np.isnan(volta_ideal['tempo'])
+    assert np.isnan(setores.loc['S3', 'tempo'])
+    assert setores['piloto'].isna()['S3']
+    assert setores.loc[['S1', 'S2'], 'piloto'].notna().all()
+
+
+def test_registro_de_etapa_com_setor_sem_tempos():
+    dados_etapa = montar_etapa(_sessao_sem_s3(), '2024', '#1 Teste', 'P2', 'Interlagos')
+    assert obter_agregados_etapa(dados_etapa)['volta_ideal'] is not None
@@ -0,0 +1,67 @@
+import os
+
+import pandas as pd
+
+from chronon_ao_vivo import AcompanhamentoAoVivo, AgregadosAoVivo, LeitorIncremental
+from chronon_sintetico import gerar_csv_chronon
+from stock_car_engine import CADASTRO_PILOTOS
+
+
+def _csv(semente=0):
+    return gerar_csv_chronon(pilotos=3, voltas=5, semente=semente, proporcao_sem_tempo=0).encode('utf-8')
+
+
+def _voltas_por_piloto(voltas):
+    return voltas.groupby(voltas['Nome_Piloto'].astype(str)).size().to_dict()
+
+
+def test_linha_incompleta_e_cabecalho_entre_leituras(tmp_path):
+    csv = _csv()
+    caminho = tmp_path / 'sessao.csv'
+    leitor = LeitorIncremental(caminho, CADASTRO_PILOTOS)
+
+    # Corta no meio da terceira volta do primeiro piloto: o resto dele chega sem cabeçalho de piloto
+    linhas = csv.split(b'\n')
+    corte = len(b'\n'.join(linhas[:4])) + 1 + 6
+    caminho.write_bytes(csv[:corte])
+    primeira = leitor.ler_novas_voltas()
+
+    with open(caminho, 'ab') as arquivo:
+        arquivo.write(csv[corte:])
+    segunda = leitor.ler_novas_voltas()
+
+    assert len(primeira) == 2
+    assert set(segunda['Nome_Piloto'].astype(str)) >= set(primeira['Nome_Piloto'].astype(str))
+    assert _voltas_por_piloto(pd.concat([primeira, segunda])) == {nome: 5 for nome in _voltas_por_piloto(segunda)}
+    assert leitor.ler_novas_voltas().empty
+
+
+def test_arquivo_trocado_recomeca_a_sessao(tmp_path):
+    caminho = tmp_path / 'sessao.csv'
+    caminho.write_bytes(_csv())
+    acompanhamento = AcompanhamentoAoVivo(caminho, CADASTRO_PILOTOS)
+    assert acompanhamento.atualizar() == 15
+
+    # O cronometrista grava um arquivo novo por cima (outro inode), menor que o anterior
+    novo = tmp_path / 'novo.csv'
+    novo.write_bytes(gerar_csv_chronon(pilotos=2, voltas=4, semente=1, proporcao_sem_tempo=0).encode('utf-8'))
+    os.replace(novo, caminho)
+
+    assert acompanhamento.atualizar() == 8
+    assert acompanhamento.releituras == 1
+    assert acompanhamento.agregados.total_voltas == 8
+
+
+def test_agregados_em_lotes_iguais_aos_de_uma_vez(tmp_path):
+    caminho = tmp_path / 'sessao.csv'
+    caminho.write_bytes(_csv())
+    voltas = LeitorIncremental(caminho, CADASTRO_PILOTOS).ler_novas_voltas()
+
+    de_uma_vez, em_lotes = AgregadosAoVivo(), AgregadosAoVivo()
+    de_uma_vez.aplicar(voltas)
+    for inicio in range(0, len(voltas), 4):
+        em_lotes.aplicar(voltas.iloc[inicio:inicio + 4])
+
+    pd.testing.assert_frame_equal(em_lotes.classificacao(), de_uma_vez.classificacao())
+    pd.testing.assert_frame_equal(em_lotes.melhores_setores(), de_uma_vez.melhores_setores())
+    assert em_lotes.volta_ideal() == de_uma_vez.volta_ideal()
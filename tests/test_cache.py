@@ -0,0 +1,84 @@
+import os
+
+import pandas as pd
+import pytest
+
+import chronon_cache
+from chronon_cache import CacheDiscoLRU, CacheImportacao, CacheLRU, chave_importacao
+from chronon_dimensoes import DimensoesCadastro
+from stock_car_engine import APELIDOS_PILOTOS, CADASTRO_PILOTOS, HISTORICO_PILOTOS, MAPEAMENTO_COMPLETO_PILOTOS
+
+CSV = b'Time of Day,Lap,Lap Tm\n1 - Piloto - Stock Car PRO 2024,,\n10:00:00.000,1,1:30.000\n'
+
+
+def _voltas(semente):
+    return pd.DataFrame({'Lap_Number': range(200), 'Lap_Sec': [90.0 + semente] * 200})
+
+
+def test_memoria_descarta_o_usado_ha_mais_tempo():
+    cache = CacheLRU(30, medir=len)
+    for chave in 'abc':
+        cache.guardar(chave, chave * 10)
+
+    cache.obter('a')
+    cache.guardar('d', 'd' * 10)
+
+    assert 'b' not in cache and {'a', 'c', 'd'} <= set(cache.itens)
+    assert cache.bytes_usados == 30
+
+
+def test_memoria_recusa_item_maior_que_o_limite_e_recalcula_ao_substituir():
+    cache = CacheLRU(30, medir=len)
+    assert not cache.guardar('grande', 'x' * 31)
+
+    cache.guardar('a', 'a' * 10)
+    cache.guardar('a', 'a' * 25)
+    assert cache.bytes_usados == 25
+
+    cache.ajustar_limite(20)
+    assert len(cache) == 0 and cache.bytes_usados == 0
+
+
+def test_disco_descarta_pelo_ultimo_uso_na_leitura(tmp_path):
+    pytest.importorskip('pyarrow')
+    cache = CacheDiscoLRU(tmp_path, limite_bytes=10 ** 9)
+    for i, chave in enumerate('abc'):
+        cache.guardar(chave, _voltas(i))
+        # Datas de uso explícitas: a resolução do relógio do sistema de arquivos não separa gravações seguidas
+        os.utime(tmp_path / f'{chave}.parquet', (1000 * (i + 1), 1000 * (i + 1)))
+
+    # Ler 'a' a torna a mais recente; o limite novo só comporta duas entradas
+    pd.testing.assert_frame_equal(cache.obter('a'), _voltas(0))
+    cache.ajustar_limite(cache.bytes_usados - 1)
+
+    assert cache.obter('b') is None
+    pd.testing.assert_frame_equal(cache.obter('a'), _voltas(0))
+    pd.testing.assert_frame_equal(cache.obter('c'), _voltas(2))
+
+
+def test_importacao_le_do_disco_quando_a_memoria_nao_tem(tmp_path):
+    pytest.importorskip('pyarrow')
+    cache = CacheImportacao(tamanho_mb=1, diretorio=tmp_path)
+    cache.guardar('a', _voltas(0))
+    cache.memoria.limpar()
+
+    pd.testing.assert_frame_equal(cache.obter('a'), _voltas(0))
+    assert 'a' in cache.memoria
+
+
+def test_chave_muda_com_conteudo_cadastro_e_versao_do_parser(monkeypatch):
+    chave = chave_importacao(CSV, CADASTRO_PILOTOS)
+    assert chave == chave_importacao(CSV, DimensoesCadastro.de_mapeamento(
+        MAPEAMENTO_COMPLETO_PILOTOS, APELIDOS_PILOTOS, historico=HISTORICO_PILOTOS
+    ))
+    assert chave != chave_importacao(CSV + b'10:01:30.000,2,1:30.500\n', CADASTRO_PILOTOS)
+
+    # Piloto trocando de equipe muda a versão do cadastro, e as voltas em cache não valem mais
+    mapeamento = {**MAPEAMENTO_COMPLETO_PILOTOS, 'Daniel Serra': {'Equipe': 'Outra', 'Montadora': 'Toyota', 'Numero': '29'}}
+    assert chave != chave_importacao(CSV, DimensoesCadastro.de_mapeamento(
+        mapeamento, APELIDOS_PILOTOS, historico=HISTORICO_PILOTOS
+    ))
+    assert chave != chave_importacao(CSV, DimensoesCadastro.de_mapeamento(MAPEAMENTO_COMPLETO_PILOTOS, APELIDOS_PILOTOS))
+
+    monkeypatch.setattr(chronon_cache, 'VERSAO_PARSER', chronon_cache.VERSAO_PARSER + 1)
+    assert chave != chave_importacao(CSV, CADASTRO_PILOTOS)
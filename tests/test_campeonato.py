@@ -0,0 +1,51 @@
+import pandas as pd
+
+from chronon_campeonato import ClassificacaoCampeonato
+
+SISTEMA = {1: 10, 2: 8, 3: 6, 4: 5}
+
+
+def _classificacao(*pilotos):
+    return pd.DataFrame({
+        'Nome_Piloto': list(pilotos),
+        'Equipe': [f'Equipe {piloto}' for piloto in pilotos],
+        'Montadora': ['Toyota' if piloto in ('Ana', 'Caio') else 'Chevrolet' for piloto in pilotos],
+    })
+
+
+# Ana e Bia empatam em pontos, vitórias e pódios; Caio e Davi também
+ETAPA_A = _classificacao('Bia', 'Ana', 'Davi', 'Caio')
+ETAPA_B = _classificacao('Ana', 'Bia', 'Caio', 'Davi')
+
+
+def _do_zero(*etapas):
+    campeonato = ClassificacaoCampeonato(SISTEMA)
+    for chave, classificacao in etapas:
+        campeonato.aplicar_etapa(chave, classificacao)
+    return campeonato.tabela()
+
+
+def test_remover_e_reaplicar_igual_a_recalcular():
+    campeonato = ClassificacaoCampeonato(SISTEMA)
+    campeonato.aplicar_etapa('A', ETAPA_A)
+    campeonato.aplicar_etapa('B', ETAPA_B)
+    campeonato.remover_etapa('A')
+    pd.testing.assert_frame_equal(campeonato.tabela(), _do_zero(('B', ETAPA_B)))
+
+    campeonato.aplicar_etapa('A', ETAPA_A)
+    tabela = campeonato.tabela()
+    pd.testing.assert_frame_equal(tabela, _do_zero(('B', ETAPA_B), ('A', ETAPA_A)))
+    pd.testing.assert_frame_equal(tabela, _do_zero(('A', ETAPA_A), ('B', ETAPA_B)))
+
+    assert tabela['Piloto'].tolist() == ['Ana', 'Bia', 'Caio', 'Davi']
+    assert tabela['Pontos'].tolist() == [18, 18, 11, 11]
+
+
+def test_reaplicar_a_mesma_chave_substitui_a_etapa():
+    campeonato = ClassificacaoCampeonato(SISTEMA)
+    campeonato.aplicar_etapa('A', ETAPA_B)
+    campeonato.aplicar_etapa('B', ETAPA_B)
+    campeonato.aplicar_etapa('A', ETAPA_A)
+
+    pd.testing.assert_frame_equal(campeonato.tabela(), _do_zero(('A', ETAPA_A), ('B', ETAPA_B)))
+    assert len(campeonato) == 2
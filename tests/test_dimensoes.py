@@ -0,0 +1,44 @@
+import pandas as pd
+
+from chronon_dimensoes import SEM_CADASTRO, DimensoesCadastro
+from stock_car_engine import CADASTRO_PILOTOS
+
+
+def _voltas(*linhas):
+    return pd.DataFrame(linhas, columns=['Nome_Piloto', 'Categoria'])
+
+
+def test_cadastro_da_temporada_de_cada_bloco():
+    voltas = CADASTRO_PILOTOS.anexar_voltas(_voltas(
+        ('Felipe Massa', 'Stock Car PRO 2021'),
+        ('FELIPE MASSA', 'Stock Car PRO 2024'),
+    ))
+
+    assert voltas['Nome_Piloto'].astype(str).tolist() == ['Felipe Massa', 'Felipe Massa']
+    assert voltas['Equipe'].astype(str).tolist() == ['Lubrax Podium', 'TMG Racing']
+    assert voltas['Id_Piloto'].nunique() == 1
+    assert voltas['Id_Equipe'].nunique() == 2
+
+
+def test_apelidos_e_grafias_sem_acento():
+    voltas = CADASTRO_PILOTOS.anexar_voltas(_voltas(
+        ('Nélson Piquet Júnior', 'Stock Car PRO 2024'),
+        ('Caca Bueno', 'Stock Car PRO 2024'),
+        ('ÁTILA  ABREU', 'Stock Car PRO 2024'),
+        ('Piloto Convidado', 'Stock Car PRO 2024'),
+    ))
+
+    assert voltas['Nome_Piloto'].astype(str).tolist() == ['Nelson Piquet Jr', 'Cacá Bueno', 'Átila Abreu', 'Piloto Convidado']
+    assert voltas['Equipe'].astype(str).tolist() == ['Cavaleiro Sports', 'KTF Sports', 'Pole Motorsport', 'Independente']
+    assert voltas['Id_Piloto'].iloc[-1] == SEM_CADASTRO
+
+
+def test_temporada_fora_da_vigencia_fica_sem_cadastro():
+    cadastro = DimensoesCadastro([['Piloto Teste', 'Equipe Teste', 'Toyota', '7', 2022, 2023]])
+    voltas = cadastro.anexar_voltas(_voltas(
+        ('Piloto Teste', 'Stock Car PRO 2023'),
+        ('Piloto Teste', 'Stock Car PRO 2024'),
+    ))
+
+    assert voltas['Equipe'].astype(str).tolist() == ['Equipe Teste', 'Independente']
+    assert voltas['Id_Piloto'].tolist() == [0, SEM_CADASTRO]
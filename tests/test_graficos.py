@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from chronon_graficos import figura_series_voltas
+
+
+def _ritmo_dois_stints():
+    """Média móvel de um piloto com dois stints, o segundo recomeçando depois do pit"""
+    return pd.DataFrame({
+        'Etapa': '#1 Teste',
+        'Lap_Number': np.arange(1, 11),
+        'Stint': [1] * 5 + [2] * 5,
+        'Lap_Media_Movel': np.linspace(90, 91, 10),
+        'Lap_Desvio_Movel': np.full(10, 0.2),
+    })
+
+
+def test_series_quebram_entre_stints_com_barras_de_erro():
+    figura = figura_series_voltas(_ritmo_dois_stints(), 'Lap_Number', 'Lap_Media_Movel', cor='Etapa', modo='lines',
+                                  erro='Lap_Desvio_Movel', separar='Stint')
+
+    serie, = figura.data
+    assert len(serie.x) == 11
+    assert np.isnan(serie.y[5]) and not serie.connectgaps
+    assert serie.error_y.visible and np.allclose(np.delete(serie.error_y.array, 5), 0.2)
+
+
+def test_series_sem_separar_continuam_ligadas():
+    figura = figura_series_voltas(_ritmo_dois_stints(), 'Lap_Number', 'Lap_Media_Movel', modo='lines')
+
+    serie, = figura.data
+    assert len(serie.x) == 10 and not np.isnan(serie.y).any()
+    assert serie.error_y.array is None
@@ -0,0 +1,14 @@
+from chronon_sintetico import gerar_csv_chronon
+from stock_car_engine import importar_arquivos_chronon
+
+
+def test_arquivos_da_mesma_sessao_nao_se_sobrescrevem():
+    csv = gerar_csv_chronon(pilotos=3, voltas=4).encode('utf-8')
+    arquivos = [('sabado/T1.csv', csv), ('copia/T1.csv', csv), ('Corrida 1.csv', csv)]
+
+    resultados, etapas = importar_arquivos_chronon(arquivos, '#1 Teste', '2024', 'Interlagos', max_processos=1)
+
+    status = {resultado['Arquivo']: resultado['Status'] for resultado in resultados}
+    assert status['sabado/T1.csv'].startswith('✅')
+    assert status['copia/T1.csv'].startswith('❌') and 'sabado/T1.csv' in status['copia/T1.csv']
+    assert len(etapas) == len({chave for chave, _ in etapas}) == 2
@@ -0,0 +1,38 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from chronon_parser import (
+    compactar_voltas, converter_tempo_para_segundos_completo, converter_tempos_vetorizado, processar_csv_chronon_streaming
+)
+from chronon_sintetico import gerar_csv_chronon
+from stock_car_engine import CADASTRO_PILOTOS, processar_csv_chronon
+
+TEMPOS_INCOMUNS = [
+    '1:23.456', ' 1:23,456 ', '83.456', '.5', '5.', '1:23:45', '1_0.5', '1_0:20', '1e2', '+1:2', '-3',
+    '12345678901234567890', '99999999999999999:1.5', '1234567.1234567891234', '1:', ':5', 'No Time', '', ' ',
+    'inf', 'nan', '١٢.٥', None, np.nan, 83.5, 90,
+]
+
+
+def test_vetorizado_igual_ao_conversor_escalar():
+    vetorizado = converter_tempos_vetorizado(pd.Series(TEMPOS_INCOMUNS, dtype=object))
+    escalar = pd.Series([converter_tempo_para_segundos_completo(tempo) for tempo in TEMPOS_INCOMUNS], dtype='float64')
+
+    pd.testing.assert_series_equal(vetorizado, escalar)
+
+
+def test_leitura_em_blocos_igual_a_leitura_de_uma_vez():
+    # Doze pilotos: a ordem de aparição dos números ('1', '2', ..., '10') difere da ordenada
+    csv = gerar_csv_chronon(pilotos=12, voltas=5, nomes_base=['Zeca Teste', 'Ana Teste']).encode('utf-8')
+
+    de_uma_vez = compactar_voltas(processar_csv_chronon(io.BytesIO(csv)))
+    em_blocos = processar_csv_chronon(io.BytesIO(csv), streaming=True)
+    assert 'Lap Tm' in em_blocos.columns
+
+    # Blocos de 3 linhas, menores que o bloco de cada piloto (cabeçalho e 5 voltas)
+    pd.testing.assert_frame_equal(
+        processar_csv_chronon_streaming(io.BytesIO(csv), CADASTRO_PILOTOS, linhas_por_bloco=3), de_uma_vez
+    )
+    pd.testing.assert_frame_equal(em_blocos, de_uma_vez)
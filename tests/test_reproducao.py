@@ -0,0 +1,52 @@
+import asyncio
+import io
+
+from chronon_reproducao import ReproducaoSessao
+from chronon_sintetico import gerar_csv_chronon
+from stock_car_engine import processar_csv_chronon
+
+
+class RelogioFalso:
+    """Relógio controlado pelo teste: dormir só avança a hora"""
+
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+    async def dormir(self, segundos):
+        self.agora += segundos
+
+
+def _reproducao():
+    df = processar_csv_chronon(io.BytesIO(gerar_csv_chronon(pilotos=3, voltas=6).encode('utf-8')))
+    relogio = RelogioFalso()
+    return ReproducaoSessao(df, velocidade=20, relogio=relogio, dormir=relogio.dormir), relogio
+
+
+def test_pausa_nao_conta_como_sessao_nem_atraso():
+    continua, _ = _reproducao()
+    asyncio.run(continua.reproduzir(duracao=10))
+    asyncio.run(continua.reproduzir(duracao=10))
+
+    pausada, relogio = _reproducao()
+    asyncio.run(pausada.reproduzir(duracao=10))
+    pausada.pausar()
+    relogio.agora += 600
+    pausada.retomar()
+    asyncio.run(pausada.reproduzir(duracao=10))
+
+    assert 0 < pausada.posicao == continua.posicao < len(pausada.voltas)
+    assert pausada.resumo_atrasos()['atraso_maximo'] < 1e-6
+
+
+def test_reproduzir_depois_de_pausar_retoma_sozinho():
+    reproducao, relogio = _reproducao()
+    asyncio.run(reproducao.reproduzir(duracao=10))
+    posicao = reproducao.posicao
+    reproducao.pausar()
+    relogio.agora += 600
+
+    asyncio.run(reproducao.reproduzir(duracao=0))
+    assert reproducao.posicao == posicao and reproducao.pausada_em is None
@@ -0,0 +1,45 @@
+import io
+
+import pandas as pd
+
+from chronon_sintetico import gerar_csv_chronon
+from chronon_temporada import FatosTemporada
+from stock_car_engine import fatos_temporada, montar_etapa, processar_csv_chronon
+
+
+def _etapa(etapa, semente, pista='Interlagos', pilotos=4):
+    csv = gerar_csv_chronon(pilotos=pilotos, voltas=6, semente=semente).encode('utf-8')
+    return montar_etapa(processar_csv_chronon(io.BytesIO(csv)), '2024', etapa, 'P2', pista)
+
+
+def test_substituir_e_remover_etapas_igual_a_reconstruir():
+    fatos = FatosTemporada()
+    fatos.aplicar_etapa('A', _etapa('#1', 0))
+    fatos.aplicar_etapa('B', _etapa('#2', 1, 'Goiânia'))
+    fatos.aplicar_etapa('C', _etapa('#3', 2, pilotos=5))
+    fatos.tabela()
+
+    # B reimportada com outras voltas e A removida
+    nova_b = _etapa('#2', 3, 'Goiânia', pilotos=3)
+    fatos.aplicar_etapa('B', nova_b)
+    fatos.remover_etapa('A')
+
+    reconstruida = fatos_temporada({'B': nova_b, 'C': _etapa('#3', 2, pilotos=5)})
+
+    pd.testing.assert_frame_equal(fatos.tabela(), reconstruida.tabela())
+    assert fatos.pilotos() == reconstruida.pilotos()
+    for coluna in ('montadora', 'equipe'):
+        pd.testing.assert_frame_equal(fatos.resumo_por(coluna), reconstruida.resumo_por(coluna))
+    pd.testing.assert_frame_equal(fatos.voltas_ideais_por_pista(), reconstruida.voltas_ideais_por_pista())
+
+    piloto = fatos.pilotos()[-1]
+    pd.testing.assert_frame_equal(fatos.piloto(piloto), reconstruida.piloto(piloto))
+    assert set(fatos.tabela()['chave']) == {'B', 'C'}
+
+
+def test_remover_todas_as_etapas_esvazia_a_tabela():
+    fatos = FatosTemporada()
+    fatos.aplicar_etapa('A', _etapa('#1', 0))
+    fatos.remover_etapa('A')
+
+    assert fatos.tabela().empty and fatos.pilotos() == [] and len(fatos) == 0